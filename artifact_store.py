@@ -0,0 +1,164 @@
+"""
+Content-addressed store for generated artifacts.
+
+Figures, data frames and long stdout produced by the chart generator are
+written to disk once, keyed by their SHA-256, and the conversation only
+carries a short reference plus a summary:
+
+    [artifact sha256:3f9a1c2e0b7d figure 41.2 KB → .artifacts/3f/3f9a...png] Line chart of UK GDP
+
+Later hops re-send the reference instead of the payload. `stats` tracks how
+many bytes were stored and how much text (roughly, how many prompt tokens)
+stayed out of the messages: only `put_text` payloads count, since those
+replace text the tool would otherwise have returned. Figures and data frames
+were never part of the output, so their references are pure additions.
+"""
+
+import hashlib
+import io
+import os
+import sys
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional
+
+# Rough chars-per-token ratio for English text / code, used for the savings estimate
+CHARS_PER_TOKEN = 4
+
+
+@dataclass(frozen=True)
+class ArtifactRef:
+    digest: str
+    kind: str
+    path: str
+    size: int
+    summary: str
+
+    def to_text(self) -> str:
+        return (
+            f"[artifact sha256:{self.digest[:12]} {self.kind} {self.size / 1024:.1f} KB → {self.path}] "
+            f"{self.summary}"
+        )
+
+
+class ArtifactStore:
+    def __init__(self, root: str = ".artifacts"):
+        self.root = root
+        self.stats: Dict[str, int] = {
+            "artifacts": 0,
+            "deduplicated": 0,
+            "bytes_offloaded": 0,
+            "text_chars_offloaded": 0,   # tool output replaced by a reference
+            "reference_chars": 0,
+        }
+
+    # -------------------------------------------------------------------------
+    # Writing
+    # -------------------------------------------------------------------------
+
+    def put_bytes(self, data: bytes, kind: str, suffix: str, summary: str) -> ArtifactRef:
+        digest = hashlib.sha256(data).hexdigest()
+        directory = os.path.join(self.root, digest[:2])
+        path = os.path.join(directory, digest + suffix)
+        if os.path.exists(path):
+            self.stats["deduplicated"] += 1
+        else:
+            os.makedirs(directory, exist_ok=True)
+            # Write then rename so a concurrent reader never sees a partial file
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self.stats["artifacts"] += 1
+
+        ref = ArtifactRef(digest, kind, path, len(data), summary)
+        self.stats["bytes_offloaded"] += len(data)
+        self.stats["reference_chars"] += len(ref.to_text())
+        return ref
+
+    def put_text(self, text: str, kind: str = "stdout", summary: Optional[str] = None) -> ArtifactRef:
+        """Store text the caller leaves out of the tool output in favour of the reference"""
+        ref = self.put_bytes(text.encode(), kind, ".txt", summary or summarize_text(text))
+        self.stats["text_chars_offloaded"] += len(text)
+        return ref
+
+    def put_figure(self, figure, summary: Optional[str] = None) -> ArtifactRef:
+        buffer = io.BytesIO()
+        figure.savefig(buffer, format="png")
+        title = summary or _figure_title(figure)
+        return self.put_bytes(buffer.getvalue(), "figure", ".png", title)
+
+    def put_dataframe(self, frame, name: str = "dataframe") -> ArtifactRef:
+        data = frame.to_csv(index=True).encode()
+        rows, cols = frame.shape
+        summary = f"{name}: {rows} rows x {cols} columns ({', '.join(map(str, list(frame.columns)[:8]))})"
+        return self.put_bytes(data, "dataframe", ".csv", summary)
+
+    # -------------------------------------------------------------------------
+    # Reading / reporting
+    # -------------------------------------------------------------------------
+
+    def read(self, ref: ArtifactRef) -> bytes:
+        with open(ref.path, "rb") as f:
+            return f.read()
+
+    def summary(self) -> dict:
+        saved_chars = max(0, self.stats["text_chars_offloaded"] - self.stats["reference_chars"])
+        return {**self.stats, "prompt_tokens_saved_per_hop": saved_chars // CHARS_PER_TOKEN}
+
+
+def summarize_text(text: str, head: int = 5, tail: int = 3) -> str:
+    lines = text.strip().splitlines()
+    if len(lines) <= head + tail:
+        return " | ".join(lines)[:300]
+    kept = lines[:head] + [f"... ({len(lines) - head - tail} more lines) ..."] + lines[-tail:]
+    return " | ".join(kept)[:500]
+
+
+def _figure_title(figure) -> str:
+    titles = [ax.get_title() for ax in figure.get_axes() if ax.get_title()]
+    # Figure.get_suptitle() is matplotlib >= 3.8; older versions fall back to the axes titles
+    suptitle = figure.get_suptitle() if hasattr(figure, "get_suptitle") else ""
+    return suptitle or ", ".join(titles) or "figure"
+
+
+# =============================================================================
+# REPL HELPERS
+# =============================================================================
+
+def collect_figures(store: ArtifactStore) -> List[ArtifactRef]:
+    """Store and close every open matplotlib figure (only if the code used matplotlib)"""
+    pyplot = sys.modules.get("matplotlib.pyplot")
+    if pyplot is None:
+        return []
+    refs = []
+    for number in pyplot.get_fignums():
+        figure = pyplot.figure(number)
+        refs.append(store.put_figure(figure))
+        pyplot.close(figure)
+    return refs
+
+
+def _frame_fingerprint(pandas, frame) -> Hashable:
+    try:
+        return int(pandas.util.hash_pandas_object(frame, index=True).sum())
+    except TypeError:
+        # Unhashable cells (lists, dicts): fall back to the object itself, so an
+        # in-place change of such a frame is not noticed
+        return ("id", id(frame), frame.shape)
+
+
+def collect_dataframes(
+    store: ArtifactStore, namespace: dict, seen: Dict[str, Hashable], min_rows: int = 20
+) -> List[ArtifactRef]:
+    """Store large pandas DataFrames created or changed in a REPL namespace"""
+    pandas = sys.modules.get("pandas")
+    if pandas is None:
+        return []
+    refs = []
+    for name, value in list(namespace.items()):
+        if isinstance(value, pandas.DataFrame) and len(value) >= min_rows:
+            fingerprint = _frame_fingerprint(pandas, value)
+            if seen.get(name) != fingerprint:
+                seen[name] = fingerprint
+                refs.append(store.put_dataframe(value, name=name))
+    return refs
@@ -0,0 +1,438 @@
+"""
+Latency-aware load balancing across OpenAI-compatible backends.
+
+`BackendPool` sits underneath the OpenAI client as an httpx transport, so
+everything built on `ChatOpenAI` (tool binding, structured output,
+streaming, create_react_agent, ...) works unchanged. Every request is sent
+to one backend, picked per request:
+
+    least_outstanding  fewest in-flight requests (ties: lower EWMA latency)
+    ewma               lowest EWMA latency x (in-flight + 1), "peak EWMA"
+    round_robin        baseline for comparisons
+
+Each backend has a circuit breaker: after `failure_threshold` consecutive
+failures (connection errors, timeouts, 5xx, 429) it is ejected for
+`cooldown_s`, then gets a single half-open trial request; a trial whose
+response is still open after `trial_timeout_s` (a stream nobody closes)
+gives its slot to the next request, so the backend cannot be stranded out
+of rotation. A background
+thread probes GET /models every `health_interval_s`, with the API key: a
+backend that stops answering (or answers 4xx/5xx) is ejected without
+waiting for requests to fail on it, and an ejected one stays out until its
+probe passes again. A request that fails on one backend is retried on the
+next one, so a run keeps going when a backend dies mid-run. Pooled clients
+have the OpenAI client's own retries turned off, since they would stack on
+top of the pool's failover.
+
+Configure the pool with the environment and build models through
+`chat_model()` instead of `ChatOpenAI(...)`:
+
+    OPENAI_BASE_URLS=http://gpu-a:8000/v1,http://gpu-b:8000/v1
+    OPENAI_POOL_STRATEGY=ewma
+
+    model = chat_model("gpt-4o", temperature=0)
+
+Without OPENAI_BASE_URLS, `chat_model()` is a plain ChatOpenAI.
+"""
+
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+import httpx
+
+STRATEGIES = ("least_outstanding", "ewma", "round_robin")
+
+# Host the OpenAI client is pointed at; the transport swaps in a real backend
+POOL_BASE_URL = "http://backend-pool/v1"
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class NoBackendAvailable(httpx.TransportError):
+    """Every backend failed (or was ejected) for this request"""
+
+
+@dataclass
+class Backend:
+    url: str
+    outstanding: int = 0
+    ewma_s: Optional[float] = None
+    consecutive_failures: int = 0
+    state: str = "closed"            # closed -> open (ejected) -> half_open (one trial) -> closed
+    opened_at: float = 0.0
+    trial_started_at: float = 0.0
+    requests: int = 0
+    failures: int = 0
+    ejections: int = 0
+
+    def target(self, path: str, query: bytes) -> httpx.URL:
+        url = self.url.rstrip("/") + path
+        return httpx.URL(url, query=query) if query else httpx.URL(url)
+
+
+class BackendPool:
+    def __init__(
+        self,
+        urls: Sequence[str],
+        strategy: str = "ewma",
+        failure_threshold: int = 3,
+        cooldown_s: float = 10.0,
+        health_interval_s: float = 5.0,
+        health_timeout_s: float = 2.0,
+        trial_timeout_s: float = 120.0,
+        ewma_alpha: float = 0.3,
+        max_attempts: Optional[int] = None,
+        api_key: Optional[str] = None,
+    ):
+        if not urls:
+            raise ValueError("BackendPool needs at least one backend URL")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown strategy {strategy!r}, expected one of {STRATEGIES}")
+        self.backends: List[Backend] = [Backend(url.rstrip("/")) for url in urls]
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self.health_interval_s = health_interval_s
+        self.health_timeout_s = health_timeout_s
+        self.trial_timeout_s = trial_timeout_s
+        self.ewma_alpha = ewma_alpha
+        self.max_attempts = max_attempts or len(self.backends)
+        self.api_key = api_key
+        self.base_url = POOL_BASE_URL
+        self._lock = threading.Lock()
+        self._next = 0
+        self._stop = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+        self.failovers = 0
+
+    # -------------------------------------------------------------------------
+    # Selection and bookkeeping
+    # -------------------------------------------------------------------------
+
+    def _available(self, backend: Backend, now: float) -> bool:
+        if backend.state == "closed":
+            return True
+        if backend.state == "open" and now - backend.opened_at >= self.cooldown_s:
+            backend.state = "half_open"   # this request is the trial
+            backend.trial_started_at = now
+            return True
+        return False
+
+    def _expire_trial(self, backend: Backend, now: float):
+        """Give up on a trial whose response never finished; the next request becomes the trial"""
+        if backend.state == "half_open" and now - backend.trial_started_at >= self.trial_timeout_s:
+            print(f"⏱️ Backend {backend.url}: trial request still open after {self.trial_timeout_s:g}s, retrying")
+            backend.state = "open"
+
+    def acquire(self, exclude: Sequence[Backend] = ()) -> Backend:
+        """Pick a backend for one request and count it as in flight"""
+        with self._lock:
+            now = time.monotonic()
+            for backend in self.backends:
+                self._expire_trial(backend, now)
+            candidates = [b for b in self.backends if b not in exclude and b.state != "half_open"]
+            healthy = [b for b in candidates if self._available(b, now)]
+            if not healthy:
+                # Everything is ejected: try the backend that failed longest ago rather than fail outright
+                healthy = sorted(candidates, key=lambda b: b.opened_at)[:1]
+            if not healthy:
+                raise NoBackendAvailable("no backend left to try")
+
+            if self.strategy == "round_robin":
+                backend = healthy[self._next % len(healthy)]
+                self._next += 1
+            elif self.strategy == "least_outstanding":
+                backend = min(healthy, key=lambda b: (b.outstanding, b.ewma_s or 0.0, random.random()))
+            else:
+                # Unmeasured backends score 0, so each one gets sampled before the EWMA takes over
+                backend = min(healthy, key=lambda b: ((b.ewma_s or 0.0) * (b.outstanding + 1), random.random()))
+            backend.outstanding += 1
+            backend.requests += 1
+            return backend
+
+    def release(self, backend: Backend, latency_s: Optional[float], ok: bool):
+        with self._lock:
+            backend.outstanding -= 1
+            self._record(backend, latency_s, ok)
+
+    def _record(self, backend: Backend, latency_s: Optional[float], ok: bool):
+        if ok:
+            if latency_s is not None:
+                previous = backend.ewma_s
+                backend.ewma_s = latency_s if previous is None else (1 - self.ewma_alpha) * previous + self.ewma_alpha * latency_s
+            backend.consecutive_failures = 0
+            if backend.state != "closed":
+                print(f"🟢 Backend {backend.url} recovered")
+            backend.state = "closed"
+            return
+
+        backend.failures += 1
+        backend.consecutive_failures += 1
+        if backend.state == "half_open" or (
+            backend.state == "closed" and backend.consecutive_failures >= self.failure_threshold
+        ):
+            self._eject(backend, f"{backend.consecutive_failures} failures")
+
+    def _eject(self, backend: Backend, reason: str):
+        backend.state = "open"
+        backend.opened_at = time.monotonic()
+        backend.ejections += 1
+        print(f"🔴 Backend {backend.url} ejected ({reason})")
+
+    def count_failover(self):
+        with self._lock:
+            self.failovers += 1
+
+    # -------------------------------------------------------------------------
+    # Health checks
+    # -------------------------------------------------------------------------
+
+    def check_health(self):
+        """Probe every backend once"""
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        for backend in self.backends:
+            try:
+                response = httpx.get(f"{backend.url}/models", headers=headers, timeout=self.health_timeout_s)
+                # A 401/404 means this backend cannot serve our requests either
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                continue
+            with self._lock:
+                if backend.state == "closed":
+                    self._eject(backend, "health check failed")
+                elif backend.state == "open":
+                    backend.opened_at = time.monotonic()   # still down: don't spend a trial request on it
+
+    def _health_loop(self):
+        while not self._stop.wait(self.health_interval_s):
+            self.check_health()
+
+    def start(self) -> "BackendPool":
+        if self._health_thread is None and self.health_interval_s:
+            self._health_thread = threading.Thread(target=self._health_loop, name="backend-health", daemon=True)
+            self._health_thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self._health_thread is not None:
+            self._health_thread.join(timeout=self.health_timeout_s + 1)
+
+    # -------------------------------------------------------------------------
+    # Clients
+    # -------------------------------------------------------------------------
+
+    def http_client(self, **kwargs) -> httpx.Client:
+        return httpx.Client(transport=PoolTransport(self), **kwargs)
+
+    def async_http_client(self, **kwargs) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=AsyncPoolTransport(self), **kwargs)
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "strategy": self.strategy,
+                "failovers": self.failovers,
+                "backends": {
+                    b.url: {
+                        "state": b.state,
+                        "requests": b.requests,
+                        "failures": b.failures,
+                        "ejections": b.ejections,
+                        "outstanding": b.outstanding,
+                        "ewma_ms": round(b.ewma_s * 1000, 1) if b.ewma_s is not None else None,
+                    }
+                    for b in self.backends
+                },
+            }
+
+
+# =============================================================================
+# TRANSPORTS
+# =============================================================================
+
+def _rewrite(request: httpx.Request, backend: Backend, body: bytes) -> httpx.Request:
+    """Same request, sent to `backend` instead of the pool placeholder host"""
+    path = request.url.path
+    prefix = httpx.URL(POOL_BASE_URL).path.rstrip("/")
+    if path.startswith(prefix):
+        path = path[len(prefix):]
+    headers = [(k, v) for k, v in request.headers.raw if k.lower() not in (b"host", b"content-length")]
+    return httpx.Request(request.method, backend.target(path, request.url.query), headers=headers, content=body)
+
+
+class _TrackedStream(httpx.SyncByteStream):
+    """Keeps the backend counted as busy until the body is consumed, then records the latency"""
+
+    def __init__(self, stream, pool: BackendPool, backend: Backend, start: float):
+        self._stream, self._pool, self._backend, self._start = stream, pool, backend, start
+        self._released = False
+
+    def __iter__(self):
+        try:
+            yield from self._stream
+        except httpx.HTTPError:
+            self._release(ok=False)
+            raise
+
+    def _release(self, ok: bool):
+        if not self._released:
+            self._released = True
+            self._pool.release(self._backend, time.perf_counter() - self._start, ok)
+
+    def close(self):
+        self._stream.close()
+        self._release(ok=True)
+
+
+class _AsyncTrackedStream(httpx.AsyncByteStream):
+    def __init__(self, stream, pool: BackendPool, backend: Backend, start: float):
+        self._stream, self._pool, self._backend, self._start = stream, pool, backend, start
+        self._released = False
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        except httpx.HTTPError:
+            self._release(ok=False)
+            raise
+
+    def _release(self, ok: bool):
+        if not self._released:
+            self._released = True
+            self._pool.release(self._backend, time.perf_counter() - self._start, ok)
+
+    async def aclose(self):
+        await self._stream.aclose()
+        self._release(ok=True)
+
+
+class PoolTransport(httpx.BaseTransport):
+    def __init__(self, pool: BackendPool, transport: Optional[httpx.BaseTransport] = None):
+        self.pool = pool
+        self._transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        body = request.read()
+        tried: List[Backend] = []
+        last_error: Optional[Exception] = None
+        for _ in range(self.pool.max_attempts):
+            try:
+                backend = self.pool.acquire(exclude=tried)
+            except NoBackendAvailable:
+                break
+            if tried:
+                self.pool.count_failover()
+            tried.append(backend)
+            start = time.perf_counter()
+            try:
+                response = self._transport.handle_request(_rewrite(request, backend, body))
+            except httpx.TransportError as e:
+                self.pool.release(backend, None, ok=False)
+                last_error = e
+                continue
+            if response.status_code in RETRYABLE_STATUS and len(tried) < self.pool.max_attempts:
+                response.close()
+                self.pool.release(backend, None, ok=False)
+                last_error = httpx.HTTPStatusError(f"{backend.url} returned {response.status_code}", request=request, response=response)
+                continue
+            if response.status_code in RETRYABLE_STATUS or response.status_code >= 500:
+                self.pool.release(backend, None, ok=False)
+                return response
+            return httpx.Response(
+                response.status_code,
+                headers=response.headers,
+                stream=_TrackedStream(response.stream, self.pool, backend, start),
+                extensions=response.extensions,
+                request=request,
+            )
+        raise NoBackendAvailable(f"all backends failed, last error: {last_error!r}")
+
+    def close(self):
+        self._transport.close()
+
+
+class AsyncPoolTransport(httpx.AsyncBaseTransport):
+    def __init__(self, pool: BackendPool, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.pool = pool
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        tried: List[Backend] = []
+        last_error: Optional[Exception] = None
+        for _ in range(self.pool.max_attempts):
+            try:
+                backend = self.pool.acquire(exclude=tried)
+            except NoBackendAvailable:
+                break
+            if tried:
+                self.pool.count_failover()
+            tried.append(backend)
+            start = time.perf_counter()
+            try:
+                response = await self._transport.handle_async_request(_rewrite(request, backend, body))
+            except httpx.TransportError as e:
+                self.pool.release(backend, None, ok=False)
+                last_error = e
+                continue
+            if response.status_code in RETRYABLE_STATUS and len(tried) < self.pool.max_attempts:
+                await response.aclose()
+                self.pool.release(backend, None, ok=False)
+                last_error = httpx.HTTPStatusError(f"{backend.url} returned {response.status_code}", request=request, response=response)
+                continue
+            if response.status_code in RETRYABLE_STATUS or response.status_code >= 500:
+                self.pool.release(backend, None, ok=False)
+                return response
+            return httpx.Response(
+                response.status_code,
+                headers=response.headers,
+                stream=_AsyncTrackedStream(response.stream, self.pool, backend, start),
+                extensions=response.extensions,
+                request=request,
+            )
+        raise NoBackendAvailable(f"all backends failed, last error: {last_error!r}")
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+# =============================================================================
+# MODEL FACTORY
+# =============================================================================
+
+@lru_cache(maxsize=None)
+def default_pool() -> Optional[BackendPool]:
+    """Pool from OPENAI_BASE_URLS (comma-separated), or None to use a single endpoint"""
+    urls = [url.strip() for url in os.environ.get("OPENAI_BASE_URLS", "").split(",") if url.strip()]
+    if not urls:
+        return None
+    return BackendPool(
+        urls,
+        strategy=os.environ.get("OPENAI_POOL_STRATEGY", "ewma"),
+        api_key=os.environ.get("OPENAI_API_KEY"),
+    ).start()
+
+
+def chat_model(model: str, pool: Optional[BackendPool] = None, **kwargs):
+    """ChatOpenAI whose requests are balanced across the pool's backends (if one is configured)"""
+    from langchain_openai import ChatOpenAI
+
+    pool = pool or default_pool()
+    if pool is not None:
+        # The pool already fails over between backends; client retries would multiply the attempts
+        kwargs.setdefault("max_retries", 0)
+        kwargs.update(
+            base_url=pool.base_url,
+            http_client=pool.http_client(),
+            http_async_client=pool.async_http_client(),
+        )
+    return ChatOpenAI(model=model, **kwargs)
@@ -0,0 +1,104 @@
+"""
+Load balancing across several OpenAI-compatible backends with uneven
+latency: round robin vs. least-outstanding-requests vs. peak-EWMA, plus a
+failover run where the fastest backend dies halfway through.
+
+Each backend is a local stub OpenAI server with its own injected latency
+(`--latencies`, seconds per request); `--flaky` adds one more backend that
+fails that fraction of its requests with HTTP 500. Requests go through
+`chat_model()` from concurrent workers, exactly like the demo graphs' calls.
+
+Usage:
+    python bench_backend_pool.py [--latencies 0.02 0.06 0.2] [--flaky 0.3] [--requests 200] [--concurrency 8]
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend_pool import BackendPool, chat_model
+from stub_openai_server import StubOpenAIServer
+
+
+def run(pool: BackendPool, requests: int, concurrency: int, on_halfway=None) -> dict:
+    model = chat_model(model="gpt-4o", pool=pool, api_key="stub", max_retries=0)
+    latencies, errors = [], 0
+
+    def call(i: int):
+        if i == requests // 2 and on_halfway is not None:
+            on_halfway()
+        start = time.perf_counter()
+        model.invoke(f"request {i}")
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(call, i) for i in range(requests)]:
+            try:
+                latencies.append(future.result())
+            except Exception:
+                errors += 1
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "throughput": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else float("nan"),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000 if latencies else float("nan"),
+        "errors": errors,
+    }
+
+
+def share(pool: BackendPool) -> str:
+    backends = pool.summary()["backends"].values()
+    total = sum(b["requests"] for b in backends) or 1
+    return " / ".join(f"{b['requests'] / total:.0%}" for b in backends)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latencies", type=float, nargs="+", default=[0.02, 0.06, 0.2])
+    parser.add_argument("--flaky", type=float, default=0.3, help="error rate of an extra backend (0 to disable)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    servers = [StubOpenAIServer(latency=latency).start() for latency in args.latencies]
+    labels = [f"{latency * 1000:g}ms" for latency in args.latencies]
+    if args.flaky:
+        servers.append(StubOpenAIServer(latency=args.latencies[0], error_rate=args.flaky).start())
+        labels.append(f"{args.latencies[0] * 1000:g}ms/{args.flaky:.0%} err")
+    urls = [server.base_url for server in servers]
+
+    try:
+        print(f"Backends: {', '.join(labels)} | {args.requests} requests x {args.concurrency} workers")
+        print(f"{'strategy':<18} {'req/s':>6} {'p50 ms':>7} {'p95 ms':>7} {'errors':>7} {'failovers':>10}  share")
+        print("-" * 80)
+        for strategy in ("round_robin", "least_outstanding", "ewma"):
+            pool = BackendPool(urls, strategy=strategy, health_interval_s=0.5, cooldown_s=2.0, api_key="stub")
+            result = run(pool.start(), args.requests, args.concurrency)
+            pool.close()
+            print(
+                f"{strategy:<18} {result['throughput']:>6.1f} {result['p50_ms']:>7.0f} {result['p95_ms']:>7.0f} "
+                f"{result['errors']:>7} {pool.summary()['failovers']:>10}  {share(pool)}"
+            )
+
+        print(f"\nFailover: ewma, {labels[0]} backend stopped after {args.requests // 2} requests")
+        pool = BackendPool(urls, strategy="ewma", health_interval_s=0.5, cooldown_s=2.0, api_key="stub").start()
+        result = run(pool, args.requests, args.concurrency, on_halfway=servers[0].stop)
+        pool.close()
+        summary = pool.summary()
+        print(
+            f"req/s {result['throughput']:.1f} | p50 {result['p50_ms']:.0f} ms | p95 {result['p95_ms']:.0f} ms | "
+            f"errors {result['errors']} | failovers {summary['failovers']} | share {share(pool)}"
+        )
+        for label, backend in zip(labels, summary["backends"].values()):
+            print(f"  {label:<14} {backend['state']:<9} ejections {backend['ejections']}")
+    finally:
+        # servers[0] may already be stopped by the run; stopping twice is harmless
+        for server in servers:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Memory benchmark: MessagesState-style history vs. MessageStore references.
+
+Simulates long sessions in a persistent worker. Each turn adds a user
+message and the wrapped outputs of the research / fact-check / writer agents
+(the same shape `hierarchical_agent_architecture.py` produces). A pool of
+recurring topics gives realistic duplication between turns.
+
+`--graph-turns` then runs a real multi-turn session through the hierarchical
+graph (a local stub OpenAI server routes every turn to the research agent),
+once passing the whole history each turn and once through
+`hierarchical_agent_architecture.new_session`, and compares the graph input
+and the prompt tokens sent per turn.
+
+Usage:
+    python bench_memory.py [--turns 1000] [--hot 200] [--graph-turns 60]
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import os
+import random
+import re
+import time
+import tracemalloc
+from typing import Optional
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph.message import add_messages
+
+from message_store import ConversationSession, MessageStore
+from stub_openai_server import StubOpenAIServer
+
+TOPICS = [f"topic {i}" for i in range(25)]
+AGENTS = ["Research Agent", "Fact Checker", "Writer Agent"]
+
+
+def make_turn(rng: random.Random, turn: int):
+    topic = rng.choice(TOPICS)
+    # Agent answers for a topic are mostly stable, so many bodies repeat
+    variant = rng.randint(0, 3)
+    body = (f"Findings about {topic} (variant {variant}). " * 40).strip()
+    return [HumanMessage(content=f"Turn {turn}: tell me about {topic}")] + [
+        AIMessage(content=f"[{agent}] {body}") for agent in AGENTS
+    ]
+
+
+def run_messages_state(turns: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    history = []
+    for turn in range(turns):
+        history = add_messages(history, make_turn(rng, turn))
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"messages": len(history), "current_mb": current / 2**20, "peak_mb": peak / 2**20, "seconds": elapsed}
+
+
+def run_message_store(turns: int, seed: int, hot: int) -> dict:
+    rng = random.Random(seed)
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    with MessageStore(max_in_memory=hot) as store:
+        session = ConversationSession(store)
+        for turn in range(turns):
+            session.append(make_turn(rng, turn))
+        # Touch the recent window the way a graph invocation would
+        session.recent()
+        elapsed = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        result = {
+            "messages": len(session.refs),
+            "current_mb": current / 2**20,
+            "peak_mb": peak / 2**20,
+            "seconds": elapsed,
+            "spilled_mb": store.spilled_bytes / 2**20,
+            **store.stats,
+        }
+    tracemalloc.stop()
+    return result
+
+
+_OPTION = re.compile(r"^(\d+)\. (\w+)$", re.MULTILINE)
+_LAST_TYPE = re.compile(r"\[(\w+)\] (?:(?!\n\n\[).)*\Z", re.DOTALL)
+
+
+def route_to_research(request: dict) -> str:
+    """Stub reply: send a new user turn to the research agent, end once it answered"""
+    messages = request["messages"]
+    if (request.get("max_completion_tokens") or request.get("max_tokens")) != 1:
+        return "Key findings, supporting figures and their sources for the requested topic. " * 12
+    options = {name: number for number, name in _OPTION.findall(messages[-1].get("content", ""))}
+    last = _LAST_TYPE.search(messages[-2].get("content", ""))
+    if last and last.group(1) == "human":
+        step = "research_team" if "research_team" in options else "research_agent"
+        return options.get(step, options["__end__"])
+    return options["__end__"]
+
+
+def run_graph_session(app, server, turns: int, window: Optional[int]) -> dict:
+    """Prompt tokens and graph input size per turn, with the whole history or a session window"""
+    graph = app.get_hierarchical_graph()
+    session = app.new_session(window=window) if window else None
+    history, inputs = [], []
+    server.prompt_tokens = 0
+    start = time.perf_counter()
+    # The agents' progress prints and langgraph's per-turn warnings would drown the table
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        for turn in range(turns):
+            request = f"Turn {turn}: tell me about {TOPICS[turn % len(TOPICS)]}"
+            if session is None:
+                inputs.append(len(history) + 1)
+                history = graph.invoke({"messages": history + [HumanMessage(content=request)]})["messages"]
+            else:
+                # The window plus the new message (and a notice once older turns are left out)
+                inputs.append(len(session.refs[session.window_start():]) + 1 + (session.window_start() > 0))
+                session.invoke(graph, request)
+    elapsed = time.perf_counter() - start
+    if session is not None:
+        session.store.close()
+    return {
+        "last_input": inputs[-1],
+        "prompt_tokens_per_turn": server.prompt_tokens / turns,
+        "seconds": elapsed,
+    }
+
+
+def compare_graph_sessions(turns: int, window: int):
+    with StubOpenAIServer(content=route_to_research) as server:
+        # The stub answers the one-token routing prompts, so route in lean mode
+        os.environ.update({"OPENAI_BASE_URL": server.base_url, "OPENAI_API_KEY": "stub", "ROUTING_MODE": "lean"})
+        import hierarchical_agent_architecture as app
+
+        app.enable_research_cache(None)   # every turn should reach the model
+        full = run_graph_session(app, server, turns, window=None)
+        windowed = run_graph_session(app, server, turns, window=window)
+
+    print(f"\nhierarchical graph, {turns} turns")
+    print(f"{'':<22} {'last input msgs':>15} {'prompt tok/turn':>15} {'seconds':>8}")
+    for name, result in (("full history", full), (f"session (window {window})", windowed)):
+        print(
+            f"{name:<22} {result['last_input']:>15} {result['prompt_tokens_per_turn']:>15.0f} "
+            f"{result['seconds']:>8.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=1000)
+    parser.add_argument("--hot", type=int, default=200, help="bodies kept in memory by the store")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--graph-turns", type=int, default=60, help="turns through the hierarchical graph (0 to skip)")
+    parser.add_argument("--window", type=int, default=20, help="session window for the graph run")
+    args = parser.parse_args()
+
+    baseline = run_messages_state(args.turns, args.seed)
+    store = run_message_store(args.turns, args.seed, args.hot)
+
+    print(f"{args.turns} turns, {baseline['messages']} messages")
+    print(f"{'':<16} {'current MB':>11} {'peak MB':>9} {'seconds':>8}")
+    for name, result in (("MessagesState", baseline), ("MessageStore", store)):
+        print(f"{name:<16} {result['current_mb']:>11.2f} {result['peak_mb']:>9.2f} {result['seconds']:>8.2f}")
+    print(
+        f"store: {store['deduplicated']} of {store['puts']} bodies deduplicated, "
+        f"{store['spilled']} spilled ({store['spilled_mb']:.2f} MB on disk)"
+    )
+    if args.graph_turns:
+        compare_graph_sessions(args.graph_turns, args.window)
+
+
+if __name__ == "__main__":
+    main()
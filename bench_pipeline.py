@@ -0,0 +1,93 @@
+"""
+End-to-end latency of the writer / editor / critic network: the current
+sequential flow vs. the paragraph-pipelined mode.
+
+A local stub OpenAI server plays every role with story-sized replies and
+decodes them at a fixed rate (`--token-latency` seconds per token, streamed
+when the client asks for a stream), so the difference comes from overlap
+alone:
+
+    sequential: writer (whole story) -> editor (whole story) -> critic
+    pipelined:  writer streams paragraphs; per-paragraph edit + review run
+                concurrently; then one stitch pass and a whole-story review
+
+Usage:
+    python bench_pipeline.py [--paragraphs 4] [--words 90] [--token-latency 0.005] [--runs 3]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import time
+
+from stub_openai_server import StubOpenAIServer
+
+
+def make_reply(paragraphs: int, words: int):
+    def paragraph(i: int, variant: str) -> str:
+        return " ".join(f"{variant}{i}-{w}" for w in range(words)) + "."
+
+    def story(variant: str) -> str:
+        return "\n\n".join(paragraph(i, variant) for i in range(paragraphs))
+
+    def reply(request: dict) -> str:
+        system = request["messages"][0].get("content", "")
+        if "one paragraph of a story while" in system:
+            return paragraph(0, "edited")
+        if "reviewing one paragraph" in system:
+            return json.dumps({"quality_score": 8, "notes": "Tighten the transition into the next scene."})
+        if "reviewing a finished story" in system:
+            return json.dumps({"quality_score": 9, "approved": True, "notes": ""})
+        if "final editor" in system:
+            return story("final")
+        if "plain prose only" in system:
+            return story("draft")
+        if "professional editor" in system:
+            return json.dumps({"content": story("edited"), "next_agent": "critic", "reasoning": "polished the prose"})
+        if "literary critic" in system:
+            return json.dumps({
+                "content": story("edited"), "next_agent": "__end__", "reasoning": "ready", "quality_score": 9,
+            })
+        return json.dumps({"content": story("draft"), "next_agent": "editor", "reasoning": "needs a pass"})
+
+    return reply
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragraphs", type=int, default=4)
+    parser.add_argument("--words", type=int, default=90, help="words per paragraph")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds to first token")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="seconds per output token")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    reply = make_reply(args.paragraphs, args.words)
+    with StubOpenAIServer(latency=args.latency, token_latency=args.token_latency, content=reply) as server:
+        os.environ.update({"OPENAI_BASE_URL": server.base_url, "OPENAI_API_KEY": "stub"})
+        import network
+
+        prompt = {"messages": [{"role": "user", "content": "Write a short story about a lighthouse keeper"}]}
+        results = {}
+        for label, graph in [("sequential", network.get_network()), ("pipelined", network.get_pipelined_network())]:
+            latencies = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    graph.invoke(prompt, {"recursion_limit": 50})
+                latencies.append(time.perf_counter() - start)
+            results[label] = statistics.median(latencies)
+
+    print(f"{args.paragraphs} paragraphs x {args.words} words, {args.token_latency * 1000:g} ms/token")
+    print(f"{'flow':<12} {'median s':>9}")
+    print("-" * 22)
+    for label, seconds in results.items():
+        print(f"{label:<12} {seconds:>9.2f}")
+    print(f"Speedup: {results['sequential'] / results['pipelined']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Micro-benchmark: `add_messages` (MessagesState) vs `append_messages`
+(AppendOnlyMessagesState).
+
+Two measurements at each history length:
+
+    - reducer: cost of folding one new AIMessage into an n-message history
+    - graph:   per-step cost of a one-node StateGraph loop that appends an
+               AIMessage each step, starting from an n-message history
+
+Usage:
+    python bench_reducer.py [--sizes 10 100 1000] [--steps 200]
+"""
+
+import argparse
+import time
+from typing import Callable
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import MessagesState, StateGraph, START, END
+from langgraph.graph.message import add_messages
+
+from fast_state import AppendOnlyMessagesState, append_messages
+
+
+def make_history(n: int) -> list:
+    return [
+        (HumanMessage if i % 2 == 0 else AIMessage)(content=f"message {i} " + "lorem ipsum " * 20)
+        for i in range(n)
+    ]
+
+
+def bench_reducer(reducer: Callable, n: int, steps: int) -> float:
+    """Mean seconds per single-message update, history growing from n to n + steps"""
+    value = reducer([], make_history(n))
+    updates = [[AIMessage(content=f"update {i}")] for i in range(steps)]
+    start = time.perf_counter()
+    for update in updates:
+        value = reducer(value, update)
+    return (time.perf_counter() - start) / steps
+
+
+def build_loop(state_class):
+    def agent(state):
+        return {"messages": [AIMessage(content="step")]}
+
+    def route(state):
+        return END if len(state["messages"]) >= state["target"] else "agent"
+
+    class State(state_class):
+        target: int
+
+    builder = StateGraph(State)
+    builder.add_node("agent", agent)
+    builder.add_edge(START, "agent")
+    builder.add_conditional_edges("agent", route, ["agent", END])
+    return builder.compile()
+
+
+def bench_graph(state_class, n: int, steps: int) -> float:
+    """Mean seconds per graph step, including LangGraph's own overhead"""
+    graph = build_loop(state_class)
+    history = make_history(n)
+    start = time.perf_counter()
+    graph.invoke({"messages": history, "target": n + steps}, {"recursion_limit": steps + 10})
+    return (time.perf_counter() - start) / steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--steps", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'messages':>8} {'what':>8} {'add_messages µs':>16} {'append µs':>10} {'speedup':>8}")
+    print("-" * 56)
+    for n in args.sizes:
+        rows = [
+            ("reducer", bench_reducer(add_messages, n, args.steps), bench_reducer(append_messages, n, args.steps)),
+            ("graph", bench_graph(MessagesState, n, args.steps), bench_graph(AppendOnlyMessagesState, n, args.steps)),
+        ]
+        for label, baseline, fast in rows:
+            print(f"{n:>8} {label:>8} {baseline * 1e6:>16.1f} {fast * 1e6:>10.1f} {baseline / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Latency of serial ReAct-style research vs. the parallel research pipeline.
+
+Both sides use a local stub OpenAI server (with injected model latency) and a
+fake search function (with injected search latency) whose results overlap
+between sub-queries, so deduplication has something to do.
+
+    serial:   per sub-query one model turn + one search, then the answer turn
+    pipeline: one decomposition call, concurrent searches, local merge, then
+              the answer turn
+
+Usage:
+    python bench_research.py [--queries 2 4 6] [--model-latency 0.4] [--search-latency 0.8]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+
+from langchain_core.messages import HumanMessage
+
+from research_pipeline import ResearchPipeline
+from stub_openai_server import DEFAULT_CONTENT, StubOpenAIServer
+
+
+def fake_search(latency: float, results_per_query: int = 5):
+    def search(query: str) -> dict:
+        time.sleep(latency)
+        slug = "-".join(query.lower().split())
+        return {"results": [
+            {
+                # The first two pages are shared by every query, like the usual encyclopedia / statistics hits
+                "url": f"https://www.example.com/{'shared' if i < 2 else slug}/{i}/",
+                "title": f"{query} result {i}",
+                "content": f"{query} figures page {i}" if i >= 2 else f"shared overview page {i}",
+                "score": 1.0 - i * 0.1,
+            }
+            for i in range(results_per_query)
+        ]}
+    return search
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, nargs="+", default=[2, 4, 6])
+    parser.add_argument("--model-latency", type=float, default=0.4)
+    parser.add_argument("--search-latency", type=float, default=0.8)
+    args = parser.parse_args()
+
+    from langchain_openai import ChatOpenAI
+
+    print(f"{'sub-queries':>11} {'serial s':>9} {'pipeline s':>11} {'speedup':>8} {'results':>8} {'kept':>5}")
+    print("-" * 57)
+    for n in args.queries:
+        queries = [f"GDP of region {i} in 2024" for i in range(n)]
+        content = json.dumps({**json.loads(DEFAULT_CONTENT), "queries": queries})
+        with StubOpenAIServer(latency=args.model_latency, content=content) as server:
+            os.environ.update({"OPENAI_BASE_URL": server.base_url, "OPENAI_API_KEY": "stub"})
+            model = ChatOpenAI(model="gpt-4o-mini", base_url=server.base_url, api_key="stub")
+            search = fake_search(args.search_latency)
+            question = "Compare " + " and ".join(queries)
+
+            start = time.perf_counter()
+            for query in queries:
+                model.invoke([HumanMessage(content=question)])
+                search(query)
+            model.invoke([HumanMessage(content=question)])
+            serial = time.perf_counter() - start
+
+            pipeline = ResearchPipeline(search=search, model_factory=lambda: model, max_queries=n, max_workers=n)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                context = pipeline.run(question)
+            model.invoke([HumanMessage(content=context.to_text())])
+            parallel = time.perf_counter() - start
+            pipeline.close()
+
+        print(
+            f"{n:>11} {serial:>9.2f} {parallel:>11.2f} {serial / parallel:>7.1f}x "
+            f"{context.raw_results:>8} {len(context.hits):>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Hit rate and team latency of the research cache on a stream of research
+requests with repeated topics.
+
+Requests are drawn (Zipf-like) from a handful of topics, each phrased
+several ways, and run through `research_team_graph` twice: without the
+cache and with it. A simulated clock advances `--interval-min` minutes per
+request, so entries older than `--ttl-h` hours go stale and get
+re-researched. A local stub OpenAI server plays every role: it routes
+research agent -> fact checker -> end and replies with research-sized text
+decoded at `--token-latency` seconds per token.
+
+Usage:
+    python bench_research_cache.py [--requests 40] [--ttl-h 6] [--interval-min 20]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import re
+import statistics
+import time
+
+from stub_openai_server import StubOpenAIServer
+
+TOPICS = [
+    ["the benefits of renewable energy", "What are the benefits of renewable energy?", "Research renewable energy benefits"],
+    ["how vaccines train the immune system", "Explain how vaccines train the immune system", "vaccines immune system training"],
+    ["the causes of the 2008 financial crisis", "What caused the 2008 financial crisis?", "2008 financial crisis causes"],
+    ["the history of the printing press", "Give me an overview of the printing press history", "printing press history"],
+    ["the impact of remote work on productivity", "remote work productivity impact", "How does remote work impact productivity?"],
+    ["coral reef bleaching", "Why does coral reef bleaching happen?", "research coral reef bleaching"],
+]
+
+_OPTION = re.compile(r"^(\d+)\. (\w+)$", re.MULTILINE)
+
+
+def reply(request: dict) -> str:
+    messages = request["messages"]
+    system, last = messages[0].get("content", ""), messages[-1].get("content", "")
+    if (request.get("max_completion_tokens") or request.get("max_tokens")) == 1:
+        options = {name: number for number, name in _OPTION.findall(last)}
+        transcript = messages[-2].get("content", "")
+        if "research team supervisor" in system and "[Fact Checker]" not in transcript:
+            step = "fact_checker" if "[Research Agent]" in transcript else "research_agent"
+            return options.get(step, options.get("__end__", "1"))
+        return options.get("__end__", "1")
+    if "fact-checking agent" in system:
+        return "The figures above match the cited sources; no corrections needed. " * 4 + "\nVERDICT: PASS"
+    return "Key findings, supporting figures and their sources for the requested topic. " * 12
+
+
+def make_requests(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(TOPICS))]
+    return [rng.choice(rng.choices(TOPICS, weights)[0]) for _ in range(count)]
+
+
+def run(app, requests, interval_s: float, clock: list) -> list:
+    results = []
+    for prompt in requests:
+        clock[0] += interval_s
+        cache = app.get_research_cache()
+        lookups_before = dict(cache.stats) if cache is not None else {}
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            app.get_research_team_graph().invoke({"messages": [("user", prompt)]})
+        elapsed = time.perf_counter() - start
+        status = "off"
+        if cache is not None:
+            stats = cache.stats
+            status = next(key for key in ("hits", "stale", "misses") if stats[key] > lookups_before[key])
+        results.append((status, elapsed))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--ttl-h", type=float, default=6.0)
+    parser.add_argument("--interval-min", type=float, default=20.0, help="simulated minutes between requests")
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds to first token")
+    parser.add_argument("--token-latency", type=float, default=0.002, help="seconds per output token")
+    args = parser.parse_args()
+
+    with StubOpenAIServer(latency=args.latency, token_latency=args.token_latency, content=reply) as server:
+        # The stub answers the one-token routing prompts, so route in lean mode
+        os.environ.update({"OPENAI_BASE_URL": server.base_url, "OPENAI_API_KEY": "stub", "ROUTING_MODE": "lean"})
+        import hierarchical_agent_architecture as app
+        from research_cache import ResearchCache
+
+        requests = make_requests(args.requests)
+        clock = [time.time()]
+
+        app.enable_research_cache(None)
+        baseline = run(app, requests, args.interval_min * 60, clock)
+
+        app.enable_research_cache(ResearchCache(ttl_s=args.ttl_h * 3600, clock=lambda: clock[0]))
+        cached = run(app, requests, args.interval_min * 60, clock)
+
+    baseline_total = sum(seconds for _, seconds in baseline)
+    cached_total = sum(seconds for _, seconds in cached)
+    summary = app.get_research_cache().summary()
+    print(
+        f"{args.requests} requests over {len(TOPICS)} topics, one every {args.interval_min:g} min, "
+        f"TTL {args.ttl_h:g} h"
+    )
+    print(f"{'status':<8} {'count':>6} {'mean ms':>8}")
+    print("-" * 24)
+    for label, key in [("hit", "hits"), ("stale", "stale"), ("miss", "misses")]:
+        latencies = [seconds for status, seconds in cached if status == key]
+        mean = statistics.fmean(latencies) * 1000 if latencies else 0.0
+        print(f"{label:<8} {len(latencies):>6} {mean:>8.0f}")
+    print(f"no cache {len(baseline):>6} {statistics.fmean(s for _, s in baseline) * 1000:>8.0f}")
+    print(
+        f"\nHit rate {summary['hit_rate']:.0%} | team time {baseline_total:.1f}s -> {cached_total:.1f}s "
+        f"(measured saving {baseline_total - cached_total:.1f}s, cache estimate {summary['latency_saved_s']:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Throughput / latency curves for micro-batched routing against a fake backend.
+
+The fake backend charges a fixed per-call overhead plus a small per-item cost,
+which is the shape of a hosted structured-output call. Each client thread is
+one conversation making back-to-back routing decisions.
+
+Usage:
+    python bench_routing_batch.py [--overhead-ms 40] [--item-ms 2] [--decisions 20]
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from typing import Literal
+
+from pydantic import BaseModel
+
+from routing_batcher import RoutingBatcher
+
+
+class Decision(BaseModel):
+    next_agent: Literal["research_agent", "__end__"]
+
+
+class FakeBackend:
+    def __init__(self, overhead_ms: float, item_ms: float):
+        self.overhead = overhead_ms / 1000
+        self.item = item_ms / 1000
+
+    def __call__(self, schema, batch):
+        time.sleep(self.overhead + self.item * len(batch))
+        return [schema(next_agent="__end__") for _ in batch]
+
+
+def run(backend, clients: int, decisions: int, batched: bool, window_ms: float, max_batch: int):
+    batcher = RoutingBatcher(backend, max_batch_size=max_batch, max_wait_ms=window_ms) if batched else None
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        local = []
+        for _ in range(decisions):
+            start = time.perf_counter()
+            if batcher is None:
+                backend(Decision, [[]])
+            else:
+                batcher.submit(Decision, [])
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    backend_calls = batcher.stats["batches"] if batcher else clients * decisions
+    if batcher:
+        batcher.close()
+
+    latencies.sort()
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "backend_calls": backend_calls,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--overhead-ms", type=float, default=40)
+    parser.add_argument("--item-ms", type=float, default=2)
+    parser.add_argument("--decisions", type=int, default=20, help="routing decisions per conversation")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--windows", type=float, nargs="+", default=[1, 5, 10])
+    args = parser.parse_args()
+
+    # A real hosted endpoint also rate-limits parallel calls; model that with a
+    # fixed number of concurrent slots for the unbatched baseline.
+    backend = FakeBackend(args.overhead_ms, args.item_ms)
+    slots = threading.Semaphore(8)
+
+    def limited(schema, batch):
+        with slots:
+            return backend(schema, batch)
+
+    print(f"{'clients':>7} {'mode':<14} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'calls':>7}")
+    print("-" * 58)
+    for clients in args.clients:
+        modes = [("unbatched", False, 0)] + [(f"window {w:g}ms", True, w) for w in args.windows]
+        for label, batched, window in modes:
+            result = run(limited, clients, args.decisions, batched, window, args.max_batch)
+            print(
+                f"{clients:>7} {label:<14} {result['throughput']:>8.1f} {result['p50_ms']:>8.1f} "
+                f"{result['p95_ms']:>8.1f} {result['backend_calls']:>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
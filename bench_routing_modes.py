@@ -0,0 +1,91 @@
+"""
+Output tokens and latency per routing hop: full schemas (with reasoning) vs.
+lean enum-only routing.
+
+Runs the research supervisor's routing call through the hierarchical graph's
+tiering engine against a local stub OpenAI server that charges a fixed
+latency per request plus a per-output-token decode time, and replies with a
+typical reasoning-sized JSON decision, or a bare option number when the
+request is capped at one token.
+
+Usage:
+    python bench_routing_modes.py [--hops 30] [--latency 0.15] [--token-latency 0.015]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import time
+
+from stub_openai_server import StubOpenAIServer
+
+FULL_REPLY = json.dumps({
+    "next_agent": "__end__",
+    "next_team": "__end__",
+    "reasoning": (
+        "The research agent has already gathered detailed information on the topic and the fact checker "
+        "has confirmed the key figures, so there is nothing left for the research team to do and control "
+        "should return to the top-level supervisor."
+    ),
+    "confidence": 0.9,
+})
+
+
+def reply(request: dict) -> str:
+    if (request.get("max_completion_tokens") or request.get("max_tokens")) == 1:
+        return "3"
+    return FULL_REPLY
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hops", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.15, help="fixed seconds per request")
+    parser.add_argument("--token-latency", type=float, default=0.015, help="seconds per output token")
+    args = parser.parse_args()
+
+    with StubOpenAIServer(latency=args.latency, token_latency=args.token_latency, content=reply) as server:
+        os.environ.update({"OPENAI_BASE_URL": server.base_url, "OPENAI_API_KEY": "stub"})
+        import hierarchical_agent_architecture as app
+        from lean_routing import RoutingMode
+        from prompt_assembly import assemble_prompt
+
+        prompt = assemble_prompt(app.RESEARCH_ROUTING_PROMPT, "Last message: [ai] [Research Agent] findings ...")
+        modes = [
+            ("full", RoutingMode("full"), True),
+            ("sampled 10%", RoutingMode("sampled", sample_rate=0.1), True),
+            ("lean", RoutingMode("lean"), False),
+            ("lean+logprobs", RoutingMode("lean"), True),
+        ]
+
+        print(f"{'mode':<14} {'out tok/hop':>11} {'p50 ms':>8} {'mean ms':>8} {'vs full':>8}")
+        print("-" * 53)
+        baseline = None
+        for label, mode, use_logprobs in modes:
+            app.routing_mode = mode
+            tokens_before = server.completion_tokens
+            latencies = []
+            for _ in range(args.hops):
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    if mode.wants_reasoning():
+                        app.tiers.invoke_structured("research_supervisor", app.ResearchRoutingDecision, prompt)
+                    else:
+                        app.tiers.invoke_choice(
+                            "research_supervisor", app.ResearchRoutingDecision, prompt, use_logprobs=use_logprobs
+                        )
+                latencies.append(time.perf_counter() - start)
+            tokens = (server.completion_tokens - tokens_before) / args.hops
+            mean = statistics.fmean(latencies)
+            baseline = baseline or mean
+            print(
+                f"{label:<14} {tokens:>11.1f} {statistics.median(latencies) * 1000:>8.0f} "
+                f"{mean * 1000:>8.0f} {baseline / mean:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
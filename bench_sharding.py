@@ -0,0 +1,68 @@
+"""
+Scaling benchmark for ShardedExecutor.
+
+Runs the same batch of conversations with 1..N worker processes against a
+local stub OpenAI server with no injected latency, so the run is bound by
+Python-side orchestration work rather than by the model.
+
+Usage:
+    python bench_sharding.py [--graph hierarchical] [--conversations 400] [--max-workers 8]
+"""
+
+import argparse
+import os
+import time
+
+from load_test import GRAPHS
+from sharded_executor import ShardedExecutor
+from stub_openai_server import StubOpenAIServer
+
+
+def run(graph: str, workers: int, conversations: int) -> dict:
+    with ShardedExecutor(graph, workers=workers) as executor:
+        start = time.perf_counter()
+        futures = [
+            executor.submit(f"thread-{i}", [{"role": "user", "content": f"Request {i}: research renewable energy"}])
+            for i in range(conversations)
+        ]
+        errors = 0
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                errors += 1
+        elapsed = time.perf_counter() - start
+        summary = executor.summary()
+    return {"throughput": conversations / elapsed, "p50_s": summary["p50_s"], "errors": errors}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--graph", default="hierarchical", choices=list(GRAPHS))
+    parser.add_argument("--conversations", type=int, default=400)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with StubOpenAIServer() as server:
+        os.environ.update({
+            "OPENAI_BASE_URL": server.base_url,
+            "OPENAI_API_KEY": "stub",
+            "TAVILY_API_KEY": "stub",
+        })
+
+        counts = sorted({1, *[2 ** i for i in range(1, 8) if 2 ** i < args.max_workers], args.max_workers})
+        print(f"{args.conversations} conversations on '{args.graph}'")
+        print(f"{'workers':>7} {'conv/s':>8} {'speedup':>8} {'p50 ms':>8} {'errors':>7}")
+        print("-" * 44)
+        baseline = None
+        for workers in counts:
+            result = run(args.graph, workers, args.conversations)
+            baseline = baseline or result["throughput"]
+            print(
+                f"{workers:>7} {result['throughput']:>8.1f} {result['throughput'] / baseline:>7.2f}x "
+                f"{result['p50_s'] * 1000:>8.1f} {result['errors']:>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
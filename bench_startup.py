@@ -0,0 +1,98 @@
+"""
+Startup benchmark for the demo scripts.
+
+For each script a fresh interpreter measures:
+
+    - import time (module execution only, nothing should be built)
+    - graph build time (first call of the lazy graph factory)
+    - time to first invoke (one full run against a local stub OpenAI server)
+
+Usage:
+    python bench_startup.py [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from stub_openai_server import StubOpenAIServer
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# script -> graph factory
+SCRIPTS = {
+    "hierarchical_agent_architecture.py": "get_hierarchical_graph",
+    "network.py": "get_network",
+    "network-01.py": "get_graph",
+    "supervisor.py": "get_supervisor",
+    "supervisor-01.py": "get_supervisor_graph",
+    "supervisor-toolcall.py": "get_supervisor",
+}
+
+PROBE = r"""
+import importlib.util, json, sys, time
+
+path, factory = sys.argv[1], sys.argv[2]
+t0 = time.perf_counter()
+spec = importlib.util.spec_from_file_location("bench_target", path)
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+t1 = time.perf_counter()
+graph = getattr(module, factory)()
+t2 = time.perf_counter()
+graph.invoke({"messages": [("user", "What is 2 + 2?")]}, {"recursion_limit": 25})
+t3 = time.perf_counter()
+print(json.dumps({"import_s": t1 - t0, "build_s": t2 - t1, "first_invoke_s": t3 - t0}))
+"""
+
+
+def probe(script: str, factory: str, env: dict) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE, os.path.join(ROOT, script), factory],
+        cwd=ROOT,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"
+        return {"error": error}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with StubOpenAIServer() as server:
+        env = {
+            **os.environ,
+            "OPENAI_BASE_URL": server.base_url,
+            "OPENAI_API_KEY": "stub",
+            "TAVILY_API_KEY": "stub",
+            "LANGSMITH_TRACING": "false",
+        }
+
+        print(f"{'script':<38} {'import':>9} {'build':>9} {'1st invoke':>11}")
+        print("-" * 70)
+        for script, factory in SCRIPTS.items():
+            runs = [probe(script, factory, env) for _ in range(args.repeat)]
+            errors = [run["error"] for run in runs if "error" in run]
+            if errors:
+                print(f"{script:<38} failed: {errors[0]}")
+                continue
+            medians = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+            print(
+                f"{script:<38} {medians['import_s'] * 1000:>7.0f}ms {medians['build_s'] * 1000:>7.0f}ms "
+                f"{medians['first_invoke_s'] * 1000:>9.0f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
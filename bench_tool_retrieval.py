@@ -0,0 +1,152 @@
+"""
+Prompt size and latency of a tool-calling supervisor as the number of
+specialist tools grows: every tool bound on every call vs. top-k retrieval.
+
+Synthetic specialists (one per domain, described by a few keywords) are
+bound to `create_react_agent`; each request targets one of them. A local
+stub OpenAI server estimates prompt tokens from the request body (messages
+plus tool schemas) and charges `--prompt-token-latency` per prompt token, so
+latency grows with prompt size like a real prefill.
+
+Usage:
+    python bench_tool_retrieval.py [--tools 3 10 25 50] [--k 3] [--requests 40]
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import StructuredTool
+
+from stub_openai_server import StubOpenAIServer
+from tool_retrieval import ToolRetrievalModel
+
+DOMAINS = {
+    "math": "arithmetic algebra equation calculus derivative integral",
+    "writing": "proofread grammar spelling rewrite essay email",
+    "research": "history science geography explanation topic",
+    "travel": "flight hotel itinerary booking airport visa",
+    "finance": "budget invoice expense revenue forecast accounting",
+    "legal": "contract clause liability lawsuit compliance",
+    "medical": "symptom diagnosis medication dosage clinic",
+    "weather": "forecast rain temperature humidity storm",
+    "cooking": "recipe ingredient bake oven dinner",
+    "fitness": "workout exercise muscle cardio training",
+    "music": "chord melody guitar piano song",
+    "astronomy": "planet galaxy telescope orbit star",
+    "chemistry": "molecule reaction compound acid element",
+    "biology": "cell gene protein organism evolution",
+    "geology": "rock mineral earthquake volcano sediment",
+    "gardening": "plant soil seed compost pruning",
+    "pets": "dog cat veterinarian puppy grooming",
+    "cars": "engine tire brake mechanic transmission",
+    "real_estate": "mortgage rent apartment landlord property",
+    "tax": "deduction refund irs filing bracket",
+    "shipping": "parcel courier tracking delivery customs",
+    "hr": "hiring interview payroll onboarding resume",
+    "marketing": "campaign seo advertising brand audience",
+    "sales": "lead pipeline quota prospect deal",
+    "security": "password phishing firewall vulnerability malware",
+    "networking": "router dns ip subnet latency",
+    "database": "sql query index schema table",
+    "cloud": "kubernetes container deploy cluster serverless",
+    "design": "logo typography color layout mockup",
+    "photography": "camera lens exposure aperture portrait",
+    "film": "movie director screenplay actor cinema",
+    "sports": "football basketball score league match",
+    "chess": "opening checkmate gambit endgame pawn",
+    "languages": "translate spanish french vocabulary pronunciation",
+    "education": "lesson curriculum homework quiz student",
+    "parenting": "toddler bedtime tantrum sibling daycare",
+    "psychology": "anxiety therapy behavior memory motivation",
+    "philosophy": "ethics metaphysics kant stoicism argument",
+    "religion": "scripture prayer church temple ritual",
+    "politics": "election parliament senate policy vote",
+    "economics": "inflation gdp unemployment interest market",
+    "crypto": "bitcoin blockchain wallet token mining",
+    "energy": "solar battery grid wind turbine",
+    "climate": "emission carbon warming glacier sea",
+    "agriculture": "crop harvest tractor irrigation livestock",
+    "fashion": "outfit fabric dress trend wardrobe",
+    "gaming": "console multiplayer quest level controller",
+    "home_repair": "plumbing leak drywall faucet carpentry",
+    "insurance": "premium claim policyholder coverage deductible",
+    "events": "wedding venue guest catering invitation",
+}
+
+
+def make_tools(count: int):
+    tools = []
+    for name in list(DOMAINS)[:count]:
+        def handle(request: str, _name=name) -> str:
+            return f"{_name} specialist: done"
+        tools.append(StructuredTool.from_function(
+            handle,
+            name=f"{name}_agent",
+            description=f"Specialist for {name.replace('_', ' ')} questions: {', '.join(DOMAINS[name].split())}.",
+        ))
+    return tools
+
+
+def make_requests(count: int, tools_count: int, seed: int = 0):
+    rng = random.Random(seed)
+    names = list(DOMAINS)[:tools_count]
+    requests = []
+    for _ in range(count):
+        name = rng.choice(names)
+        words = rng.sample(DOMAINS[name].split(), 2)
+        requests.append((f"{name}_agent", f"Can you help me with a question about {words[0]} and {words[1]}?"))
+    return requests
+
+
+def run(graph, requests, server) -> dict:
+    latencies, tokens_before = [], server.prompt_tokens
+    for _, prompt in requests:
+        start = time.perf_counter()
+        graph.invoke({"messages": [("user", prompt)]})
+        latencies.append(time.perf_counter() - start)
+    return {
+        "prompt_tokens": (server.prompt_tokens - tokens_before) / len(requests),
+        "latency_s": statistics.fmean(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tools", type=int, nargs="+", default=[3, 10, 25, 50])
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--prompt-token-latency", type=float, default=0.0002, help="seconds per prompt token")
+    args = parser.parse_args()
+
+    from langchain_openai import ChatOpenAI
+    from langgraph.prebuilt import create_react_agent
+
+    with StubOpenAIServer(latency=args.latency, prompt_token_latency=args.prompt_token_latency) as server:
+        model = ChatOpenAI(model="gpt-4o", base_url=server.base_url, api_key="stub")
+        print(f"{'tools':>5} {'full tok':>9} {'top-k tok':>10} {'full ms':>8} {'top-k ms':>9} {'recall':>7} {'fallback':>9}")
+        print("-" * 64)
+        for count in args.tools:
+            tools = make_tools(count)
+            requests = make_requests(args.requests, count)
+            full = run(create_react_agent(model, tools), requests, server)
+
+            retrieval = ToolRetrievalModel(model, k=args.k)
+            top_k = run(create_react_agent(retrieval, tools), requests, server)
+            bound = retrieval.bind_tools(tools)
+            hits = sum(
+                target in {tool.name for tool in bound.select([HumanMessage(content=prompt)])[0]}
+                for target, prompt in requests
+            )
+            print(
+                f"{count:>5} {full['prompt_tokens']:>9.0f} {top_k['prompt_tokens']:>10.0f} "
+                f"{full['latency_s'] * 1000:>8.0f} {top_k['latency_s'] * 1000:>9.0f} "
+                f"{hits / len(requests):>6.0%} {retrieval.summary()['fallback_rate']:>8.0%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Convergence-based early exit for the writer / editor / critic loop.
+
+The loop in `network.py` otherwise only stops when a model picks "__end__".
+The controller looks at two local signals after every hop:
+
+    - the critic's quality scores: stop once a score reaches the target, or
+      when the last few reviews stopped improving (plateau)
+    - draft-to-draft edit distance: stop when a new draft barely differs
+      from the previous one
+
+Edit distance is a word-level Levenshtein distance normalised by draft
+length. The common prefix and suffix are trimmed first, so comparing two
+drafts that differ in a few places costs little more than a scan.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+_WORD = re.compile(r"\S+")
+
+
+def edit_ratio(previous: str, current: str) -> float:
+    """Word-level edit distance between two drafts, normalised to [0, 1]"""
+    a, b = _WORD.findall(previous), _WORD.findall(current)
+    longest = max(len(a), len(b))
+    if longest == 0:
+        return 0.0
+
+    # Trim the shared prefix / suffix - edits between drafts are usually local
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a, b = a[start:end_a], b[start:end_b]
+    if not a or not b:
+        return max(len(a), len(b)) / longest
+
+    # Two-row Levenshtein over the differing middle
+    previous_row = list(range(len(b) + 1))
+    for i, word_a in enumerate(a, 1):
+        row = [i] + [0] * len(b)
+        for j, word_b in enumerate(b, 1):
+            row[j] = min(
+                previous_row[j] + 1,
+                row[j - 1] + 1,
+                previous_row[j - 1] + (word_a != word_b),
+            )
+        previous_row = row
+    return previous_row[-1] / longest
+
+
+@dataclass
+class ConvergenceController:
+    target_quality: float = 8.0
+    plateau_patience: int = 2        # reviews without meaningful improvement before stopping
+    min_quality_gain: float = 0.5
+    min_edit_ratio: float = 0.03     # drafts changing less than 3% of words count as converged
+    max_iterations: int = 12
+
+    def decide(
+        self, quality_scores: Sequence[float], edit_ratios: Sequence[float], iterations: int, edited: bool = True
+    ) -> Optional[str]:
+        """
+        Return a stop reason, or None to let the loop continue. `edited` says
+        whether this hop produced a new draft; the last edit ratio is only
+        current then (on a critic hop it belongs to an earlier edit).
+        """
+        if quality_scores and quality_scores[-1] >= self.target_quality:
+            return f"quality {quality_scores[-1]:g} reached target {self.target_quality:g}"
+
+        if len(quality_scores) > self.plateau_patience:
+            best_before = max(quality_scores[:-self.plateau_patience])
+            recent_best = max(quality_scores[-self.plateau_patience:])
+            if recent_best - best_before < self.min_quality_gain:
+                return f"quality plateaued at {recent_best:g}"
+
+        if edited and edit_ratios and edit_ratios[-1] < self.min_edit_ratio:
+            return f"draft converged ({edit_ratios[-1]:.1%} of words changed)"
+
+        if iterations >= self.max_iterations:
+            return f"hit {self.max_iterations} iterations"
+        return None
+
+
+@dataclass
+class ConvergenceReport:
+    """Per-run record of how the loop ended and how many hops early exit saved"""
+    max_iterations: Optional[int] = None   # the loop's cap, used until natural runs are recorded
+    runs: List[Dict] = field(default_factory=list)
+
+    def record(self, iterations: int, stop_reason: Optional[str], model_next: Optional[str]):
+        self.runs.append({"iterations": iterations, "stop_reason": stop_reason, "model_next": model_next})
+
+    def iterations_saved(self, run: Dict) -> Optional[int]:
+        """
+        Average length of the runs that ended naturally minus this run's
+        length, for early exits the models did not ask for. Without natural
+        runs to compare against, the distance to `max_iterations` (an upper
+        bound); None when that is not configured either.
+        """
+        if not run["stop_reason"] or run["model_next"] in (None, "__end__"):
+            return 0
+        natural = [r["iterations"] for r in self.runs if not r["stop_reason"]]
+        if natural:
+            return max(0, round(sum(natural) / len(natural) - run["iterations"]))
+        if self.max_iterations is not None:
+            return max(0, self.max_iterations - run["iterations"])
+        return None
+
+    def summary(self) -> dict:
+        saved = [self.iterations_saved(run) for run in self.runs]
+        return {
+            "runs": len(self.runs),
+            "early_exits": sum(1 for run in self.runs if run["stop_reason"]),
+            "iterations_saved": sum(s for s in saved if s is not None),
+            "unmeasured_early_exits": sum(1 for s in saved if s is None),
+            "last_run": {**self.runs[-1], "iterations_saved": saved[-1]} if self.runs else None,
+        }
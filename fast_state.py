@@ -0,0 +1,166 @@
+"""
+Append-only message state with an amortized O(1) reducer.
+
+`MessagesState` merges every node update with `add_messages`, which converts
+and re-indexes the whole history by id on each step, so a step costs O(n) in
+the length of the conversation. The agents in these graphs only ever append
+new messages, so `AppendOnlyMessagesState` swaps in `append_messages`:
+
+    - new messages (no id, or an id the history has never seen) are appended
+      to a shared backing list - amortized O(1) per message
+    - a subgraph handing back its whole history (the parent's messages, same
+      ids, followed by new ones) only appends the new tail
+    - an update that carries an existing id or a RemoveMessage falls back to
+      `add_messages`, so replace / delete semantics are unchanged
+
+The channel value is a `MessageLog`, an immutable view of the first N
+entries of the backing list. Older views (streamed "values" snapshots,
+copied channels) never see later appends; appending to a view that is no
+longer the tip copies it first, like slices in Go. Views index, slice and
+iterate like lists, and round-trip through the LangGraph checkpoint
+serializer.
+
+The demo graphs opt in with FAST_STATE=1 (in the environment or their .env,
+which they load before building their state); `messages_state()` returns the
+state base to subclass, which is plain `MessagesState` by default:
+
+    class NetworkState(messages_state()):
+        quality_scores: Annotated[list[float], operator.add]
+"""
+
+import os
+import uuid
+from collections.abc import Sequence
+from typing import Annotated, Dict, Iterable, List, Optional, TypedDict
+
+from langchain_core.messages import AnyMessage, BaseMessage, RemoveMessage, convert_to_messages
+from langchain_core.messages.utils import message_chunk_to_message
+from langgraph.graph import MessagesState
+from langgraph.graph.message import add_messages
+
+
+class _Backing:
+    """Storage shared by every view that extends the same history"""
+    __slots__ = ("items", "positions")
+
+    def __init__(self, items: List[BaseMessage]):
+        self.items = items
+        self.positions: Dict[str, int] = {m.id: i for i, m in enumerate(items)}
+
+
+class MessageLog(Sequence):
+    __slots__ = ("_backing", "_length")
+
+    def __init__(self, messages: Iterable[BaseMessage] = ()):
+        items = list(messages)
+        for m in items:
+            if m.id is None:
+                m.id = str(uuid.uuid4())
+        self._backing = _Backing(items)
+        self._length = len(items)
+
+    @classmethod
+    def _view(cls, backing: _Backing, length: int) -> "MessageLog":
+        log = cls.__new__(cls)
+        log._backing, log._length = backing, length
+        return log
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._backing.items[:self._length][index]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("message index out of range")
+        return self._backing.items[index]
+
+    def __iter__(self):
+        items = self._backing.items
+        for i in range(self._length):
+            yield items[i]
+
+    def __add__(self, other) -> list:
+        return list(self) + list(other)
+
+    def __radd__(self, other) -> list:
+        return list(other) + list(self)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (MessageLog, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"MessageLog({list(self)!r})"
+
+    def _asdict(self) -> dict:
+        # Lets the checkpoint serializer store the log and rebuild it with MessageLog(messages=...)
+        return {"messages": list(self)}
+
+    def contains_id(self, message_id: Optional[str]) -> bool:
+        position = self._backing.positions.get(message_id)
+        return position is not None and position < self._length
+
+    def appended(self, messages: List[BaseMessage]) -> "MessageLog":
+        """New view with `messages` appended; only copies when this view is not the tip"""
+        backing = self._backing
+        if self._length != len(backing.items):
+            backing = _Backing(backing.items[:self._length])
+        for m in messages:
+            backing.positions[m.id] = len(backing.items)
+            backing.items.append(m)
+        return MessageLog._view(backing, len(backing.items))
+
+
+def _coerce(messages) -> List[BaseMessage]:
+    if isinstance(messages, MessageLog):
+        return list(messages)
+    if not isinstance(messages, (list, tuple)):
+        messages = [messages]
+    return [message_chunk_to_message(m) for m in convert_to_messages(messages)]
+
+
+def _repeated_tail(log: MessageLog, new: List[BaseMessage]) -> int:
+    """How many leading messages of `new` repeat the end of `log` unchanged (a subgraph's full history)"""
+    if not new or not log.contains_id(new[0].id):
+        return 0
+    start = log._backing.positions[new[0].id]
+    overlap = len(log) - start
+    if len(new) < overlap:
+        return 0
+    for offset in range(overlap):
+        existing, m = log[start + offset], new[offset]
+        if m is not existing and (m.id != existing.id or m != existing):
+            return 0
+    return overlap
+
+
+def append_messages(left, right) -> MessageLog:
+    """Reducer for append-only histories; full `add_messages` merge only when ids collide"""
+    log = left if isinstance(left, MessageLog) else MessageLog(_coerce(left or []))
+    new = _coerce(right)
+    new = new[_repeated_tail(log, new):]
+
+    seen = set()
+    for m in new:
+        if isinstance(m, RemoveMessage) or log.contains_id(m.id) or (m.id is not None and m.id in seen):
+            return MessageLog(add_messages(list(log), new))
+        if m.id is None:
+            m.id = str(uuid.uuid4())
+        seen.add(m.id)
+    return log.appended(new)
+
+
+class AppendOnlyMessagesState(TypedDict):
+    """Drop-in replacement for MessagesState using the append-only reducer"""
+    messages: Annotated[list[AnyMessage], append_messages]
+
+
+def messages_state(fast: Optional[bool] = None) -> type:
+    """State base for the demo graphs: `MessagesState` unless `fast` (default: FAST_STATE=1) opts in"""
+    if fast is None:
+        fast = os.environ.get("FAST_STATE", "0") == "1"
+    return AppendOnlyMessagesState if fast else MessagesState
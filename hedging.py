@@ -0,0 +1,291 @@
+"""
+Hedged model calls with adaptive per-node timeouts.
+
+A single slow completion stalls the whole serial chain of supervisor hops.
+`Hedger.call(node, fn)` runs `fn` and, if it has not returned by the node's
+tracked p95 latency, issues a duplicate; the first response wins and the
+other one is cancelled (or, if it is already running in a worker thread,
+left to finish and discarded).
+
+    response = hedger.invoke("research_agent", model, messages)
+
+`invoke` records only the winning response in prompt_assembly.cache_stats,
+so a hedged request is counted once.
+
+Hedges are capped by a global budget (a fraction of all calls) so a slow
+provider does not get twice the load. Calls also get an adaptive timeout (a
+multiple of the node's p99; before that, the node's entry in
+`HedgeConfig.timeouts` or `default_timeout_s`) and retries with full jitter.
+A timeout is not retried: the call already waited as long as it is allowed
+to.
+
+At most `HedgeConfig.max_in_flight` calls run at once, each on a thread of
+its own, so a call never waits in the executor's queue: a caller blocks
+until a slot is free, and the timeout and latency clocks start when the call
+actually runs. Losing and timed-out calls keep their slot until they return;
+a hedge is only sent when a slot is free.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+
+from prompt_assembly import cache_stats
+
+
+@dataclass
+class HedgeConfig:
+    min_samples: int = 20           # latencies needed before hedging / adaptive timeouts kick in
+    min_hedge_delay_s: float = 0.05
+    default_timeout_s: float = 60.0
+    timeouts: Dict[str, float] = field(default_factory=dict)  # per-node cold-start timeouts
+    timeout_multiplier: float = 3.0  # adaptive timeout = multiplier * p99
+    min_timeout_s: float = 5.0
+    budget_ratio: float = 0.1        # at most 10% of calls may be hedged
+    max_retries: int = 2
+    retry_base_s: float = 0.5
+    retry_cap_s: float = 8.0
+    window: int = 200               # latencies kept per node
+    max_in_flight: int = 64         # calls running at once, hedges and abandoned calls included
+
+
+class LatencyTracker:
+    """Sliding window of successful call latencies for one node"""
+
+    def __init__(self, window: int):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def add(self, latency: float):
+        self.samples.append(latency)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class HedgeTimeout(Exception):
+    """Raised when a call (and its hedge) exceeds the adaptive timeout"""
+
+
+class _RunClock:
+    """Set by the worker thread when a submitted call actually starts running"""
+
+    def __init__(self):
+        self._started = threading.Event()
+        self.started_at = 0.0
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._started.set()
+
+    def wait(self) -> float:
+        self._started.wait()
+        return self.started_at
+
+
+class Hedger:
+    # Bad output (parse / validation errors) is not retried; callers such as
+    # the tiering engine handle it by escalating instead. Neither is a
+    # timeout, which would otherwise multiply the wall time of a slow call.
+    NON_RETRYABLE = (ValueError, HedgeTimeout)
+
+    def __init__(self, config: Optional[HedgeConfig] = None):
+        self.config = config or HedgeConfig()
+        self._executor = ThreadPoolExecutor(max_workers=self.config.max_in_flight, thread_name_prefix="hedge")
+        self._slots = threading.BoundedSemaphore(self.config.max_in_flight)
+        self._lock = threading.Lock()
+        self._trackers: Dict[str, LatencyTracker] = {}
+        self.calls = 0
+        self.hedges = 0
+        self.metrics: Dict[str, dict] = {}
+
+    # -------------------------------------------------------------------------
+    # Policy
+    # -------------------------------------------------------------------------
+
+    def _tracker(self, node: str) -> LatencyTracker:
+        with self._lock:
+            if node not in self._trackers:
+                self._trackers[node] = LatencyTracker(self.config.window)
+            return self._trackers[node]
+
+    def hedge_delay(self, node: str) -> Optional[float]:
+        tracker = self._tracker(node)
+        if len(tracker.samples) < self.config.min_samples:
+            return None
+        return max(self.config.min_hedge_delay_s, tracker.percentile(0.95))
+
+    def timeout(self, node: str) -> float:
+        tracker = self._tracker(node)
+        if len(tracker.samples) < self.config.min_samples:
+            # Tiering nodes are named "<node>/<model>"
+            return self.config.timeouts.get(node.split("/")[0], self.config.default_timeout_s)
+        return max(self.config.min_timeout_s, self.config.timeout_multiplier * tracker.percentile(0.99))
+
+    def _take_hedge_budget(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.config.budget_ratio * self.calls:
+                return False
+            self.hedges += 1
+            return True
+
+    def _node_metrics(self, node: str) -> dict:
+        with self._lock:
+            return self.metrics.setdefault(
+                node, {"calls": 0, "hedges": 0, "hedge_wins": 0, "retries": 0, "timeouts": 0, "saved_s": 0.0}
+            )
+
+    def _bump(self, node: str, key: str, amount=1):
+        metrics = self._node_metrics(node)
+        with self._lock:
+            metrics[key] += amount
+
+    # -------------------------------------------------------------------------
+    # Calls
+    # -------------------------------------------------------------------------
+
+    def call(self, node: str, fn: Callable):
+        """Run fn with hedging, an adaptive timeout and jittered retries"""
+        with self._lock:
+            self.calls += 1
+        self._bump(node, "calls")
+
+        attempt = 0
+        while True:
+            try:
+                return self._hedged_attempt(node, fn)
+            except self.NON_RETRYABLE:
+                raise
+            except Exception:
+                if attempt >= self.config.max_retries:
+                    raise
+                attempt += 1
+                self._bump(node, "retries")
+                # Full jitter: sleep uniformly in [0, min(cap, base * 2^attempt)]
+                time.sleep(random.uniform(0, min(self.config.retry_cap_s, self.config.retry_base_s * 2 ** attempt)))
+
+    def invoke(self, node: str, model, messages: List):
+        """Hedged `model.invoke(messages)`; only the response that is used goes into cache_stats"""
+        response = self.call(node, lambda: model.invoke(messages))
+        cache_stats.record(response, node)
+        return response
+
+    def _submit(self, fn: Callable, timeout: Optional[float]):
+        """Run fn on a free slot; None if none frees up within `timeout` (0: do not wait)"""
+        acquired = self._slots.acquire(timeout=timeout) if timeout else self._slots.acquire(blocking=False)
+        if not acquired:
+            return None
+        clock = _RunClock()
+
+        def run():
+            clock.start()
+            return fn()
+
+        try:
+            future = self._executor.submit(run)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future, clock
+
+    def _hedged_attempt(self, node: str, fn: Callable):
+        tracker = self._tracker(node)
+        timeout = self.timeout(node)
+        delay = self.hedge_delay(node)
+
+        submitted = self._submit(fn, timeout=timeout)
+        if submitted is None:
+            self._bump(node, "timeouts")
+            raise HedgeTimeout(f"{node}: no free call slot within {timeout:.1f}s")
+        primary, clock = submitted
+        # The slot guarantees a thread, so this only waits for it to pick the call up
+        start = clock.wait()
+        futures = {primary}
+        hedge = None
+
+        if delay is not None:
+            done, _ = wait(futures, timeout=max(0.0, delay - (time.perf_counter() - start)))
+            if not done and self._take_hedge_budget():
+                submitted = self._submit(fn, timeout=0)
+                if submitted is None:
+                    with self._lock:
+                        self.hedges -= 1
+                else:
+                    self._bump(node, "hedges")
+                    hedge = submitted[0]
+                    futures.add(hedge)
+
+        remaining = max(0.0, timeout - (time.perf_counter() - start))
+        done, pending = wait(futures, timeout=remaining, return_when=FIRST_COMPLETED)
+        if not done:
+            for future in pending:
+                future.cancel()
+            self._bump(node, "timeouts")
+            raise HedgeTimeout(f"{node}: no response within {timeout:.1f}s")
+
+        winner = next(iter(done))
+        # The hedge only won if it answered while the primary was still running
+        hedge_won = winner is hedge and winner.exception() is None
+        if winner.exception() is not None and pending:
+            # One copy failed; give the other one the rest of the timeout
+            remaining = max(0.0, timeout - (time.perf_counter() - start))
+            done, pending = wait(pending, timeout=remaining)
+            if done:
+                winner = next(iter(done))
+
+        for future in pending:
+            future.cancel()
+
+        finished = time.perf_counter()
+        result = winner.result()   # re-raises the winner's exception for the retry loop
+        tracker.add(finished - start)
+
+        if hedge_won:
+            self._bump(node, "hedge_wins")
+
+            # The primary keeps running in its thread; if it lands, we know how much the hedge saved
+            def record_saving(future):
+                if not future.cancelled() and future.exception() is None:
+                    self._bump(node, "saved_s", time.perf_counter() - finished)
+
+            primary.add_done_callback(record_saving)
+        return result
+
+    # -------------------------------------------------------------------------
+    # Reporting
+    # -------------------------------------------------------------------------
+
+    def summary(self) -> dict:
+        report = {}
+        for node, metrics in self.metrics.items():
+            tracker = self._tracker(node)
+            p50, p95 = tracker.percentile(0.5), tracker.percentile(0.95)
+            report[node] = {
+                **metrics,
+                "saved_s": round(metrics["saved_s"], 3),
+                "hedge_rate": round(metrics["hedges"] / metrics["calls"], 4) if metrics["calls"] else 0.0,
+                "p50_s": round(p50, 3) if p50 is not None else None,
+                "p95_s": round(p95, 3) if p95 is not None else None,
+            }
+        return report
+
+
+# Process-wide hedger used by the demo scripts; long-form writers get more time than routing hops
+hedger = Hedger(HedgeConfig(timeouts={
+    "story_writer": 300.0,
+    "writer_agent": 300.0,
+    "stitch": 300.0,
+    "editor": 180.0,
+    "editor_agent": 180.0,
+    "research_agent": 180.0,
+    "research_supervisor": 30.0,
+    "content_supervisor": 30.0,
+    "top_level_supervisor": 30.0,
+}))
@@ -1,35 +1,147 @@
 import os
-from typing import Literal, TypedDict, List
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langgraph.graph import StateGraph, MessagesState, START, END
-from langgraph.types import Command
-from pydantic import BaseModel
-
+import time
+from functools import lru_cache
+from typing import Literal
 from dotenv import load_dotenv
+from langchain_core.messages import HumanMessage, AIMessage
+from langgraph.graph import StateGraph, START, END
+from langgraph.types import Command
+from pydantic import BaseModel, Field
+
+from prompt_assembly import (
+    assemble_prompt,
+    cache_stats,
+    format_transcript,
+    render_options,
+)
+from model_tiering import LARGE_ONLY, TierPolicy, TieringEngine
+from lean_routing import RoutingMode
+from hedging import hedger
+from fast_state import messages_state
+from message_store import ConversationSession, MessageStore
+from research_cache import ResearchCache, fact_check_passed, fact_check_verdict
+
+
+# Settings read at import (FAST_STATE, ROUTING_MODE, ...) may come from .env as well
 load_dotenv()
 
-
-
-# Initialize the model
-model = ChatOpenAI(model="gpt-4o", temperature=0)
-
-# Define structured output for routing decisions
-class RoutingDecision(BaseModel):
-    next_agent: Literal["research_agent", "writing_agent", "__end__"]
-    reasoning: str
+# MessagesState unless FAST_STATE=1 opts into the append-only reducer
+GraphState = messages_state()
+
+# Initialize the model on first use so importing this module stays cheap
+@lru_cache(maxsize=None)
+def get_model():
+    from backend_pool import chat_model
+
+    return chat_model(model="gpt-4o", temperature=0)
+
+# Routing and the simpler agents start on gpt-4o-mini and escalate to gpt-4o when needed;
+# research the fact checker fails is redone on gpt-4o. The writer stays on gpt-4o.
+tiers = TieringEngine({
+    "research_supervisor": TierPolicy(),
+    "content_supervisor": TierPolicy(),
+    "top_level_supervisor": TierPolicy(min_confidence=0.7),
+    "research_agent": TierPolicy(),
+    "fact_checker": TierPolicy(),
+    "editor_agent": TierPolicy(),
+    "writer_agent": LARGE_ONLY,
+}, hedger=hedger)
+
+def enable_routing_batcher(make_batcher):
+    """
+    Micro-batch structured supervisor decisions across concurrent conversations.
+    `make_batcher(model)` builds the RoutingBatcher for one tier model (None to disable).
+    """
+    tiers.enable_batching(make_batcher)
+
+# Supervisors answer with the option number only; ROUTING_MODE=full (or sampled) asks for the reasoning too
+routing_mode = RoutingMode.from_env()
+
+def route(node: str, schema, prompt):
+    if routing_mode.wants_reasoning():
+        return tiers.invoke_structured(node, schema, prompt)
+    return tiers.invoke_choice(node, schema, prompt)
+
+def describe(decision) -> str:
+    if decision.reasoning:
+        return f" - {decision.reasoning}"
+    if "confidence" in decision.model_fields_set:
+        return f" (confidence {decision.confidence:.2f})"
+    return ""
+
+# Define structured output for routing decisions (a missing confidence is judged on validity alone).
+# The field descriptions ask for reasoning and confidence, so the shared prompts do not have to.
+class ResearchRoutingDecision(BaseModel):
+    next_agent: Literal["research_agent", "fact_checker", "__end__"]
+    reasoning: str = Field(description="Why this is the next step")
+    confidence: float = Field(default=0.0, ge=0.0, le=1.0, description="How sure you are about this choice (0-1)")
+
+class ContentRoutingDecision(BaseModel):
+    next_agent: Literal["writer_agent", "editor_agent", "__end__"]
+    reasoning: str = Field(description="Why this is the next step")
+    confidence: float = Field(default=0.0, ge=0.0, le=1.0, description="How sure you are about this choice (0-1)")
 
 class TeamRoutingDecision(BaseModel):
     next_team: Literal["research_team", "content_team", "__end__"]
-    reasoning: str
+    reasoning: str = Field(description="Why this team is next")
+    confidence: float = Field(default=0.0, ge=0.0, le=1.0, description="How sure you are about this choice (0-1)")
 
 # =============================================================================
 # TEAM 1: RESEARCH TEAM
 # =============================================================================
 
-class ResearchTeamState(MessagesState):
+class ResearchTeamState(GraphState):
     """State for the research team with routing information"""
-    pass
+    research_started_at: float
+    research_rejected: bool
+
+# Fact-checked research is reused across requests on the same topic (RESEARCH_CACHE_TTL_S / _PATH).
+# Built on first use like the model, so a bad cache file or setting cannot break the import
+@lru_cache(maxsize=None)
+def _research_cache_from_env():
+    return ResearchCache.from_env()
+
+_research_cache_override = {}
+
+def get_research_cache():
+    """The research team's cache, or None when disabled with enable_research_cache(None)"""
+    if "cache" in _research_cache_override:
+        return _research_cache_override["cache"]
+    return _research_cache_from_env()
+
+def enable_research_cache(cache):
+    """Use `cache` (a ResearchCache, or None to disable caching) instead of the one from the environment"""
+    _research_cache_override["cache"] = cache
+
+def research_request(messages) -> str:
+    """The request the research team is working on: the latest human message"""
+    return next((str(m.content) for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+
+def researched_this_turn(messages) -> bool:
+    """Whether research for the latest request is already in the conversation (a repeat team visit)"""
+    for m in reversed(messages):
+        if isinstance(m, HumanMessage):
+            return False
+        if str(m.content).startswith(("[Research Agent]", "[Research Cache]")):
+            return True
+    return False
+
+def _latest(messages, prefix: str) -> str:
+    return next((m.content[len(prefix):].strip() for m in reversed(messages) if str(m.content).startswith(prefix)), "")
+
+RESEARCH_ROUTING_OPTIONS = {
+    "research_agent": "For gathering information, conducting research, finding data",
+    "fact_checker": "For verifying information accuracy, checking sources",
+    "__end__": "If the research task is complete",
+}
+
+RESEARCH_ROUTING_PROMPT = f"""
+You are a research team supervisor. Based on the conversation history, decide what to do next:
+
+{render_options(RESEARCH_ROUTING_OPTIONS)}
+
+Decide the next step.
+"""
 
 def research_supervisor(state: ResearchTeamState) -> Command[Literal["research_agent", "fact_checker", "__end__"]]:
     """Supervises the research team - decides between research agent and fact checker"""
@@ -38,27 +150,31 @@ def research_supervisor(state: ResearchTeamState) -> Command[Literal["research_a
 
 
     messages = state["messages"]
-    last_message = messages[-1] if messages else None
-    
-    # Create routing prompt
-    routing_prompt = f"""
-    You are a research team supervisor. Based on the conversation history, decide what to do next:
-    
-    - research_agent: For gathering information, conducting research, finding data
-    - fact_checker: For verifying information accuracy, checking sources
-    - __end__: If the research task is complete
-    
-    Last message: {last_message.content if last_message else "No previous messages"}
-    
-    Decide the next step and provide reasoning.
-    """
-    
-    response = model.with_structured_output(RoutingDecision).invoke([
-        SystemMessage(content=routing_prompt)
-    ])
+    update = {}
+    research_cache = get_research_cache()
+
+    # First visit of this team run: answer from the cache if the topic was researched recently.
+    # On a repeat visit the research is already here, and the entry may be the one this run just stored.
+    if research_cache is not None and "research_started_at" not in state and not researched_this_turn(messages):
+        entry, status = research_cache.lookup(research_request(messages))
+        if status == "hit":
+            print(f"🗃️ Research Supervisor: Serving cached research on '{entry.topic}' (saves ~{entry.team_latency_s:.1f}s)")
+            content = f"[Research Cache] {entry.to_text(research_cache.clock())}"
+            return Command(goto=END, update={"messages": [AIMessage(content=content)]})
+        if status == "stale":
+            print(f"🗃️ Research Supervisor: Cached research on '{entry.topic}' is stale, refreshing")
+    if "research_started_at" not in state:
+        update["research_started_at"] = time.time()
+    
+    # Static instructions first, the last message goes at the end of the prompt
+    response = route(
+        "research_supervisor",
+        ResearchRoutingDecision,
+        assemble_prompt(RESEARCH_ROUTING_PROMPT, f"Last message: {format_transcript(messages, limit=1)}"),
+    )
     
-    print(f"🔍 Research Supervisor: Routing to {response.next_agent} - {response.reasoning}")
-    return Command(goto=response.next_agent)
+    print(f"🔍 Research Supervisor: Routing to {response.next_agent}{describe(response)}")
+    return Command(goto=response.next_agent, update=update)
 
 def research_agent(state: ResearchTeamState) -> Command[Literal["research_supervisor"]]:
     """Conducts research and gathers information"""
@@ -72,15 +188,17 @@ def research_agent(state: ResearchTeamState) -> Command[Literal["research_superv
     Based on the user's request, provide comprehensive research findings.
     """
     
-    response = model.invoke([
-        SystemMessage(content=research_prompt),
-        *messages
-    ])
+    # The fact checker is this agent's critic: research it failed is redone on the larger tier
+    response = tiers.invoke(
+        "research_agent",
+        assemble_prompt(research_prompt, messages),
+        start_tier=1 if state.get("research_rejected") else 0,
+    )
     
     print(f"📚 Research Agent: {response.content[:100]}...")
     return Command(
         goto="research_supervisor", 
-        update={"messages": [AIMessage(content=f"[Research Agent] {response.content}")]}
+        update={"messages": [AIMessage(content=f"[Research Agent] {response.content}")], "research_rejected": False}
     )
 
 def fact_checker(state: ResearchTeamState) -> Command[Literal["research_supervisor"]]:
@@ -94,35 +212,69 @@ def fact_checker(state: ResearchTeamState) -> Command[Literal["research_supervis
     fact_check_prompt = """
     You are a fact-checking agent. Review the previous research and verify its accuracy.
     Highlight any potential issues or confirm the reliability of the information.
+    End with a final line "VERDICT: PASS" if the research is reliable, or "VERDICT: FAIL" if it needs corrections.
     """
     
-    response = model.invoke([
-        SystemMessage(content=fact_check_prompt),
-        *messages
-    ])
+    # A check without a verdict line is unusable downstream, so it escalates
+    response = tiers.invoke(
+        "fact_checker",
+        assemble_prompt(fact_check_prompt, messages),
+        critic=lambda check: fact_check_verdict(check.content) is not None,
+    )
     
     print(f"✅ Fact Checker: {response.content[:100]}...")
+
+    # Only research that passed the check is reused
+    research = _latest(messages, "[Research Agent]")
+    research_cache = get_research_cache()
+    if research_cache is not None and research and fact_check_passed(response.content):
+        research_cache.store(
+            research_request(messages),
+            research,
+            response.content,
+            model=response.response_metadata.get("model_name", "unknown"),
+            team_latency_s=time.time() - state.get("research_started_at", time.time()),
+        )
     return Command(
         goto="research_supervisor", 
-        update={"messages": [AIMessage(content=f"[Fact Checker] {response.content}")]}
+        update={
+            "messages": [AIMessage(content=f"[Fact Checker] {response.content}")],
+            "research_rejected": fact_check_verdict(response.content) == "FAIL",
+        }
     )
 
 # Build research team graph
-research_team_builder = StateGraph(ResearchTeamState)
-research_team_builder.add_node("research_supervisor", research_supervisor)
-research_team_builder.add_node("research_agent", research_agent)
-research_team_builder.add_node("fact_checker", fact_checker)
-research_team_builder.add_edge(START, "research_supervisor")
-research_team_graph = research_team_builder.compile()
+@lru_cache(maxsize=None)
+def get_research_team_graph():
+    research_team_builder = StateGraph(ResearchTeamState)
+    research_team_builder.add_node("research_supervisor", research_supervisor)
+    research_team_builder.add_node("research_agent", research_agent)
+    research_team_builder.add_node("fact_checker", fact_checker)
+    research_team_builder.add_edge(START, "research_supervisor")
+    return research_team_builder.compile()
 
 # =============================================================================
 # TEAM 2: CONTENT CREATION TEAM
 # =============================================================================
 
-class ContentTeamState(MessagesState):
+class ContentTeamState(GraphState):
     """State for the content creation team"""
     pass
 
+CONTENT_ROUTING_OPTIONS = {
+    "writer_agent": "For creating content, writing articles, drafting text",
+    "editor_agent": "For editing, proofreading, improving existing content",
+    "__end__": "If the content creation task is complete",
+}
+
+CONTENT_ROUTING_PROMPT = f"""
+You are a content team supervisor. Based on the conversation, decide what to do next:
+
+{render_options(CONTENT_ROUTING_OPTIONS)}
+
+Decide the next step.
+"""
+
 def content_supervisor(state: ContentTeamState) -> Command[Literal["writer_agent", "editor_agent", "__end__"]]:
     """Supervises the content team - decides between writer and editor"""
     
@@ -130,25 +282,14 @@ def content_supervisor(state: ContentTeamState) -> Command[Literal["writer_agent
     print("✍️ Content Supervisor is analyzing the conversation...")
 
     messages = state["messages"]
-    last_message = messages[-1] if messages else None
-    
-    routing_prompt = f"""
-    You are a content team supervisor. Based on the conversation, decide what to do next:
-    
-    - writer_agent: For creating content, writing articles, drafting text
-    - editor_agent: For editing, proofreading, improving existing content
-    - __end__: If the content creation task is complete
-    
-    Last message: {last_message.content if last_message else "No previous messages"}
     
-    Decide the next step and provide reasoning.
-    """
-    
-    response = model.with_structured_output(RoutingDecision).invoke([
-        SystemMessage(content=routing_prompt)
-    ])
+    response = route(
+        "content_supervisor",
+        ContentRoutingDecision,
+        assemble_prompt(CONTENT_ROUTING_PROMPT, f"Last message: {format_transcript(messages, limit=1)}"),
+    )
     
-    print(f"✍️ Content Supervisor: Routing to {response.next_agent} - {response.reasoning}")
+    print(f"✍️ Content Supervisor: Routing to {response.next_agent}{describe(response)}")
     return Command(goto=response.next_agent)
 
 def writer_agent(state: ContentTeamState) -> Command[Literal["content_supervisor"]]:
@@ -163,10 +304,7 @@ def writer_agent(state: ContentTeamState) -> Command[Literal["content_supervisor
     Use any research provided to create informative and accurate content.
     """
     
-    response = model.invoke([
-        SystemMessage(content=writing_prompt),
-        *messages
-    ])
+    response = tiers.invoke("writer_agent", assemble_prompt(writing_prompt, messages))
     
     print(f"📝 Writer Agent: {response.content[:100]}...")
     return Command(
@@ -186,10 +324,7 @@ def editor_agent(state: ContentTeamState) -> Command[Literal["content_supervisor
     Provide suggestions or a revised version.
     """
     
-    response = model.invoke([
-        SystemMessage(content=editing_prompt),
-        *messages
-    ])
+    response = tiers.invoke("editor_agent", assemble_prompt(editing_prompt, messages))
     
     print(f"✏️ Editor Agent: {response.content[:100]}...")
     return Command(
@@ -198,44 +333,49 @@ def editor_agent(state: ContentTeamState) -> Command[Literal["content_supervisor
     )
 
 # Build content team graph
-content_team_builder = StateGraph(ContentTeamState)
-content_team_builder.add_node("content_supervisor", content_supervisor)
-content_team_builder.add_node("writer_agent", writer_agent)
-content_team_builder.add_node("editor_agent", editor_agent)
-content_team_builder.add_edge(START, "content_supervisor")
-content_team_graph = content_team_builder.compile()
+@lru_cache(maxsize=None)
+def get_content_team_graph():
+    content_team_builder = StateGraph(ContentTeamState)
+    content_team_builder.add_node("content_supervisor", content_supervisor)
+    content_team_builder.add_node("writer_agent", writer_agent)
+    content_team_builder.add_node("editor_agent", editor_agent)
+    content_team_builder.add_edge(START, "content_supervisor")
+    return content_team_builder.compile()
 
 # =============================================================================
 # TOP-LEVEL SUPERVISOR
 # =============================================================================
 
-def top_level_supervisor(state: MessagesState) -> Command[Literal["research_team", "content_team", "__end__"]]:
+TOP_LEVEL_ROUTING_OPTIONS = {
+    "research_team": "For research tasks, fact-finding, data gathering, analysis",
+    "content_team": "For writing, editing, content creation tasks",
+    "__end__": "If the overall task is complete and satisfactory",
+}
+
+TOP_LEVEL_ROUTING_PROMPT = f"""
+You are the top-level supervisor coordinating between specialized teams:
+
+{render_options(TOP_LEVEL_ROUTING_OPTIONS)}
+
+Determine which team should handle this next, or if we're done.
+"""
+
+def top_level_supervisor(state: GraphState) -> Command[Literal["research_team", "content_team", "__end__"]]:
     """Top-level supervisor that coordinates between teams"""
     
     messages = state["messages"]
-    last_message = messages[-1] if messages else None
     
     # Analyze the conversation to determine which team should handle the request
-    routing_prompt = f"""
-    You are the top-level supervisor coordinating between specialized teams:
-    
-    - research_team: For research tasks, fact-finding, data gathering, analysis
-    - content_team: For writing, editing, content creation tasks
-    - __end__: If the overall task is complete and satisfactory
-    
-    Current conversation context:
-    {[msg.content for msg in messages[-3:]] if len(messages) >= 3 else [msg.content for msg in messages]}
-    
-    Last message: {last_message.content if last_message else "No previous messages"}
-    
-    Determine which team should handle this next, or if we're done.
-    """
-    
-    response = model.with_structured_output(TeamRoutingDecision).invoke([
-        SystemMessage(content=routing_prompt)
-    ])
+    response = route(
+        "top_level_supervisor",
+        TeamRoutingDecision,
+        assemble_prompt(
+            TOP_LEVEL_ROUTING_PROMPT,
+            f"Current conversation context (last message at the end):\n{format_transcript(messages, limit=3)}",
+        ),
+    )
     
-    print(f"🎯 Top Supervisor: Routing to {response.next_team} - {response.reasoning}")
+    print(f"🎯 Top Supervisor: Routing to {response.next_team}{describe(response)}")
     return Command(goto=response.next_team)
 
 # =============================================================================
@@ -243,18 +383,48 @@ def top_level_supervisor(state: MessagesState) -> Command[Literal["research_team
 # =============================================================================
 
 # Build the main graph
-main_builder = StateGraph(MessagesState)
-main_builder.add_node("top_level_supervisor", top_level_supervisor)
-main_builder.add_node("research_team", research_team_graph)
-main_builder.add_node("content_team", content_team_graph)
+@lru_cache(maxsize=None)
+def get_hierarchical_graph():
+    main_builder = StateGraph(GraphState)
+    main_builder.add_node("top_level_supervisor", top_level_supervisor)
+    main_builder.add_node("research_team", get_research_team_graph())
+    main_builder.add_node("content_team", get_content_team_graph())
+
+    # Define the flow
+    main_builder.add_edge(START, "top_level_supervisor")
+    main_builder.add_edge("research_team", "top_level_supervisor")
+    main_builder.add_edge("content_team", "top_level_supervisor")
+
+    # Compile the main graph
+    return main_builder.compile()
+
+# The old module-level names still work, but are only built when first accessed
+_LAZY_ATTRIBUTES = {
+    "model": get_model,
+    "research_team_graph": get_research_team_graph,
+    "content_team_graph": get_content_team_graph,
+    "hierarchical_graph": get_hierarchical_graph,
+    "research_cache": get_research_cache,
+}
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Define the flow
-main_builder.add_edge(START, "top_level_supervisor")
-main_builder.add_edge("research_team", "top_level_supervisor")
-main_builder.add_edge("content_team", "top_level_supervisor")
+# =============================================================================
+# LONG-RUNNING SESSIONS
+# =============================================================================
+
+def new_session(window: int = 20, max_in_memory: int = 200, summarize=None) -> ConversationSession:
+    """
+    A multi-turn conversation whose history lives in a MessageStore; each turn the
+    graph only sees the last `window` messages (close `session.store` when done):
 
-# Compile the main graph
-hierarchical_graph = main_builder.compile()
+        session = new_session()
+        result = session.invoke(get_hierarchical_graph(), "Research renewable energy")
+    """
+    return ConversationSession(MessageStore(max_in_memory=max_in_memory), window=window, summarize=summarize)
 
 # =============================================================================
 # DEMO FUNCTION
@@ -270,14 +440,13 @@ def run_demo():
     print("\n📋 Test Case 1: Research Request")
     print("-" * 40)
     
-    initial_state = {
-        "messages": [
-            HumanMessage(content="I need to research the benefits of renewable energy and then write a short article about it.")
-        ]
-    }
+    session = new_session()
     
     try:
-        result = hierarchical_graph.invoke(initial_state)
+        result = session.invoke(
+            get_hierarchical_graph(),
+            "I need to research the benefits of renewable energy and then write a short article about it.",
+        )
         
         print(f"\n🎉 Final Result:")
         print("-" * 40)
@@ -285,10 +454,25 @@ def run_demo():
             if isinstance(msg, AIMessage):
                 print(f"{msg.content[:200]}...")
                 print()
+        
+        # Test case 2: follow-up in the same session, which only sees the recent history
+        print("\n📋 Test Case 2: Follow-up Request")
+        print("-" * 40)
+        result = session.invoke(get_hierarchical_graph(), "Now shorten the article to one paragraph.")
+        print(f"{result['messages'][-1].content[:200]}...")
+        
+        print(f"📊 Session: {len(session.refs)} messages, store {session.store.stats}")
+        print(f"📊 Prompt cache: {cache_stats.summary()}")
+        print(f"📊 Model tiering: {tiers.summary()}")
+        print(f"📊 Hedging: {hedger.summary()}")
+        research_cache = get_research_cache()
+        print(f"📊 Research cache: {research_cache.summary() if research_cache is not None else 'disabled'}")
     
     except Exception as e:
         print(f"❌ Error running demo: {e}")
         print("Note: Make sure to set your OPENAI_API_KEY environment variable")
+    finally:
+        session.store.close()
 
 # =============================================================================
 # USAGE EXAMPLE
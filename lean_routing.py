@@ -0,0 +1,131 @@
+"""
+Lean routing decisions for the supervisors.
+
+The routing schemas make the model write a free-text `reasoning` on every
+hop, which is only printed and usually costs more output tokens than the
+decision itself. In lean mode a supervisor instead gets a numbered list of
+its options and answers with a single token:
+
+    Reply with only the number of the next step:
+    1. research_agent
+    2. fact_checker
+    3. __end__
+
+The call is capped at one output token. With `logprobs` enabled, the
+confidence is the probability of the chosen number relative to the other
+option numbers, so tiering can still escalate uncertain decisions.
+
+The static routing prompts only ask for the next step; the structured path
+gets its reasoning and confidence from the schema's field descriptions, so
+the cached prompt prefix is the same in every mode.
+
+Modes (`ROUTING_MODE` environment variable):
+
+    lean     enum only (default)
+    sampled  lean, but a `ROUTING_SAMPLE_RATE` fraction of hops use the full
+             schema so reasoning can still be audited
+    full     full schema with reasoning on every hop, for debugging routing
+"""
+
+import math
+import os
+import random
+import typing
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+from langchain_core.messages import HumanMessage
+
+ROUTING_MODES = ("lean", "sampled", "full")
+
+
+@dataclass
+class RoutingMode:
+    mode: str = "lean"
+    sample_rate: float = 0.05
+    rng: random.Random = field(default_factory=random.Random, repr=False)
+
+    def __post_init__(self):
+        if self.mode not in ROUTING_MODES:
+            raise ValueError(f"unknown routing mode {self.mode!r}, expected one of {ROUTING_MODES}")
+
+    @classmethod
+    def from_env(cls) -> "RoutingMode":
+        return cls(
+            mode=os.environ.get("ROUTING_MODE", "lean"),
+            sample_rate=float(os.environ.get("ROUTING_SAMPLE_RATE", "0.05")),
+        )
+
+    def wants_reasoning(self) -> bool:
+        if self.mode == "full":
+            return True
+        return self.mode == "sampled" and self.rng.random() < self.sample_rate
+
+
+def choice_field(schema) -> Tuple[str, Sequence[str]]:
+    """Name and options of the schema's Literal field (next_agent / next_team)"""
+    for name, info in schema.model_fields.items():
+        if typing.get_origin(info.annotation) is typing.Literal:
+            return name, typing.get_args(info.annotation)
+    raise ValueError(f"{schema.__name__} has no Literal field to route on")
+
+
+def lean_prompt(messages: List, options: Sequence[str]) -> List:
+    # Appended after the shared prompt so the cached prefix stays the same in every mode
+    numbered = "\n".join(f"{i}. {option}" for i, option in enumerate(options, 1))
+    return [*messages, HumanMessage(content=f"Reply with only the number of the next step:\n{numbered}")]
+
+
+def _option_probabilities(response, count: int) -> dict:
+    """P(option number) from the first token's top log-probabilities"""
+    logprobs = (response.response_metadata or {}).get("logprobs") or {}
+    tokens = logprobs.get("content") or []
+    if not tokens:
+        return {}
+    probabilities = {}
+    for candidate in tokens[0].get("top_logprobs") or [tokens[0]]:
+        token = candidate.get("token", "").strip()
+        if token.isdigit() and 1 <= int(token) <= count:
+            probabilities[int(token)] = probabilities.get(int(token), 0.0) + math.exp(candidate["logprob"])
+    return probabilities
+
+
+def parse_choice(response, options: Sequence[str]) -> Tuple[Optional[str], Optional[float]]:
+    text = str(response.content).strip()
+    digits = "".join(ch for ch in text[:2] if ch.isdigit())
+    if digits and 1 <= int(digits) <= len(options):
+        index = int(digits)
+    elif text in options:
+        # Some models answer with the name instead of the number
+        index = options.index(text) + 1
+    else:
+        return None, None
+
+    probabilities = _option_probabilities(response, len(options))
+    total = sum(probabilities.values())
+    confidence = probabilities.get(index, 0.0) / total if total else None
+    return options[index - 1], confidence
+
+
+def invoke_choice(model, schema, messages: List, use_logprobs: bool = True):
+    """
+    One-token routing call. Returns (raw response, parsed schema instance or
+    None when the reply was not a valid option).
+    """
+    name, options = choice_field(schema)
+    if len(options) > 9:
+        raise ValueError(f"{schema.__name__}: lean routing supports at most 9 options")
+    kwargs = {"max_tokens": 1}
+    if use_logprobs:
+        kwargs.update(logprobs=True, top_logprobs=min(20, len(options) + 2))
+    response = model.bind(**kwargs).invoke(lean_prompt(messages, options))
+
+    choice, confidence = parse_choice(response, options)
+    if choice is None:
+        return response, None
+    values = {name: choice}
+    if "reasoning" in schema.model_fields:
+        values["reasoning"] = ""
+    if confidence is not None and "confidence" in schema.model_fields:
+        values["confidence"] = confidence
+    return response, schema(**values)
@@ -0,0 +1,370 @@
+"""
+Open-loop load generator for the demo graphs.
+
+Replays request records from a JSONL file against any of the compiled graphs,
+either in-process or through a local HTTP server, and reports latency
+percentiles, throughput, error rate and (for a QPS sweep) the saturation point.
+
+Record format (one JSON object per line):
+
+    {"graph": "hierarchical", "messages": [{"role": "user", "content": "..."}], "offset_s": 0.25}
+
+Lines without "graph" / "messages" are skipped, so the file can be shared with
+other tooling.
+
+Usage:
+    # write a synthetic trace
+    python load_test.py generate --count 5000 --qps 20 --out trace.jsonl
+
+    # replay with the recorded timing, or open-loop at a fixed rate
+    python load_test.py run trace.jsonl --timing recorded
+    python load_test.py run trace.jsonl --qps 10 20 40 80 --stub-latency 0.05
+
+    # serve the graphs over HTTP and drive them remotely
+    python load_test.py serve --port 8765
+    python load_test.py run trace.jsonl --qps 20 --url http://127.0.0.1:8765
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import random
+import statistics
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# graph name -> (script, factory)
+GRAPHS = {
+    "hierarchical": ("hierarchical_agent_architecture.py", "get_hierarchical_graph"),
+    "network": ("network.py", "get_network"),
+    "network_pipelined": ("network.py", "get_pipelined_network"),
+    "research_chart": ("network-01.py", "get_graph"),
+    "booking": ("supervisor.py", "get_supervisor"),
+    "math_research": ("supervisor-01.py", "get_supervisor_graph"),
+    "toolcall": ("supervisor-toolcall.py", "get_supervisor"),
+}
+
+SAMPLE_PROMPTS = {
+    "hierarchical": [
+        "Research the benefits of renewable energy and write a short article about it.",
+        "Find recent data on electric vehicle adoption and summarize it for a blog post.",
+    ],
+    "network": [
+        "Write a short story about a time traveler who gets stuck in a mundane moment",
+        "Write a mystery story about a detective who can only solve crimes on Tuesdays",
+    ],
+    "toolcall": ["What is the derivative of x^2 + 3x + 5?", "Proofread: their going to the park tomorow."],
+    "booking": ["book a flight from BOS to JFK and a stay at McKittrick Hotel"],
+}
+SAMPLE_PROMPTS["network_pipelined"] = SAMPLE_PROMPTS["network"]
+
+
+# =============================================================================
+# GRAPHS
+# =============================================================================
+
+@lru_cache(maxsize=None)
+def load_graph(name: str):
+    """Import a demo script by path (several have dashes in their names) and build its graph"""
+    script, factory = GRAPHS[name]
+    spec = importlib.util.spec_from_file_location(f"load_test_{name}", os.path.join(ROOT, script))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, factory)()
+
+
+def invoke_in_process(record: dict):
+    return load_graph(record["graph"]).invoke({"messages": record["messages"]}, {"recursion_limit": 50})
+
+
+def make_http_invoker(url: str, timeout: float = 300.0):
+    def invoke(record: dict):
+        request = urllib.request.Request(
+            f"{url.rstrip('/')}/invoke/{record['graph']}",
+            data=json.dumps({"messages": record["messages"]}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    return invoke
+
+
+def serve(host: str, port: int):
+    """Expose every graph as POST /invoke/<graph>"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            name = self.path.rstrip("/").rsplit("/", 1)[-1]
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if name not in GRAPHS:
+                    body, status = json.dumps({"error": f"unknown graph {name!r}"}).encode(), 404
+                else:
+                    result = invoke_in_process({"graph": name, "messages": payload["messages"]})
+                    body, status = json.dumps({"messages": len(result["messages"])}).encode(), 200
+            except Exception as e:
+                body, status = json.dumps({"error": repr(e)}).encode(), 500
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    print(f"Serving {', '.join(GRAPHS)} on http://{host}:{port}/invoke/<graph>")
+    httpd.serve_forever()
+
+
+# =============================================================================
+# TRACES
+# =============================================================================
+
+def read_records(path: str) -> List[dict]:
+    records = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if "graph" in record and "messages" in record:
+                records.append(record)
+    return records
+
+
+def generate_trace(count: int, qps: float, graphs: List[str], seed: int = 0) -> List[dict]:
+    """Poisson arrivals at `qps`, prompts sampled per graph"""
+    rng = random.Random(seed)
+    offset = 0.0
+    records = []
+    for _ in range(count):
+        graph = rng.choice(graphs)
+        prompt = rng.choice(SAMPLE_PROMPTS.get(graph, SAMPLE_PROMPTS["hierarchical"]))
+        records.append({
+            "graph": graph,
+            "messages": [{"role": "user", "content": prompt}],
+            "offset_s": round(offset, 4),
+        })
+        offset += rng.expovariate(qps)
+    return records
+
+
+# =============================================================================
+# REPLAY
+# =============================================================================
+
+def percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return float("nan")
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def replay(records: List[dict], invoke, qps: Optional[float] = None, max_workers: int = 256) -> dict:
+    """
+    Open-loop replay: requests are issued on schedule whether or not earlier
+    ones have finished. Latency is measured from the scheduled arrival, so
+    queueing inside the client counts against the system under test.
+
+    Throughput is measured over the arrival window, shifted by one response
+    time: completions divided by the span from the first to the last
+    completion. The span is never taken shorter than the arrival window, so
+    completions that bunch up after a slow start cannot exceed the offered
+    rate. Dividing by the whole run would count the ramp-up and the drain
+    tail as idle time and make short traces look saturated.
+    """
+    if qps is not None:
+        offsets = [i / qps for i in range(len(records))]
+    else:
+        # Replay in arrival order, whatever order the trace lists the records in
+        records = sorted(records, key=lambda record: record.get("offset_s", 0.0))
+        base = records[0].get("offset_s", 0.0) if records else 0.0
+        offsets = [record.get("offset_s", 0.0) - base for record in records]
+
+    latencies: List[float] = []
+    finished: List[float] = []
+    errors: Dict[str, int] = {}
+    lock = threading.Lock()
+
+    def run_one(record: dict, scheduled: float):
+        try:
+            invoke(record)
+        except Exception as e:
+            with lock:
+                key = type(e).__name__
+                errors[key] = errors.get(key, 0) + 1
+            return
+        now = time.perf_counter()
+        with lock:
+            latencies.append(now - scheduled)
+            finished.append(now)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for record, offset in zip(records, offsets):
+            scheduled = start + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(run_one, record, scheduled)
+    elapsed = time.perf_counter() - start
+
+    window = max(finished) - min(finished) if len(finished) > 1 else 0.0
+    window = max(window, offsets[-1] if offsets else 0.0)
+    if window > 0 and len(finished) > 1:
+        # n completions span n - 1 inter-completion gaps
+        throughput = (len(finished) - 1) / window
+    else:
+        throughput = len(latencies) / elapsed if elapsed else 0.0
+
+    latencies.sort()
+    error_count = sum(errors.values())
+    return {
+        # n arrivals span n - 1 inter-arrival gaps
+        "offered_qps": (len(offsets) - 1) / offsets[-1] if len(offsets) > 1 and offsets[-1] else float("nan"),
+        "throughput": throughput,
+        "p50_s": percentile(latencies, 0.50),
+        "p95_s": percentile(latencies, 0.95),
+        "p99_s": percentile(latencies, 0.99),
+        "mean_s": statistics.fmean(latencies) if latencies else float("nan"),
+        "completed": len(latencies),
+        "error_rate": error_count / len(records) if records else 0.0,
+        "errors": errors,
+    }
+
+
+def find_saturation(results: List[dict], throughput_ratio: float = 0.9, p99_growth: float = 3.0) -> Optional[float]:
+    """First offered QPS where throughput falls behind the offer or p99 blows up"""
+    if not results:
+        return None
+    baseline_p99 = results[0]["p99_s"]
+    for result in results:
+        if result["throughput"] < throughput_ratio * result["target_qps"]:
+            return result["target_qps"]
+        if baseline_p99 and result["p99_s"] > p99_growth * baseline_p99:
+            return result["target_qps"]
+    return None
+
+
+def print_result(label: str, result: dict):
+    print(
+        f"{label:<14} {result['throughput']:>8.2f} {result['p50_s'] * 1000:>9.0f} {result['p95_s'] * 1000:>9.0f} "
+        f"{result['p99_s'] * 1000:>9.0f} {result['error_rate'] * 100:>7.2f}%"
+    )
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="write a synthetic trace")
+    gen.add_argument("--count", type=int, default=1000)
+    gen.add_argument("--qps", type=float, default=10.0)
+    gen.add_argument("--graphs", nargs="+", default=["hierarchical", "network", "toolcall"], choices=list(GRAPHS))
+    gen.add_argument("--seed", type=int, default=0)
+    gen.add_argument("--out", required=True)
+
+    run = commands.add_parser("run", help="replay a trace")
+    run.add_argument("trace", nargs="?", default="requests.jsonl")
+    run.add_argument("--timing", choices=["recorded", "qps"], default="qps")
+    run.add_argument("--qps", type=float, nargs="+", default=[10.0], help="one or more target rates (a sweep)")
+    run.add_argument("--limit", type=int, help="replay only the first N records")
+    run.add_argument("--url", help="drive a server started with `serve` instead of running in-process")
+    run.add_argument("--stub-latency", type=float, help="run in-process against a local stub OpenAI server")
+    run.add_argument("--max-workers", type=int, default=256)
+    run.add_argument("--verbose", action="store_true", help="keep the agents' console output")
+
+    srv = commands.add_parser("serve", help="serve the graphs over HTTP")
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--port", type=int, default=8765)
+    srv.add_argument("--stub-latency", type=float, help="back the graphs with a local stub OpenAI server")
+
+    args = parser.parse_args()
+
+    stub = None
+    if getattr(args, "stub_latency", None) is not None:
+        from stub_openai_server import StubOpenAIServer
+
+        stub = StubOpenAIServer(latency=args.stub_latency).start()
+        os.environ.update({
+            "OPENAI_BASE_URL": stub.base_url,
+            "OPENAI_API_KEY": "stub",
+            "TAVILY_API_KEY": "stub",
+        })
+
+    try:
+        if args.command == "generate":
+            records = generate_trace(args.count, args.qps, args.graphs, args.seed)
+            with open(args.out, "w") as f:
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+            print(f"Wrote {len(records)} records ({records[-1]['offset_s']:.1f}s of traffic) to {args.out}")
+            return
+
+        if args.command == "serve":
+            serve(args.host, args.port)
+            return
+
+        records = read_records(args.trace)[:args.limit]
+        if not records:
+            print(f"No request records in {args.trace} (expected lines with 'graph' and 'messages')")
+            return
+
+        invoke = make_http_invoker(args.url) if args.url else invoke_in_process
+        if not args.url:
+            # Build graphs before the clock starts
+            for name in {record["graph"] for record in records}:
+                load_graph(name)
+
+        print(f"{len(records)} records from {args.trace}")
+        print(f"{'target':<14} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>8}")
+        print("-" * 62)
+        @contextlib.contextmanager
+        def quiet():
+            # The agents print progress for every node; hide it while measuring
+            if args.verbose:
+                yield
+                return
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                yield
+
+        if args.timing == "recorded":
+            with quiet():
+                result = replay(records, invoke, max_workers=args.max_workers)
+            print_result("recorded", result)
+            return
+
+        results = []
+        for qps in args.qps:
+            with quiet():
+                result = replay(records, invoke, qps=qps, max_workers=args.max_workers)
+            result["target_qps"] = qps
+            results.append(result)
+            print_result(f"{qps:g} qps", result)
+
+        if len(results) > 1:
+            saturation = find_saturation(results)
+            print(f"Saturation point: {f'{saturation:g} qps' if saturation else 'not reached'}")
+    finally:
+        if stub is not None:
+            stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Bounded-memory conversation store.
+
+Messages are stored once, keyed by a hash of their serialized body, and the
+conversation itself is just a list of small `MessageRef` tuples. The most
+recently used bodies stay in memory; older ones are appended to an on-disk log
+and read back through a memory map when needed.
+
+    store = MessageStore(max_in_memory=200)
+    session = ConversationSession(store, window=20)
+    result = session.invoke(get_hierarchical_graph(), "Research renewable energy")
+
+Only the last `window` messages are materialized as graph input, so the graph
+state stays small no matter how long the session runs. The hierarchical
+demo runs its conversations through `new_session()`, which builds one.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from langchain_core.messages import (
+    BaseMessage,
+    SystemMessage,
+    convert_to_messages,
+    message_to_dict,
+    messages_from_dict,
+)
+
+
+class MessageRef(NamedTuple):
+    """Lightweight handle kept in state instead of the message itself"""
+    type: str
+    digest: str
+
+
+class MessageStore:
+    """Content-addressed message bodies with an LRU hot set and a disk spill log"""
+
+    def __init__(self, max_in_memory: int = 200, spill_path: Optional[str] = None):
+        self.max_in_memory = max_in_memory
+        self._hot: "OrderedDict[str, bytes]" = OrderedDict()
+        self._index: Dict[str, Tuple[int, int]] = {}
+
+        self._owns_file = spill_path is None
+        if spill_path is None:
+            fd, spill_path = tempfile.mkstemp(prefix="messages-", suffix=".log")
+            os.close(fd)
+        self.spill_path = spill_path
+        self._log = open(spill_path, "ab")
+        self._map: Optional[mmap.mmap] = None
+
+        self.stats = {"puts": 0, "deduplicated": 0, "spilled": 0, "disk_reads": 0}
+
+    # -------------------------------------------------------------------------
+    # Write path
+    # -------------------------------------------------------------------------
+
+    def put(self, message: BaseMessage) -> MessageRef:
+        data = message_to_dict(message)
+        data["data"].pop("id", None)
+        body = json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+
+        self.stats["puts"] += 1
+        if digest in self._hot:
+            self._hot.move_to_end(digest)
+            self.stats["deduplicated"] += 1
+        elif digest in self._index:
+            self.stats["deduplicated"] += 1
+        else:
+            self._remember(digest, body)
+        return MessageRef(message.type, digest)
+
+    def put_many(self, messages: Iterable) -> List[MessageRef]:
+        return [self.put(message) for message in convert_to_messages(list(messages))]
+
+    def _remember(self, digest: str, body: bytes):
+        self._hot[digest] = body
+        while len(self._hot) > self.max_in_memory:
+            old_digest, old_body = self._hot.popitem(last=False)
+            if old_digest not in self._index:
+                self._spill(old_digest, old_body)
+
+    def _spill(self, digest: str, body: bytes):
+        offset = self._log.tell()
+        self._log.write(body)
+        self._index[digest] = (offset, len(body))
+        self.stats["spilled"] += 1
+
+    # -------------------------------------------------------------------------
+    # Read path
+    # -------------------------------------------------------------------------
+
+    def _read_spilled(self, digest: str) -> bytes:
+        offset, length = self._index[digest]
+        if self._map is None or offset + length > len(self._map):
+            # The log grew since it was last mapped
+            self._log.flush()
+            if self._map is not None:
+                self._map.close()
+            with open(self.spill_path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.stats["disk_reads"] += 1
+        return self._map[offset:offset + length]
+
+    def get(self, ref: MessageRef) -> BaseMessage:
+        body = self._hot.get(ref.digest)
+        if body is None:
+            body = self._read_spilled(ref.digest)
+        return messages_from_dict([json.loads(body)])[0]
+
+    def load(self, refs: List[MessageRef], last: Optional[int] = None) -> List[BaseMessage]:
+        """Materialize (the tail of) a conversation"""
+        if last is not None:
+            refs = refs[-last:] if last else []
+        return [self.get(ref) for ref in refs]
+
+    # -------------------------------------------------------------------------
+    # Housekeeping
+    # -------------------------------------------------------------------------
+
+    @property
+    def hot_bytes(self) -> int:
+        return sum(len(body) for body in self._hot.values())
+
+    @property
+    def spilled_bytes(self) -> int:
+        return self._log.tell()
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._log.close()
+        if self._owns_file and os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def window_start(messages: Sequence, last: Optional[int]) -> int:
+    """
+    Index of the first of the last `last` messages (or refs), moved past any
+    leading tool results whose tool call fell outside the window
+    """
+    start = max(0, len(messages) - last) if last else len(messages)
+    while start < len(messages) and messages[start].type == "tool":
+        start += 1
+    return start
+
+
+class ConversationSession:
+    """
+    A long-running conversation whose history lives in a MessageStore.
+
+    The window never starts on a tool result whose tool call fell outside it
+    (providers reject orphaned tool messages), and when older messages are
+    left out the graph gets a system notice saying so. `summarize(previous,
+    dropped)` can turn that notice into a running summary; it only sees the
+    messages that left the window since the last turn.
+    """
+
+    def __init__(
+        self,
+        store: MessageStore,
+        window: int = 20,
+        summarize: Optional[Callable[[str, List[BaseMessage]], str]] = None,
+    ):
+        self.store = store
+        self.window = window
+        self.summarize = summarize
+        self.summary = ""
+        self.refs: List[MessageRef] = []
+        self._summarized = 0
+
+    def append(self, messages: Iterable) -> List[MessageRef]:
+        refs = self.store.put_many(messages)
+        self.refs.extend(refs)
+        return refs
+
+    def window_start(self, last: Optional[int] = None) -> int:
+        """Index of the first message in the window, moved past any leading tool results"""
+        return window_start(self.refs, self.window if last is None else last)
+
+    def recent(self, last: Optional[int] = None) -> List[BaseMessage]:
+        return self.store.load(self.refs[self.window_start(last):])
+
+    def _omitted_notice(self, start: int) -> List[BaseMessage]:
+        if start == 0:
+            return []
+        if self.summarize is not None and start > self._summarized:
+            self.summary = self.summarize(self.summary, self.store.load(self.refs[self._summarized:start]))
+            self._summarized = start
+        notice = f"[{start} earlier messages of this conversation are not shown]"
+        if self.summary:
+            notice += f"\nSummary of the earlier conversation: {self.summary}"
+        return [SystemMessage(content=notice)]
+
+    def invoke(self, graph, user_input, config: Optional[dict] = None) -> dict:
+        """Run one turn: the graph only sees the recent window, new messages go to the store"""
+        new_input = self.store.put_many([("user", user_input)] if isinstance(user_input, str) else [user_input])
+        start = self.window_start()
+        history = self._omitted_notice(start) + self.store.load(self.refs[start:])
+        self.refs.extend(new_input)
+        window = history + self.store.load(new_input)
+
+        result = graph.invoke({"messages": window}, config)
+        produced = result["messages"][len(window):]
+        self.append(produced)
+        return result
@@ -0,0 +1,287 @@
+"""
+Confidence-based model tiering.
+
+Each node is configured with an ordered list of models (small -> large). A call
+goes to the first tier and escalates to the next one when:
+
+    - the structured output fails to parse / validate
+    - the decision carries a `confidence` below the node's threshold
+    - a critic callback rejects the result
+
+A decision without a confidence (e.g. a lean call on a backend that returns
+no logprobs) is judged on validity alone rather than escalated, so lean
+routing stays one call per hop. A critic that only runs later, as another
+graph node, rejects a result after the fact: the node's next call passes
+`start_tier=1` and starts on the larger model (reason "critic_rejected").
+
+Structured calls can be micro-batched across concurrent conversations with
+`enable_batching(make_batcher)`: every tier model gets its own
+routing_batcher.RoutingBatcher, so batched decisions still escalate like
+single ones. Lean one-token calls are already minimal and are not batched.
+
+Nodes without a configured policy use DEFAULT_POLICY; long-form agents use
+LARGE_ONLY. Metrics on escalation rate, per-tier latency and the latency /
+cost saved against always using the last tier are available from
+`TieringEngine.summary()`.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+from langchain_core.exceptions import OutputParserException
+from pydantic import ValidationError
+
+from prompt_assembly import cache_stats
+from lean_routing import invoke_choice as _invoke_choice
+
+
+# Relative price per 1M input / output tokens, used for the cost-saved estimate
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+
+@dataclass
+class TierPolicy:
+    """Ordered tiers for one node plus its escalation threshold"""
+    models: Sequence[str] = ("gpt-4o-mini", "gpt-4o")
+    min_confidence: float = 0.6
+    temperature: float = 0
+
+
+DEFAULT_POLICY = TierPolicy()
+
+# Agents that produce long-form content stay on the large model
+LARGE_ONLY = TierPolicy(models=("gpt-4o",))
+
+
+class EscalationError(Exception):
+    """Raised when every tier for a node has been rejected"""
+
+
+@dataclass
+class _NodeMetrics:
+    calls: int = 0
+    escalations: int = 0
+    reasons: Dict[str, int] = field(default_factory=dict)
+    served_by: Dict[str, int] = field(default_factory=dict)
+    latency_s: Dict[str, float] = field(default_factory=dict)
+    cost: float = 0.0
+    cost_if_top_tier: float = 0.0
+    served: int = 0
+    spent_s: float = 0.0
+
+
+def _default_model_factory(name: str, temperature: float):
+    from dotenv import load_dotenv
+    from backend_pool import chat_model
+
+    load_dotenv()
+    return chat_model(model=name, temperature=temperature)
+
+
+def _token_usage(message):
+    usage = getattr(message, "usage_metadata", None) or {}
+    return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+
+def _price(model_name: str, input_tokens: int, output_tokens: int) -> float:
+    input_price, output_price = MODEL_PRICES.get(model_name, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+class TieringEngine:
+    """Routes calls through per-node model tiers with escalation"""
+
+    def __init__(
+        self,
+        policies: Optional[Dict[str, TierPolicy]] = None,
+        model_factory: Callable[[str, float], object] = _default_model_factory,
+        hedger=None,
+    ):
+        self.policies: Dict[str, TierPolicy] = dict(policies or {})
+        self.model_factory = model_factory
+        # Optional hedging.Hedger wrapped around every tier attempt
+        self.hedger = hedger
+        self._models: Dict[tuple, object] = {}
+        self.metrics: Dict[str, _NodeMetrics] = {}
+        self.make_batcher: Optional[Callable] = None
+        self._batchers: Dict[int, object] = {}
+        self._batchers_lock = threading.Lock()
+
+    def configure(self, node: str, policy: TierPolicy):
+        self.policies[node] = policy
+
+    def policy_for(self, node: str) -> TierPolicy:
+        return self.policies.get(node, DEFAULT_POLICY)
+
+    def _model(self, name: str, temperature: float):
+        key = (name, temperature)
+        if key not in self._models:
+            self._models[key] = self.model_factory(name, temperature)
+        return self._models[key]
+
+    def enable_batching(self, make_batcher: Optional[Callable] = None):
+        """Batch structured calls through `make_batcher(model)`, one RoutingBatcher per tier model (None to disable)"""
+        with self._batchers_lock:
+            batchers, self._batchers = self._batchers, {}
+            self.make_batcher = make_batcher
+        for batcher in batchers.values():
+            batcher.close()
+
+    def _batcher(self, model):
+        with self._batchers_lock:
+            if id(model) not in self._batchers:
+                self._batchers[id(model)] = self.make_batcher(model)
+            return self._batchers[id(model)]
+
+    # -------------------------------------------------------------------------
+    # Invocation
+    # -------------------------------------------------------------------------
+
+    def invoke_structured(self, node: str, schema, messages: List, critic: Optional[Callable] = None):
+        """Structured-output call; returns the parsed decision from the first accepted tier"""
+
+        def attempt(model):
+            if self.make_batcher is not None:
+                # The batch backend records the shared call's usage itself, so there is no raw message here
+                try:
+                    return self._judge(node, None, self._batcher(model).submit(schema, messages), critic)
+                except (OutputParserException, ValidationError):
+                    return None, None, "invalid_output"
+            result = model.with_structured_output(schema, include_raw=True).invoke(messages)
+            if result.get("parsing_error"):
+                return result["raw"], None, "invalid_output"
+            return self._judge(node, result["raw"], result["parsed"], critic)
+
+        return self._run(node, attempt)
+
+    def invoke_choice(
+        self, node: str, schema, messages: List, critic: Optional[Callable] = None, use_logprobs: bool = True
+    ):
+        """Lean routing call (see lean_routing): one output token, confidence from logprobs"""
+
+        def attempt(model):
+            raw, parsed = _invoke_choice(model, schema, messages, use_logprobs=use_logprobs)
+            if parsed is None:
+                return raw, None, "invalid_output"
+            return self._judge(node, raw, parsed, critic)
+
+        return self._run(node, attempt)
+
+    def invoke(self, node: str, messages: List, critic: Optional[Callable] = None, start_tier: int = 0):
+        """
+        Plain chat call for agents. Escalates when `critic(response)` rejects the
+        response; `start_tier=1` re-runs a node whose last result a later critic rejected.
+        """
+
+        def attempt(model):
+            response = model.invoke(messages)
+            if critic is not None and not critic(response):
+                return response, response, "critic_rejected"
+            return response, response, None
+
+        return self._run(node, attempt, start_tier)
+
+    def _judge(self, node: str, raw, parsed, critic: Optional[Callable] = None):
+        # Without a confidence (no logprobs, or the model left it out) a valid decision is accepted
+        if "confidence" in getattr(parsed, "model_fields_set", ()):
+            if parsed.confidence < self.policy_for(node).min_confidence:
+                return raw, parsed, "low_confidence"
+        if critic is not None and not critic(parsed):
+            return raw, parsed, "critic_rejected"
+        return raw, parsed, None
+
+    def _run(self, node: str, attempt: Callable, start_tier: int = 0):
+        policy = self.policy_for(node)
+        metrics = self.metrics.setdefault(node, _NodeMetrics())
+        metrics.calls += 1
+
+        top_tier = policy.models[-1]
+        first_tier = min(start_tier, len(policy.models) - 1)
+        if first_tier:
+            self._count_escalation(metrics, "critic_rejected")
+            print(f"⬆️ {node}: starting on {policy.models[first_tier]} (critic_rejected)")
+        spent = 0.0
+        last_reason = None
+        for tier in range(first_tier, len(policy.models)):
+            model_name = policy.models[tier]
+            start = time.perf_counter()
+            model = self._model(model_name, policy.temperature)
+            try:
+                if self.hedger is not None:
+                    raw, result, reason = self.hedger.call(f"{node}/{model_name}", lambda: attempt(model))
+                else:
+                    raw, result, reason = attempt(model)
+            except ValidationError:
+                raw, result, reason = None, None, "invalid_output"
+            elapsed = time.perf_counter() - start
+            spent += elapsed
+            self._observe_latency(metrics, model_name, elapsed)
+
+            input_tokens = output_tokens = 0
+            if raw is not None:
+                cache_stats.record(raw, node)
+                input_tokens, output_tokens = _token_usage(raw)
+                metrics.cost += _price(model_name, input_tokens, output_tokens)
+
+            is_last = tier == len(policy.models) - 1
+            if reason is None or (is_last and result is not None):
+                # The last tier's answer is used even if it is not fully trusted
+                metrics.served_by[model_name] = metrics.served_by.get(model_name, 0) + 1
+                metrics.cost_if_top_tier += _price(top_tier, input_tokens, output_tokens)
+                metrics.served += 1
+                metrics.spent_s += spent
+                return result
+
+            last_reason = reason
+            if not is_last:
+                self._count_escalation(metrics, reason)
+                print(f"⬆️ {node}: escalating from {model_name} ({reason})")
+
+        raise EscalationError(f"{node}: every tier rejected the result ({last_reason})")
+
+    @staticmethod
+    def _count_escalation(metrics: _NodeMetrics, reason: str):
+        metrics.escalations += 1
+        metrics.reasons[reason] = metrics.reasons.get(reason, 0) + 1
+
+    @staticmethod
+    def _observe_latency(metrics: _NodeMetrics, model_name: str, elapsed: float, alpha: float = 0.2):
+        # EWMA so the reported latency and the latency-saved estimate follow the current provider speed
+        previous = metrics.latency_s.get(model_name)
+        metrics.latency_s[model_name] = elapsed if previous is None else (1 - alpha) * previous + alpha * elapsed
+
+    # -------------------------------------------------------------------------
+    # Reporting
+    # -------------------------------------------------------------------------
+
+    def latency_saved_s(self, node: str) -> Optional[float]:
+        """
+        Time saved against sending every call of `node` straight to the last tier
+        (negative when escalations made it slower); None until that tier has been measured.
+        """
+        m = self.metrics.get(node)
+        top_latency = m.latency_s.get(self.policy_for(node).models[-1]) if m else None
+        if top_latency is None:
+            return None
+        return m.served * top_latency - m.spent_s
+
+    def summary(self) -> dict:
+        report = {}
+        for node, m in self.metrics.items():
+            saved = self.latency_saved_s(node)
+            report[node] = {
+                "calls": m.calls,
+                "escalation_rate": round(m.escalations / m.calls, 4) if m.calls else 0.0,
+                "escalation_reasons": dict(m.reasons),
+                "served_by": dict(m.served_by),
+                "latency_ms": {name: round(seconds * 1000, 1) for name, seconds in m.latency_s.items()},
+                "latency_saved_s": round(saved, 3) if saved is not None else None,
+                "cost_usd": round(m.cost, 6),
+                "cost_saved_usd": round(m.cost_if_top_tier - m.cost, 6),
+            }
+        return report
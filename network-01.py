@@ -1,30 +1,54 @@
 import getpass
 import os
-from typing import Annotated, Literal
-from dotenv import load_dotenv
+from functools import lru_cache
+from typing import Annotated, Dict, Literal
 
-from langchain_tavily import TavilySearch
 from langchain_core.tools import tool
-from langchain_experimental.utilities import PythonREPL
 from langchain_core.messages import BaseMessage, HumanMessage
-from langchain_openai import ChatOpenAI
-from langgraph.prebuilt import create_react_agent
 from langgraph.graph import MessagesState, END, StateGraph, START
 from langgraph.types import Command
 
-# Load environment variables from .env file
-load_dotenv()
+from prompt_assembly import cache_stats, record_messages
+from artifact_store import ArtifactStore, collect_dataframes, collect_figures
+from research_pipeline import ResearchPipeline, user_question
+
+# Stdout longer than this is written to the artifact store instead of the conversation
+INLINE_STDOUT_LIMIT = 1000
+
+artifacts = ArtifactStore()
+_stored_frames = {}
 
 def _set_if_undefined(var: str):
     if not os.environ.get(var):
         os.environ[var] = getpass.getpass(f"Please provide your {var}")
 
-_set_if_undefined("OPENAI_API_KEY")
-_set_if_undefined("TAVILY_API_KEY")
+@lru_cache(maxsize=None)
+def _load_env():
+    from dotenv import load_dotenv
+
+    # Load environment variables from .env file
+    load_dotenv()
+    _set_if_undefined("OPENAI_API_KEY")
+    _set_if_undefined("TAVILY_API_KEY")
+
+# Initialize tools on first use
+@lru_cache(maxsize=None)
+def get_tavily_tool():
+    from langchain_tavily import TavilySearch
 
-# Initialize tools
-tavily_tool = TavilySearch(max_results=5)
-repl = PythonREPL()
+    _load_env()
+    return TavilySearch(max_results=5)
+
+# Sub-queries are searched concurrently before the research agent runs
+@lru_cache(maxsize=None)
+def get_research_pipeline():
+    return ResearchPipeline(search=lambda query: get_tavily_tool().invoke({"query": query}))
+
+@lru_cache(maxsize=None)
+def get_repl():
+    from langchain_experimental.utilities import PythonREPL
+
+    return PythonREPL()
 
 @tool
 def python_repl_tool(
@@ -32,11 +56,20 @@ def python_repl_tool(
 ):
     """Use this to execute python code. If you want to see the output of a value,
     you should print it out with `print(...)`. This is visible to the user."""
+    repl = get_repl()
     try:
         result = repl.run(code)
     except BaseException as e:
         return f"Failed to execute. Error: {repr(e)}"
+
+    # Keep figures, large frames and long output out of the message history
+    refs = collect_figures(artifacts) + collect_dataframes(artifacts, {**repl.globals, **repl.locals}, _stored_frames)
+    if len(result) > INLINE_STDOUT_LIMIT:
+        refs.append(artifacts.put_text(result))
+        result = "(stored as artifact, see below)"
     result_str = f"Successfully executed:\n```python\n{code}\n```\nStdout: {result}"
+    if refs:
+        result_str += "\nArtifacts:\n" + "\n".join(ref.to_text() for ref in refs)
     return (
         result_str + "\n\nIf you have completed all tasks, respond with FINAL ANSWER."
     )
@@ -52,7 +85,12 @@ def make_system_prompt(suffix: str) -> str:
         f"\n{suffix}"
     )
 
-llm = ChatOpenAI(model_name="gpt-4o")
+@lru_cache(maxsize=None)
+def get_llm():
+    from backend_pool import chat_model
+
+    _load_env()
+    return chat_model(model="gpt-4o")
 
 def get_next_node(last_message: BaseMessage, goto: str):
     if "FINAL ANSWER" in last_message.content:
@@ -60,38 +98,62 @@ def get_next_node(last_message: BaseMessage, goto: str):
     return goto
 
 # Research agent and node
-research_agent = create_react_agent(
-    llm,
-    tools=[tavily_tool],
-    prompt=make_system_prompt(
-        "You can only do research. You are working with a chart generator colleague."
-    ),
-)
+@lru_cache(maxsize=None)
+def get_research_agent():
+    from langgraph.prebuilt import create_react_agent
+
+    return create_react_agent(
+        get_llm(),
+        tools=[get_tavily_tool()],
+        prompt=make_system_prompt(
+            "You can only do research. You are working with a chart generator colleague."
+        ),
+    )
+
+class ResearchChartState(MessagesState):
+    """Messages plus the research context built for each question in this run"""
+    research_contexts: Dict[str, str]
 
 def research_node(
-    state: MessagesState,
+    state: ResearchChartState,
 ) -> Command[Literal["chart_generator", END]]:
-    result = research_agent.invoke(state)
-    goto = get_next_node(result["messages"][-1], "chart_generator")
-    result["messages"][-1] = HumanMessage(
-        content=result["messages"][-1].content, name="researcher"
+    # Search on the user's request, not on whatever the chart generator said last
+    question = user_question(state["messages"])
+    # The pipeline runs once per question per run; revisits reuse its context
+    contexts = state.get("research_contexts") or {}
+    if question in contexts:
+        context = HumanMessage(content=contexts[question], name="research_pipeline")
+    else:
+        context = get_research_pipeline().context_message(question)
+    result = get_research_agent().invoke({**state, "messages": [*state["messages"], context]})
+    # The context only feeds this call; keeping it out of the history keeps later prompts small
+    messages = result["messages"][len(state["messages"]) + 1:]
+    record_messages(messages, node="researcher")
+    goto = get_next_node(messages[-1], "chart_generator")
+    messages[-1] = HumanMessage(
+        content=messages[-1].content, name="researcher"
     )
     return Command(
-        update={"messages": result["messages"]},
+        update={"messages": messages, "research_contexts": {**contexts, question: context.content}},
         goto=goto,
     )
 
 # Chart generator agent and node
-chart_agent = create_react_agent(
-    llm,
-    tools=[python_repl_tool],
-    prompt=make_system_prompt(
-        "You can only generate charts. You are working with a researcher colleague."
-    ),
-)
-
-def chart_node(state: MessagesState) -> Command[Literal["researcher", END]]:
-    result = chart_agent.invoke(state)
+@lru_cache(maxsize=None)
+def get_chart_agent():
+    from langgraph.prebuilt import create_react_agent
+
+    return create_react_agent(
+        get_llm(),
+        tools=[python_repl_tool],
+        prompt=make_system_prompt(
+            "You can only generate charts. You are working with a researcher colleague."
+        ),
+    )
+
+def chart_node(state: ResearchChartState) -> Command[Literal["researcher", END]]:
+    result = get_chart_agent().invoke(state)
+    record_messages(result["messages"][len(state["messages"]):], node="chart_generator")
     goto = get_next_node(result["messages"][-1], "researcher")
     result["messages"][-1] = HumanMessage(
         content=result["messages"][-1].content, name="chart_generator"
@@ -102,16 +164,34 @@ def chart_node(state: MessagesState) -> Command[Literal["researcher", END]]:
     )
 
 # Build the graph
-workflow = StateGraph(MessagesState)
-workflow.add_node("researcher", research_node)
-workflow.add_node("chart_generator", chart_node)
-
-workflow.add_edge(START, "researcher")
-graph = workflow.compile()
+@lru_cache(maxsize=None)
+def get_graph():
+    workflow = StateGraph(ResearchChartState)
+    workflow.add_node("researcher", research_node)
+    workflow.add_node("chart_generator", chart_node)
+
+    workflow.add_edge(START, "researcher")
+    return workflow.compile()
+
+# The old module-level names still work, but are only built when first accessed
+_LAZY_ATTRIBUTES = {
+    "tavily_tool": get_tavily_tool,
+    "research_pipeline": get_research_pipeline,
+    "repl": get_repl,
+    "llm": get_llm,
+    "research_agent": get_research_agent,
+    "chart_agent": get_chart_agent,
+    "graph": get_graph,
+}
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Run the graph
 if __name__ == "__main__":
-    events = graph.stream(
+    events = get_graph().stream(
         {
             "messages": [
                 (
@@ -126,4 +206,7 @@ if __name__ == "__main__":
     )
     for s in events:
         print(s)
-        print("----")
\ No newline at end of file
+        print("----")
+    print(f"📊 Prompt cache: {cache_stats.summary()}")
+    print(f"📦 Artifacts: {artifacts.summary()}")
+    print(f"🔎 Research pipeline: {get_research_pipeline().summary()}")
\ No newline at end of file
@@ -1,27 +1,105 @@
-from typing import Literal, Dict, Any
-from langchain_openai import ChatOpenAI
+import operator
+import re
+from functools import lru_cache
+from typing import Annotated, Iterator, List, Literal, Dict, Any, Optional
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langgraph.types import Command
-from langgraph.graph import StateGraph, MessagesState, START, END
+from langgraph.graph import StateGraph, START, END
 from pydantic import BaseModel
-import json
 from dotenv import load_dotenv
+import json
+
+from prompt_assembly import cache_stats
+from hedging import hedger
+from model_tiering import LARGE_ONLY, TierPolicy, TieringEngine
+from convergence import ConvergenceController, ConvergenceReport, edit_ratio
+from fast_state import messages_state
+from paragraph_pipeline import iter_paragraphs, pipeline_paragraphs
 
 import os
 import json
 
-# Load environment variables (from .env file)
+# Load environment variables (from .env file) before FAST_STATE is read below
 load_dotenv()
 
-# Configure the model
-model = ChatOpenAI(model="gpt-4o",temperature=0.7)
+# Configure the model (built on first use, not at import)
+@lru_cache(maxsize=None)
+def get_model():
+    from backend_pool import chat_model
+
+    return chat_model(model="gpt-4o",temperature=0.7)
 
 class RouteDecision(BaseModel):
     """Structured output for routing decisions"""
     next_agent: Literal["story_writer", "editor", "critic", "__end__"]
     reasoning: str
 
-def story_writer(state: MessagesState) -> Command[Literal["editor", "critic", END]]:
+# The editor starts on gpt-4o-mini; after the critic sends work back, the next edit runs on gpt-4o
+tiers = TieringEngine({
+    "editor": TierPolicy(temperature=0.7),
+    "story_writer": TierPolicy(models=LARGE_ONLY.models, temperature=0.7),
+}, hedger=hedger)
+
+class NetworkState(messages_state()):
+    """Messages plus the signals the convergence controller needs"""
+    quality_scores: Annotated[List[float], operator.add]
+    edit_ratios: Annotated[List[float], operator.add]
+    last_draft: str
+    stop_reason: str
+    model_next: str
+    paragraph_notes: List[str]
+    critic_rejected: bool
+    story_revised: bool
+
+# Ends the loop once quality is good enough or drafts stop changing
+convergence = ConvergenceController()
+convergence_report = ConvergenceReport(max_iterations=convergence.max_iterations)
+
+def _json_object(content: str) -> Dict[str, Any]:
+    """Parse an agent's JSON reply; anything but a JSON object counts as unparseable"""
+    result = json.loads(content)
+    if not isinstance(result, dict):
+        raise json.JSONDecodeError("expected a JSON object", content, 0)
+    return result
+
+def _as_score(value) -> Optional[float]:
+    """Critics return 8, "8" or "8/10" - normalise to a float"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.match(r"\s*(\d+(?:\.\d+)?)", str(value))
+    return float(match.group(1)) if match else None
+
+def next_step(state: NetworkState, goto: str, content: str, is_draft: bool = True, quality_score=None) -> Command:
+    """Record convergence signals for this hop and end the loop early if they say so"""
+    update = {"messages": [AIMessage(content=content)]}
+    quality_scores = list(state.get("quality_scores", []))
+    edit_ratios = list(state.get("edit_ratios", []))
+
+    if is_draft:
+        previous = state.get("last_draft")
+        if previous:
+            ratio = edit_ratio(previous, content)
+            edit_ratios.append(ratio)
+            update["edit_ratios"] = [ratio]
+        update["last_draft"] = content
+
+    score = _as_score(quality_score) if quality_score is not None else None
+    if score is not None:
+        quality_scores.append(score)
+        update["quality_scores"] = [score]
+
+    if goto != END:
+        iterations = sum(1 for msg in state["messages"] if msg.type == "ai") + 1
+        reason = convergence.decide(quality_scores, edit_ratios, iterations, edited="edit_ratios" in update)
+        if reason:
+            print(f"🛑 Stopping early instead of going to {goto}: {reason}")
+            update["stop_reason"] = reason
+            update["model_next"] = goto
+            goto = END
+
+    return Command(goto=goto, update=update)
+
+def story_writer(state: NetworkState) -> Command[Literal["editor", "critic", END]]:
     """Agent that writes creative stories"""
     print("📝 Story Writer is working...")
     
@@ -43,12 +121,12 @@ Respond with a JSON object containing:
         HumanMessage(content=last_message)
     ]
     
-    response = model.invoke(story_prompt)
+    response = tiers.invoke("story_writer", story_prompt)
   
     
     try:
         # Parse the JSON response
-        result = json.loads(response.content)
+        result = _json_object(response.content)
         content = result.get("content", response.content)
         next_agent = result.get("next_agent", "editor")
         reasoning = result.get("reasoning", "Continuing workflow")
@@ -56,18 +134,12 @@ Respond with a JSON object containing:
         print(f"✅ Story Writer completed. Next: {next_agent}")
         print(f"Reasoning: {reasoning}")
         
-        return Command(
-            goto=next_agent,
-            update={"messages": [AIMessage(content=content)]},
-        )
+        return next_step(state, next_agent, content)
     except json.JSONDecodeError:
         # Fallback if JSON parsing fails
-        return Command(
-            goto="editor",
-            update={"messages": [AIMessage(content=response.content)]},
-        )
+        return next_step(state, "editor", response.content)
 
-def editor(state: MessagesState) -> Command[Literal["story_writer", "critic", END]]:
+def editor(state: NetworkState) -> Command[Literal["story_writer", "critic", END]]:
     """Agent that edits and improves content"""
     print("✏️ Editor is working...")
     
@@ -87,10 +159,11 @@ Respond with a JSON object containing:
         HumanMessage(content=f"Please edit this content:\n\n{last_message}")
     ]
     
-    response = model.invoke(edit_prompt)
+    # The critic judges the editor's work one hop later: a rejected edit is redone on the larger tier
+    response = tiers.invoke("editor", edit_prompt, start_tier=1 if state.get("critic_rejected") else 0)
     
     try:
-        result = json.loads(response.content)
+        result = _json_object(response.content)
         content = result.get("content", response.content)
         next_agent = result.get("next_agent", "critic")
         reasoning = result.get("reasoning", "Continuing workflow")
@@ -98,17 +171,13 @@ Respond with a JSON object containing:
         print(f"✅ Editor completed. Next: {next_agent}")
         print(f"Reasoning: {reasoning}")
         
-        return Command(
-            goto=next_agent,
-            update={"messages": [AIMessage(content=content)]},
-        )
+        command = next_step(state, next_agent, content)
     except json.JSONDecodeError:
-        return Command(
-            goto="critic",
-            update={"messages": [AIMessage(content=response.content)]},
-        )
+        command = next_step(state, "critic", response.content)
+    command.update["critic_rejected"] = False
+    return command
 
-def critic(state: MessagesState) -> Command[Literal["story_writer", "editor", END]]:
+def critic(state: NetworkState) -> Command[Literal["story_writer", "editor", END]]:
     """Agent that provides feedback and quality assessment"""
     print("🔍 Critic is analyzing...")
     
@@ -129,10 +198,10 @@ Respond with a JSON object containing:
         HumanMessage(content=f"Please review this content:\n\n{last_message}")
     ]
     
-    response = model.invoke(critic_prompt)
+    response = hedger.invoke("critic", get_model(), critic_prompt)
     
     try:
-        result = json.loads(response.content)
+        result = _json_object(response.content)
         content = result.get("content", response.content)
         next_agent = result.get("next_agent", "__end__")
         reasoning = result.get("reasoning", "Review complete")
@@ -142,30 +211,184 @@ Respond with a JSON object containing:
         print(f"Next: {next_agent}")
         print(f"Reasoning: {reasoning}")
         
-        return Command(
-            goto=next_agent,
-            update={"messages": [AIMessage(content=content)]},
-        )
+        command = next_step(state, next_agent, content, is_draft=False, quality_score=result.get("quality_score"))
+        command.update["critic_rejected"] = next_agent == "editor"
+        return command
     except json.JSONDecodeError:
-        return Command(
-            goto="__end__",
-            update={"messages": [AIMessage(content=response.content)]},
-        )
+        return next_step(state, "__end__", response.content, is_draft=False)
 
 # Build the graph
-builder = StateGraph(MessagesState)
-builder.add_node("story_writer", story_writer)
-builder.add_node("editor", editor)
-builder.add_node("critic", critic)
+@lru_cache(maxsize=None)
+def get_network():
+    builder = StateGraph(NetworkState)
+    builder.add_node("story_writer", story_writer)
+    builder.add_node("editor", editor)
+    builder.add_node("critic", critic)
+
+    # Set the entry point
+    builder.add_edge(START, "story_writer")
+
+    # Compile the network
+    return builder.compile()
+
+# =============================================================================
+# PIPELINED MODE
+# =============================================================================
+
+# Paragraphs being edited / reviewed at the same time
+PIPELINE_WORKERS = 4
+
+PIPELINE_WRITER_PROMPT = """You are a creative story writer. Write an engaging short story (3-5 paragraphs)
+with vivid characters, setting and a compelling plot.
+Write plain prose only - no title, JSON or commentary - and separate paragraphs with a blank line."""
+
+PARAGRAPH_EDITOR_PROMPT = """You are a professional editor working on one paragraph of a story while the
+rest of it is still being written. Improve grammar, style and flow while preserving the original voice.
+Return only the edited paragraph."""
+
+PARAGRAPH_CRITIC_PROMPT = """You are a literary critic reviewing one paragraph of a story.
+Respond with a JSON object containing:
+- quality_score: numerical rating 1-10
+- notes: one or two sentences on what the final pass should fix"""
+
+# Only a verdict: the stitched story is kept as is, so the critic need not repeat it
+FINAL_REVIEW_PROMPT = """You are a literary critic reviewing a finished story.
+Respond with a JSON object containing:
+- quality_score: numerical rating 1-10
+- approved: true if the story is ready, false if it needs another editing pass
+- notes: what the final editor should fix (if not approved)"""
+
+STITCH_PROMPT = """You are the final editor. The paragraphs below were edited independently.
+Join them into one coherent story: smooth the transitions, keep names, tense and voice consistent,
+and apply the critic notes. Return only the story."""
 
-# Set the entry point
-builder.add_edge(START, "story_writer")
+def _stream_text(node: str, prompt) -> Iterator[str]:
+    """Yield the model's text as it is generated; usage is recorded once the stream ends"""
+    message = None
+    for chunk in get_model().stream(prompt, stream_usage=True):
+        message = chunk if message is None else message + chunk
+        if isinstance(chunk.content, str):
+            yield chunk.content
+    if message is not None:
+        cache_stats.record(message, node)
 
-# Compile the network
-network = builder.compile()
+def _edit_and_review(index: int, paragraph: str, previous: List[str]) -> Dict[str, Any]:
+    """Editor then critic for one paragraph, with the preceding raw paragraphs as context"""
+    context = "\n\n".join(previous[-2:]) or "(this is the opening paragraph)"
+    edit_prompt = [
+        SystemMessage(content=PARAGRAPH_EDITOR_PROMPT),
+        HumanMessage(content=f"Story so far:\n\n{context}\n\nParagraph {index + 1} to edit:\n\n{paragraph}"),
+    ]
+    edited = hedger.invoke("paragraph_editor", get_model(), edit_prompt).content.strip()
+
+    critic_prompt = [SystemMessage(content=PARAGRAPH_CRITIC_PROMPT), HumanMessage(content=edited)]
+    review = hedger.invoke("paragraph_critic", get_model(), critic_prompt)
+    try:
+        result = _json_object(review.content)
+    except json.JSONDecodeError:
+        result = {"notes": review.content}
+    return {"paragraph": edited, "quality_score": _as_score(result.get("quality_score")), "notes": result.get("notes", "")}
+
+def pipelined_draft(state: NetworkState) -> Dict[str, Any]:
+    """Writer streams paragraphs; each finished paragraph is edited and reviewed while the writer continues"""
+    print("📝 Story Writer is streaming paragraphs (pipelined)...")
+
+    last_message = state["messages"][-1].content if state["messages"] else "Write a short story"
+    prompt = [SystemMessage(content=PIPELINE_WRITER_PROMPT), HumanMessage(content=last_message)]
+    results, timings = pipeline_paragraphs(
+        iter_paragraphs(_stream_text("story_writer", prompt)), _edit_and_review, max_workers=PIPELINE_WORKERS
+    )
+
+    scores = [r["quality_score"] for r in results if r["quality_score"] is not None]
+    print(
+        f"✅ {len(results)} paragraphs written, edited and reviewed "
+        f"(first after {timings.get('first_paragraph_s', 0):.1f}s, writer done {timings['writer_done_s']:.1f}s, "
+        f"last review {timings['stages_done_s']:.1f}s)"
+    )
+    draft = "\n\n".join(r["paragraph"] for r in results)
+    update = {
+        "messages": [AIMessage(content=draft)],
+        "last_draft": draft,
+        "paragraph_notes": [
+            f"Paragraph {i + 1} ({r['quality_score'] if r['quality_score'] is not None else '?'}/10): {r['notes']}"
+            for i, r in enumerate(results)
+        ],
+    }
+    if scores:
+        update["quality_scores"] = [sum(scores) / len(scores)]
+    return update
+
+def stitch(state: NetworkState) -> Dict[str, Any]:
+    """Final pass that turns the independently edited paragraphs into one coherent story"""
+    print("🧵 Stitching the edited paragraphs...")
+
+    notes = "\n".join(state.get("paragraph_notes") or []) or "None"
+    stitch_prompt = [
+        SystemMessage(content=STITCH_PROMPT),
+        HumanMessage(content=f"Paragraphs:\n\n{state['last_draft']}\n\nCritic notes:\n{notes}"),
+    ]
+    response = hedger.invoke("stitch", get_model(), stitch_prompt)
+    return {"messages": [AIMessage(content=response.content)], "last_draft": response.content}
 
-def run_demo(initial_prompt: str = "Write a short story about a time traveler who gets stuck in a mundane moment"):
-    """Run the multi-agent network demo"""
+def final_review(state: NetworkState) -> Command[Literal["stitch", END]]:
+    """
+    Whole-story critic pass: the paragraph critics never see the stitched story.
+    A story the critic does not approve gets one more stitch pass with its notes.
+    """
+    print("🔍 Critic is reviewing the stitched story...")
+
+    critic_prompt = [
+        SystemMessage(content=FINAL_REVIEW_PROMPT),
+        HumanMessage(content=state["last_draft"]),
+    ]
+    response = hedger.invoke("final_review", get_model(), critic_prompt)
+    try:
+        result = _json_object(response.content)
+    except json.JSONDecodeError:
+        result = {"approved": True, "notes": response.content}
+
+    score = _as_score(result.get("quality_score")) if result.get("quality_score") is not None else None
+    update = {"quality_scores": [score]} if score is not None else {}
+    approved = result.get("approved", True) is not False or (score is not None and score >= convergence.target_quality)
+    print(f"✅ Critic completed. Quality Score: {score if score is not None else 'N/A'}/10")
+    if approved or state.get("story_revised"):
+        return Command(goto=END, update=update)
+
+    print("🔁 Revising the stitched story with the critic's notes")
+    notes = result.get("notes") or "Improve the story as a whole."
+    return Command(
+        goto="stitch",
+        update={**update, "paragraph_notes": [f"Whole story: {notes}"], "story_revised": True},
+    )
+
+@lru_cache(maxsize=None)
+def get_pipelined_network():
+    builder = StateGraph(NetworkState)
+    builder.add_node("pipelined_draft", pipelined_draft)
+    builder.add_node("stitch", stitch)
+    builder.add_node("final_review", final_review)
+    builder.add_edge(START, "pipelined_draft")
+    builder.add_edge("pipelined_draft", "stitch")
+    builder.add_edge("stitch", "final_review")
+    return builder.compile()
+
+# The old module-level names still work, but are only built when first accessed
+_LAZY_ATTRIBUTES = {
+    "model": get_model,
+    "network": get_network,
+    "pipelined_network": get_pipelined_network,
+}
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def run_demo(
+    initial_prompt: str = "Write a short story about a time traveler who gets stuck in a mundane moment",
+    pipelined: bool = False,
+):
+    """Run the multi-agent network demo (pipelined=True overlaps writing, editing and review per paragraph)"""
     print("🚀 Starting Multi-Agent Creative Writing Network")
     print("=" * 60)
     print(f"Initial prompt: {initial_prompt}")
@@ -177,16 +400,25 @@ def run_demo(initial_prompt: str = "Write a short story about a time traveler wh
     }
     
     # Run the network
-    result = network.invoke(initial_state)
+    graph = get_pipelined_network() if pipelined else get_network()
+    result = graph.invoke(initial_state)
     
     print("\n" + "=" * 60)
     print("🎉 FINAL RESULT")
     print("=" * 60)
     
-    # Print the final content
-    if result["messages"]:
-        final_content = result["messages"][-1].content
-        print(final_content)
+    # Print the final story (the last message may be the critic's review when the loop stopped early)
+    final_content = result.get("last_draft") or (result["messages"][-1].content if result["messages"] else "")
+    print(final_content)
+    
+    print(f"\n📊 Prompt cache: {cache_stats.summary()}")
+    print(f"📊 Hedging: {hedger.summary()}")
+    print(f"📊 Model tiering: {tiers.summary()}")
+    
+    # Per-run convergence report
+    iterations = sum(1 for msg in result["messages"] if msg.type == "ai")
+    convergence_report.record(iterations, result.get("stop_reason"), result.get("model_next"))
+    print(f"📊 Convergence: {convergence_report.summary()}")
     
     return result
 
@@ -0,0 +1,141 @@
+"""
+Prompt assembly helpers shared by all agents.
+
+Providers cache the longest *identical prefix* of a request, so every prompt
+built here follows the same layout:
+
+    1. static instructions / option lists (never change between calls)
+    2. dynamic conversation content (always last)
+
+Structured-output schemas and tool definitions are sent by the provider ahead
+of the messages, so keeping the first system message static is enough to keep
+the whole prefix stable.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+
+# =============================================================================
+# PROMPT ASSEMBLY
+# =============================================================================
+
+def render_options(options: Dict[str, str]) -> str:
+    """Render routing options as a stable bullet list (insertion order)"""
+    return "\n".join(f"- {name}: {description}" for name, description in options.items())
+
+
+def format_transcript(messages: Sequence[BaseMessage], limit: Optional[int] = None) -> str:
+    """Render (the tail of) a conversation as plain text for routing prompts"""
+    if limit is not None:
+        messages = messages[-limit:]
+    if not messages:
+        return "No previous messages"
+    return "\n\n".join(f"[{msg.type}] {msg.content}" for msg in messages)
+
+
+def assemble_prompt(
+    static: Union[str, Iterable[str]],
+    dynamic: Union[str, Sequence[BaseMessage], None] = None,
+) -> List[BaseMessage]:
+    """
+    Build a message list with the static part first and the dynamic part last.
+
+    `static` is one or more instruction blocks joined into a single system
+    message. `dynamic` is either a string (wrapped in a HumanMessage) or the
+    conversation messages themselves.
+    """
+    if not isinstance(static, str):
+        static = "\n\n".join(block.strip() for block in static)
+    prompt: List[BaseMessage] = [SystemMessage(content=static.strip())]
+
+    if dynamic is None:
+        return prompt
+    if isinstance(dynamic, str):
+        prompt.append(HumanMessage(content=dynamic))
+    else:
+        prompt.extend(dynamic)
+    return prompt
+
+
+# =============================================================================
+# CACHE-HIT TRACKING
+# =============================================================================
+
+def _cached_tokens(message) -> tuple:
+    """Return (input_tokens, cached_tokens) reported for a model response"""
+    usage = getattr(message, "usage_metadata", None) or {}
+    if usage:
+        details = usage.get("input_token_details") or {}
+        return usage.get("input_tokens", 0), details.get("cache_read", 0) or 0
+
+    # Fall back to the raw OpenAI payload
+    token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+    details = token_usage.get("prompt_tokens_details") or {}
+    return token_usage.get("prompt_tokens", 0), details.get("cached_tokens", 0) or 0
+
+
+class PromptCacheStats:
+    """Accumulates prompt / cached token counts from usage metadata"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.input_tokens = 0
+        self.cached_tokens = 0
+        self.by_node: Dict[str, Dict[str, int]] = {}
+
+    def record(self, message, node: Optional[str] = None):
+        input_tokens, cached_tokens = _cached_tokens(message)
+        self.calls += 1
+        self.input_tokens += input_tokens
+        self.cached_tokens += cached_tokens
+
+        if node:
+            entry = self.by_node.setdefault(node, {"calls": 0, "input_tokens": 0, "cached_tokens": 0})
+            entry["calls"] += 1
+            entry["input_tokens"] += input_tokens
+            entry["cached_tokens"] += cached_tokens
+
+    @property
+    def hit_ratio(self) -> float:
+        return self.cached_tokens / self.input_tokens if self.input_tokens else 0.0
+
+    def summary(self) -> dict:
+        return {
+            "calls": self.calls,
+            "input_tokens": self.input_tokens,
+            "cached_tokens": self.cached_tokens,
+            "hit_ratio": round(self.hit_ratio, 4),
+            "by_node": {name: dict(entry) for name, entry in self.by_node.items()},
+        }
+
+
+# Process-wide stats used by the demo scripts
+cache_stats = PromptCacheStats()
+
+
+def record_messages(messages: Iterable[BaseMessage], node: Optional[str] = None):
+    """Record usage for every AI message in a prebuilt agent's output"""
+    for message in messages:
+        if message.type == "ai":
+            cache_stats.record(message, node)
+
+
+def invoke_tracked(model, messages: List[BaseMessage], node: Optional[str] = None):
+    """Invoke a chat model and record its cache usage"""
+    response = model.invoke(messages)
+    cache_stats.record(response, node)
+    return response
+
+
+def invoke_structured(model, schema, messages: List[BaseMessage], node: Optional[str] = None):
+    """Invoke a structured-output call, recording usage from the raw response"""
+    result = model.with_structured_output(schema, include_raw=True).invoke(messages)
+    cache_stats.record(result["raw"], node)
+    if result.get("parsing_error"):
+        raise result["parsing_error"]
+    return result["parsed"]
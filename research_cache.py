@@ -0,0 +1,214 @@
+"""
+Topic-keyed cache of fact-checked research for the hierarchical research team.
+
+The same topics come through the research team over and over, phrased
+differently ("benefits of renewable energy", "What are the benefits of
+renewable energy?", "Research renewable energy benefits and write an
+article"). `topic_key` folds a request down to its content words, so all
+of these share one entry:
+
+    benefit energy renewabl
+
+A request with no content words (key '') is never looked up or stored.
+Only research the fact checker passed (a final "VERDICT: PASS" line, see
+`fact_check_passed`) is stored. Each entry
+keeps its provenance: the request that produced it, the model, when it was
+fact-checked and how long the team took. An entry is fresh for `ttl_s`
+seconds. The research supervisor serves a fresh entry directly and skips
+both agents. A stale entry is re-researched and replaced. `summary()`
+reports the hit rate and the team latency the hits saved. A persisted
+file that cannot be read is reported and ignored, so a corrupt cache never
+stops the app from starting.
+
+    cache = ResearchCache(ttl_s=6 * 3600, path=".research_cache.json")
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional, Tuple
+
+_WORD = re.compile(r"[a-z0-9]+")
+_VERDICT = re.compile(r"VERDICT:\s*(PASS|FAIL)", re.IGNORECASE)
+
+DEFAULT_TTL_S = 24 * 3600
+
+# Filler and task words ("research X and write an article") that don't change the topic
+_NON_TOPIC_WORDS = frozenset(
+    """
+    a about an and are article as at be blog brief by can could detailed do does explain find for from give
+    happen how i in information into is it its me my need of on or overview please post report research
+    short some summary tell that the then this to up us want was we what which why will with would write
+    you your
+    """.split()
+)
+
+
+def _stem(word: str) -> str:
+    """Crude suffix folding: causes / caused / cause -> caus, training -> train"""
+    if len(word) > 5 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 6 and word.endswith("ing"):
+        word = word[:-3]
+    elif len(word) > 5 and word.endswith("ed"):
+        word = word[:-2]
+    elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    return word[:-1] if len(word) > 4 and word.endswith("e") else word
+
+
+def topic_key(text: str) -> str:
+    """Order-insensitive key made of the request's content words"""
+    words = {_stem(word) for word in _WORD.findall(text.lower()) if word not in _NON_TOPIC_WORDS}
+    return " ".join(sorted(words))
+
+
+def fact_check_verdict(fact_check: str) -> Optional[str]:
+    """"PASS" / "FAIL" from the fact checker's last verdict line, None when it gave none"""
+    verdicts = _VERDICT.findall(fact_check)
+    return verdicts[-1].upper() if verdicts else None
+
+
+def fact_check_passed(fact_check: str) -> bool:
+    """True only when the fact checker's last verdict line says PASS"""
+    return fact_check_verdict(fact_check) == "PASS"
+
+
+@dataclass
+class ResearchEntry:
+    topic: str
+    research: str
+    fact_check: str
+    request: str           # provenance: the request that produced the research
+    model: str
+    created_at: float      # wall-clock time of the fact check
+    team_latency_s: float  # what a miss costs: the team run that produced this entry
+    hits: int = 0
+
+    def to_text(self, now: Optional[float] = None) -> str:
+        age_min = ((now or time.time()) - self.created_at) / 60
+        return (
+            f"[Research Agent] {self.research}\n\n"
+            f"[Fact Checker] {self.fact_check}\n\n"
+            f"(Cached research on '{self.topic}', fact-checked {age_min:.0f} min ago by {self.model} "
+            f"for: \"{self.request[:120]}\")"
+        )
+
+
+class ResearchCache:
+    def __init__(
+        self,
+        ttl_s: float = DEFAULT_TTL_S,
+        max_entries: int = 1000,
+        path: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.path = path
+        self.clock = clock
+        self._entries: "OrderedDict[str, ResearchEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "hits": 0, "stale": 0, "misses": 0, "stores": 0, "latency_saved_s": 0.0}
+        if path and os.path.exists(path):
+            self._load()
+
+    @classmethod
+    def from_env(cls) -> "ResearchCache":
+        """RESEARCH_CACHE_TTL_S (default one day) and RESEARCH_CACHE_PATH (default in-memory only)"""
+        ttl = os.environ.get("RESEARCH_CACHE_TTL_S")
+        try:
+            ttl_s = float(ttl) if ttl else DEFAULT_TTL_S
+        except ValueError:
+            print(f"⚠️  Ignoring RESEARCH_CACHE_TTL_S={ttl!r} (not a number), using {DEFAULT_TTL_S}s")
+            ttl_s = DEFAULT_TTL_S
+        return cls(ttl_s=ttl_s, path=os.environ.get("RESEARCH_CACHE_PATH") or None)
+
+    # -------------------------------------------------------------------------
+    # Lookup / store
+    # -------------------------------------------------------------------------
+
+    def lookup(self, request: str) -> Tuple[Optional[ResearchEntry], str]:
+        """(entry, "hit"), (entry, "stale"), (None, "miss"), or (None, "skip") when the request has no topic"""
+        key = topic_key(request)
+        if not key:
+            return None, "skip"
+        with self._lock:
+            self.stats["lookups"] += 1
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None, "miss"
+            if self.clock() - entry.created_at > self.ttl_s:
+                self.stats["stale"] += 1
+                return entry, "stale"
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            self.stats["hits"] += 1
+            self.stats["latency_saved_s"] += entry.team_latency_s
+            return entry, "hit"
+
+    def store(
+        self, request: str, research: str, fact_check: str, model: str, team_latency_s: float
+    ) -> Optional[ResearchEntry]:
+        """Store research for the request's topic (None, nothing stored, when it has no topic)"""
+        key = topic_key(request)
+        if not key:
+            return None
+        entry = ResearchEntry(
+            topic=key,
+            research=research,
+            fact_check=fact_check,
+            request=request,
+            model=model,
+            created_at=self.clock(),
+            team_latency_s=team_latency_s,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.stats["stores"] += 1
+            if self.path:
+                self._save()
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # -------------------------------------------------------------------------
+    # Persistence / reporting
+    # -------------------------------------------------------------------------
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                entries = [ResearchEntry(**data) for data in json.load(f)]
+        except (OSError, ValueError, TypeError) as e:
+            # JSONDecodeError is a ValueError; TypeError covers entries with missing or unknown fields
+            print(f"⚠️  Research cache {self.path} is unreadable ({type(e).__name__}), starting empty")
+            return
+        # The file is in LRU order, so the most recently used entries are kept
+        for entry in entries[-self.max_entries:] if self.max_entries else []:
+            self._entries[entry.topic] = entry
+
+    def _save(self):
+        # Write then rename so a concurrent reader never sees a partial file
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump([asdict(entry) for entry in self._entries.values()], f)
+        os.replace(tmp_path, self.path)
+
+    def summary(self) -> dict:
+        lookups = self.stats["lookups"] or 1
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "hit_rate": round(self.stats["hits"] / lookups, 4),
+            "latency_saved_s": round(self.stats["latency_saved_s"], 3),
+        }
@@ -0,0 +1,265 @@
+"""
+Parallel research stage for the research agents.
+
+A ReAct research agent searches one query per turn, so a comparative
+question ("US GDP and New York GDP") costs several serial LLM + Tavily round
+trips. `ResearchPipeline` does the searching up front:
+
+    1. one structured-output call splits the question into sub-queries
+    2. all sub-queries are searched concurrently on a bounded thread pool
+    3. results are deduplicated (normalised URL, then content fingerprint)
+       and ranked locally: search score, how many sub-queries found the page,
+       and word overlap with the original question
+    4. the top results become one consolidated context message
+
+The agent then answers from that context and only calls its search tool for
+anything still missing. Failed searches are reported in the context and do
+not fail the stage; if decomposition fails the question is searched as is.
+"""
+
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, convert_to_messages
+from pydantic import BaseModel, Field
+
+from prompt_assembly import invoke_structured
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or that the this to was what when where which who why with"
+    .split()
+)
+
+DECOMPOSE_PROMPT = """
+You plan web searches for a research assistant. Split the user's question into
+the smallest set of independent search queries that together answer it (one
+query per entity, metric or time period being compared). Return the question
+itself as the only query if it needs just one search. Never return more than
+{max_queries} queries.
+"""
+
+
+@lru_cache(maxsize=None)
+def default_planner_model():
+    """Splitting a question into searches is a small task - use the small model"""
+    from dotenv import load_dotenv
+    from backend_pool import chat_model
+
+    load_dotenv()
+    return chat_model(model="gpt-4o-mini", temperature=0)
+
+
+class SubQueries(BaseModel):
+    """Independent web search queries that together answer the question"""
+    queries: List[str] = Field(description="Self-contained search queries, one per fact to look up")
+
+
+@dataclass
+class SearchHit:
+    url: str
+    title: str
+    content: str
+    score: float
+    queries: List[str] = field(default_factory=list)
+    rank_score: float = 0.0
+
+
+@dataclass
+class ResearchContext:
+    question: str
+    queries: List[str]
+    hits: List[SearchHit]
+    errors: Dict[str, str]
+    raw_results: int
+    timings: Dict[str, float]
+
+    def to_text(self, max_chars_per_hit: int = 700) -> str:
+        lines = [f"Search results for: {self.question}", f"Sub-queries: {'; '.join(self.queries)}"]
+        for i, hit in enumerate(self.hits, 1):
+            content = " ".join(hit.content.split())[:max_chars_per_hit]
+            lines.append(f"[{i}] {hit.title} ({hit.url})\n{content}")
+        if not self.hits:
+            lines.append("No results.")
+        for query, error in self.errors.items():
+            lines.append(f"Search failed for {query!r}: {error}")
+        return "\n\n".join(lines)
+
+
+def _terms(text: str) -> set:
+    return {word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS}
+
+
+def normalize_url(url: str) -> str:
+    """Scheme, `www.`, query string, fragment and trailing slash do not make a page distinct"""
+    parts = urlsplit(url.strip().lower())
+    host = parts.netloc[4:] if parts.netloc.startswith("www.") else parts.netloc
+    return f"{host}{parts.path.rstrip('/')}"
+
+
+def user_question(messages: List[BaseMessage]) -> str:
+    """The latest request from the user - skipping agent replies that are relayed as named human messages"""
+    for message in reversed(convert_to_messages(messages)):
+        if message.type == "human" and not message.name:
+            return message.content
+    return ""
+
+
+def _fingerprint(content: str) -> str:
+    return " ".join(_WORD.findall(content.lower()))[:200]
+
+
+def _hit_key(url: str, title: str, fingerprint: str, position: str) -> str:
+    """Dedup key of a result: its URL, else its title or content, else its position in the results"""
+    if url.strip():
+        return normalize_url(url)
+    if title.strip():
+        return f"title:{title.strip().lower()}"
+    return f"content:{fingerprint}" if fingerprint else f"result:{position}"
+
+
+def merge_results(question: str, results_by_query: Dict[str, List[dict]], top_k: int) -> List[SearchHit]:
+    """Deduplicate the hits from every sub-query and rank them locally"""
+    by_key: Dict[str, SearchHit] = {}
+    by_fingerprint: Dict[str, SearchHit] = {}
+    for query, results in results_by_query.items():
+        for index, result in enumerate(results):
+            url = result.get("url") or ""
+            title = result.get("title") or ""
+            content = result.get("content") or ""
+            fingerprint = _fingerprint(content)
+            key = _hit_key(url, title, fingerprint, f"{query}#{index}")
+            hit = by_key.get(key) or (by_fingerprint.get(fingerprint) if fingerprint else None)
+            if hit is None:
+                hit = SearchHit(url=url, title=title or url, content=content, score=0.0)
+                by_key[key] = hit
+                if fingerprint:
+                    by_fingerprint[fingerprint] = hit
+            hit.score = max(hit.score, float(result.get("score") or 0.0))
+            if query not in hit.queries:
+                hit.queries.append(query)
+            if len(content) > len(hit.content):
+                hit.content = content
+
+    question_terms = _terms(question)
+    hits = list(by_key.values())
+    for hit in hits:
+        overlap = len(question_terms & _terms(f"{hit.title} {hit.content}")) / len(question_terms) if question_terms else 0.0
+        hit.rank_score = hit.score + 0.25 * (len(hit.queries) - 1) + 0.5 * overlap
+
+    # Best hits first, but make sure every sub-query keeps its best result in the cut
+    hits.sort(key=lambda hit: hit.rank_score, reverse=True)
+    selected: List[SearchHit] = []
+    for query in results_by_query:
+        best = next((hit for hit in hits if query in hit.queries), None)
+        if best is not None and best not in selected:
+            selected.append(best)
+    for hit in hits:
+        if len(selected) >= top_k:
+            break
+        if hit not in selected:
+            selected.append(hit)
+    return sorted(selected[:max(top_k, len(results_by_query))], key=lambda hit: hit.rank_score, reverse=True)
+
+
+class ResearchPipeline:
+    def __init__(
+        self,
+        search: Callable[[str], dict],
+        model_factory: Optional[Callable] = default_planner_model,
+        max_queries: int = 4,
+        max_workers: int = 4,
+        top_k: int = 6,
+    ):
+        self.search = search
+        self.model_factory = model_factory
+        self.max_queries = max_queries
+        self.top_k = top_k
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="research-search")
+        self.stats = {"runs": 0, "queries": 0, "raw_results": 0, "kept_results": 0, "search_errors": 0}
+
+    def decompose(self, question: str) -> List[str]:
+        if self.model_factory is None:
+            return [question]
+        try:
+            plan = invoke_structured(
+                self.model_factory(),
+                SubQueries,
+                [SystemMessage(content=DECOMPOSE_PROMPT.format(max_queries=self.max_queries)), HumanMessage(content=question)],
+                node="research_planner",
+            )
+        except Exception as e:
+            print(f"⚠️  Query decomposition failed ({type(e).__name__}), searching the question as is")
+            return [question]
+        queries = list(dict.fromkeys(q.strip() for q in plan.queries if q and q.strip()))
+        return queries[:self.max_queries] or [question]
+
+    def _search_one(self, query: str) -> List[dict]:
+        response = self.search(query)
+        if isinstance(response, dict):
+            if response.get("error"):
+                # TavilySearch reports transport / API failures as {"error": exception}
+                raise RuntimeError(str(response["error"]))
+            return response.get("results") or []
+        if isinstance(response, list):
+            return response
+        raise ValueError(f"unexpected search response: {str(response)[:200]}")
+
+    def run(self, question: str) -> ResearchContext:
+        start = time.perf_counter()
+        queries = self.decompose(question)
+        planned = time.perf_counter()
+
+        futures = {query: self._pool.submit(self._search_one, query) for query in queries}
+        results_by_query: Dict[str, List[dict]] = {}
+        errors: Dict[str, str] = {}
+        for query, future in futures.items():
+            try:
+                results_by_query[query] = future.result()
+            except Exception as e:
+                errors[query] = f"{type(e).__name__}: {str(e)[:200]}"
+        searched = time.perf_counter()
+
+        hits = merge_results(question, results_by_query, self.top_k)
+        raw = sum(len(results) for results in results_by_query.values())
+        self.stats["runs"] += 1
+        self.stats["queries"] += len(queries)
+        self.stats["raw_results"] += raw
+        self.stats["kept_results"] += len(hits)
+        self.stats["search_errors"] += len(errors)
+        return ResearchContext(
+            question=question,
+            queries=queries,
+            hits=hits,
+            errors=errors,
+            raw_results=raw,
+            timings={
+                "decompose_s": planned - start,
+                "search_s": searched - planned,
+                "merge_s": time.perf_counter() - searched,
+            },
+        )
+
+    def context_message(self, question: str) -> HumanMessage:
+        """Run the stage and wrap the consolidated results for the agent"""
+        context = self.run(question)
+        print(
+            f"🔎 Research pipeline: {len(context.queries)} sub-queries, "
+            f"{context.raw_results} results → {len(context.hits)} kept "
+            f"({sum(context.timings.values()) * 1000:.0f} ms)"
+        )
+        return HumanMessage(
+            content=context.to_text() + "\n\nAnswer from these results; search again only for facts still missing.",
+            name="research_pipeline",
+        )
+
+    def summary(self) -> dict:
+        return dict(self.stats)
+
+    def close(self):
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,200 @@
+"""
+Micro-batching of concurrent routing decisions.
+
+When many conversations run at once, each supervisor hop makes its own small
+structured-output call and per-request overhead dominates. `RoutingBatcher`
+collects pending routing requests for a short window, sends them to a backend
+as one batch and hands each waiting node its own decision.
+
+    batcher = RoutingBatcher(StructuredBatchBackend(model), max_batch_size=16, max_wait_ms=5)
+    decision = batcher.submit(RoutingDecision, prompt_messages)   # blocks this node only
+
+Backends are called as `backend(schema, [messages, ...])` for requests that
+share one schema and return one parsed decision (or an exception) per item,
+in order. Requests the backend leaves unanswered fail with
+`BatchMismatchError`, and `submit` gives up after `timeout` seconds, so a
+misbehaving backend never leaves a node waiting forever.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from pydantic import Field, create_model
+
+from prompt_assembly import assemble_prompt, cache_stats, format_transcript
+
+# How long a node waits for its decision before giving up
+DEFAULT_SUBMIT_TIMEOUT_S = 120.0
+
+
+class BatchMismatchError(RuntimeError):
+    """The backend returned fewer decisions than it was sent requests"""
+
+
+# =============================================================================
+# BACKENDS
+# =============================================================================
+
+BATCH_INSTRUCTIONS = """
+You will receive several independent routing requests, each under a "### Request <n>" header.
+Each request has its own instructions and conversation. Decide each one independently and
+return exactly one decision per request, tagged with the request's number.
+"""
+
+
+class StructuredBatchBackend:
+    """Sends a whole batch as one multi-item structured-output call"""
+
+    def __init__(self, model):
+        self.model = model
+        self._batch_schemas = {}
+
+    def _batch_schema(self, schema):
+        if schema not in self._batch_schemas:
+            item = create_model(
+                f"Batched{schema.__name__}",
+                __base__=schema,
+                index=(int, Field(description="Number of the request this decision answers")),
+            )
+            self._batch_schemas[schema] = create_model(
+                f"{schema.__name__}Batch",
+                decisions=(List[item], ...),
+            )
+        return self._batch_schemas[schema]
+
+    def __call__(self, schema, batch: Sequence[List]) -> list:
+        if len(batch) == 1:
+            result = self.model.with_structured_output(schema, include_raw=True).invoke(batch[0])
+            cache_stats.record(result["raw"], "routing_batch")
+            return [result["parsing_error"] or result["parsed"]]
+
+        sections = [
+            f"### Request {index}\n{format_transcript(messages)}"
+            for index, messages in enumerate(batch)
+        ]
+        result = self.model.with_structured_output(self._batch_schema(schema), include_raw=True).invoke(
+            assemble_prompt(BATCH_INSTRUCTIONS, "\n\n".join(sections))
+        )
+        cache_stats.record(result["raw"], "routing_batch")
+        if result.get("parsing_error"):
+            return [result["parsing_error"]] * len(batch)
+
+        by_index = {item.index: item for item in result["parsed"].decisions}
+        decisions = []
+        for index, messages in enumerate(batch):
+            item = by_index.get(index)
+            if item is None:
+                # The model skipped this request - answer it on its own
+                decisions.extend(self(schema, [messages]))
+            else:
+                decisions.append(schema(**item.model_dump(exclude={"index"})))
+        return decisions
+
+
+class ClassifierBatchBackend:
+    """Routes a batch through a local classifier (`predict(texts) -> list[dict]`)"""
+
+    def __init__(self, predict: Callable[[List[str]], List[dict]]):
+        self.predict = predict
+
+    def __call__(self, schema, batch: Sequence[List]) -> list:
+        texts = [format_transcript(messages) for messages in batch]
+        return [schema(**fields) for fields in self.predict(texts)]
+
+
+# =============================================================================
+# DISPATCHER
+# =============================================================================
+
+class RoutingBatcher:
+    """Collects routing requests for up to `max_wait_ms` and dispatches them in batches"""
+
+    def __init__(self, backend: Callable, max_batch_size: int = 16, max_wait_ms: float = 5.0, max_in_flight: int = 4):
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        # Batches already sent keep running while the next one is collected
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="routing-batch")
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "batches": 0, "max_batch": 0}
+        self._queue: "queue.Queue[Optional[Tuple[type, List, Future]]]" = queue.Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._loop, name="routing-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, schema, messages: List, timeout: Optional[float] = DEFAULT_SUBMIT_TIMEOUT_S):
+        """Queue one routing request and wait for its decision"""
+        future: Future = Future()
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("RoutingBatcher is closed")
+            self._queue.put((schema, messages, future))
+        return future.result(timeout)
+
+    def close(self):
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+
+    def _loop(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            pending = [first]
+            deadline = time.monotonic() + self.max_wait_ms / 1000
+            while len(pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                pending.append(item)
+            self._in_flight.acquire()
+            self._executor.submit(self._dispatch, pending)
+
+    def _dispatch(self, pending: list):
+        # A batch call can only carry one output schema
+        groups = {}
+        for schema, messages, future in pending:
+            groups.setdefault(schema, []).append((messages, future))
+
+        try:
+            for schema, items in groups.items():
+                with self._stats_lock:
+                    self.stats["requests"] += len(items)
+                    self.stats["batches"] += 1
+                    self.stats["max_batch"] = max(self.stats["max_batch"], len(items))
+                try:
+                    decisions = list(self.backend(schema, [messages for messages, _ in items]))
+                except Exception as e:
+                    decisions = [e] * len(items)
+                if len(decisions) < len(items):
+                    missing = BatchMismatchError(f"backend returned {len(decisions)} decisions for {len(items)} requests")
+                    decisions += [missing] * (len(items) - len(decisions))
+                for (_, future), decision in zip(items, decisions):
+                    if isinstance(decision, Exception):
+                        future.set_exception(decision)
+                    else:
+                        future.set_result(decision)
+        except Exception as e:
+            # Never leave a node waiting on a future nobody will resolve
+            for _, _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._in_flight.release()
@@ -0,0 +1,261 @@
+"""
+Multi-process sharded executor for the demo graphs.
+
+With fast or cached model backends the Python side (state reduction,
+pydantic validation, message conversion, printing) becomes the bottleneck,
+and one process only gets one core for it. `ShardedExecutor` runs
+conversations across N worker processes:
+
+    - each worker builds its graph once, on start-up
+    - requests are routed by thread id (crc32 % N), so a conversation always
+      lands on the same worker, which keeps its recent history in memory
+    - every worker has a bounded input queue; `submit` blocks when the shard
+      is full (back-pressure instead of unbounded memory growth)
+    - results come back over one pipe per worker and are aggregated in the
+      parent, so a worker that dies mid-write can only break its own channel
+    - a worker that fails to build its graph fails the constructor, and a
+      worker that dies mid-run fails its shard's pending futures
+
+    with ShardedExecutor("hierarchical", workers=4) as executor:
+        future = executor.submit("thread-1", [{"role": "user", "content": "..."}])
+        messages = future.result()
+"""
+
+import contextlib
+import multiprocessing as mp
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+from typing import Dict, List, Optional, Tuple
+
+
+def _recent_history(messages: list, history_window: int) -> list:
+    """The last `history_window` messages, never starting on an orphaned tool result"""
+    from message_store import window_start
+
+    return messages[window_start(messages, history_window):]
+
+
+def _worker_main(index: int, graph_name: str, inbox, results, history_window: int, quiet: bool):
+    from langchain_core.messages import messages_to_dict
+
+    from load_test import load_graph
+
+    with contextlib.ExitStack() as stack:
+        if quiet:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+
+        try:
+            graph = load_graph(graph_name)
+        except Exception as e:
+            results.send(("startup_error", index, repr(e), None))
+            return
+        histories: Dict[str, list] = {}
+        results.send(("ready", index, None, None))
+
+        while True:
+            item = inbox.get()
+            if item is None:
+                break
+            request_id, thread_id, messages = item
+            start, cpu_start = time.perf_counter(), time.process_time()
+            try:
+                history = histories.get(thread_id, [])
+                result = graph.invoke({"messages": history + messages}, {"recursion_limit": 50})
+                histories[thread_id] = _recent_history(result["messages"], history_window)
+                payload = messages_to_dict(result["messages"][len(history):])
+                status = "ok"
+            except Exception as e:
+                payload, status = repr(e), "error"
+            metrics = {
+                "worker": index,
+                "latency_s": time.perf_counter() - start,
+                "cpu_s": time.process_time() - cpu_start,
+            }
+            results.send((status, request_id, payload, metrics))
+
+
+class ShardedExecutor:
+    def __init__(
+        self,
+        graph_name: str,
+        workers: Optional[int] = None,
+        queue_size: int = 64,
+        history_window: int = 20,
+        quiet: bool = True,
+        startup_timeout_s: float = 120.0,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        context = mp.get_context("spawn")
+        self._inboxes = [context.Queue(maxsize=queue_size) for _ in range(self.workers)]
+        pipes = [context.Pipe(duplex=False) for _ in range(self.workers)]
+        self._readers = [reader for reader, _ in pipes]
+        self._processes = [
+            context.Process(
+                target=_worker_main,
+                args=(index, graph_name, inbox, writer, history_window, quiet),
+                daemon=True,
+            )
+            for index, (inbox, (_, writer)) in enumerate(zip(self._inboxes, pipes))
+        ]
+        self._stop_reader, self._stop_writer = context.Pipe(duplex=False)
+        # request id -> (future, shard), so a dead shard's requests can be failed
+        self._futures: Dict[int, Tuple[Future, int]] = {}
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._ready = threading.Semaphore(0)
+        self._started: set = set()
+        self._startup_errors: Dict[int, str] = {}
+        self._dead: set = set()
+        self._closing = False
+        self.metrics: Dict[int, dict] = {
+            index: {"requests": 0, "errors": 0, "latency_s": 0.0, "cpu_s": 0.0} for index in range(self.workers)
+        }
+        self.latencies: List[float] = []
+
+        for process in self._processes:
+            process.start()
+        # Drop the parent's copies of the write ends so a dead worker shows up as EOF
+        for _, writer in pipes:
+            writer.close()
+        self._collector = threading.Thread(target=self._collect, name="sharded-collector", daemon=True)
+        self._collector.start()
+        # Wait until every worker has built its graph so start-up is not measured as request latency
+        deadline = time.monotonic() + startup_timeout_s
+        for _ in self._processes:
+            if not self._ready.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                self._abort()
+                raise TimeoutError(f"sharded workers not ready after {startup_timeout_s:.0f}s")
+        if self._startup_errors:
+            self._abort()
+            raise RuntimeError(f"sharded workers failed to start: {self._startup_errors}")
+
+    def shard_for(self, thread_id: str) -> int:
+        return zlib.crc32(thread_id.encode()) % self.workers
+
+    def submit(self, thread_id: str, messages: list, timeout: Optional[float] = None) -> Future:
+        """Queue a turn of `thread_id`; blocks while that shard's queue is full"""
+        shard = self.shard_for(thread_id)
+        future: Future = Future()
+        with self._lock:
+            if shard in self._dead:
+                raise RuntimeError(f"sharded worker {shard} died")
+            request_id = self._next_id
+            self._next_id += 1
+            self._futures[request_id] = (future, shard)
+        try:
+            self._inboxes[shard].put((request_id, thread_id, messages), timeout=timeout)
+        except BaseException:
+            with self._lock:
+                self._futures.pop(request_id, None)
+            raise
+        return future
+
+    def _collect(self):
+        readers = {reader: index for index, reader in enumerate(self._readers)}
+        sentinels = {process.sentinel: index for index, process in enumerate(self._processes)}
+        while True:
+            for ready in wait(list(readers) + list(sentinels) + [self._stop_reader]):
+                if ready is self._stop_reader:
+                    return
+                if ready in readers:
+                    if not self._receive(ready):
+                        del readers[ready]
+                elif ready in sentinels:
+                    index = sentinels.pop(ready)
+                    # Results the worker sent before exiting are still in its pipe
+                    reader = self._readers[index]
+                    while reader in readers and reader.poll():
+                        if not self._receive(reader):
+                            del readers[reader]
+                    readers.pop(reader, None)
+                    self._worker_exited(index)
+
+    def _receive(self, reader) -> bool:
+        """Handle one message from a worker pipe; returns False at end of stream"""
+        from langchain_core.messages import messages_from_dict
+
+        try:
+            status, request_id, payload, metrics = reader.recv()
+        except (EOFError, OSError):
+            return False
+        if status in ("ready", "startup_error"):
+            self._started.add(request_id)
+            if status == "startup_error":
+                self._startup_errors[request_id] = payload
+            self._ready.release()
+            return True
+
+        worker = self.metrics[metrics["worker"]]
+        worker["requests"] += 1
+        worker["latency_s"] += metrics["latency_s"]
+        worker["cpu_s"] += metrics["cpu_s"]
+        self.latencies.append(metrics["latency_s"])
+
+        with self._lock:
+            future, _ = self._futures.pop(request_id)
+        if status == "ok":
+            future.set_result(messages_from_dict(payload))
+        else:
+            worker["errors"] += 1
+            future.set_exception(RuntimeError(payload))
+        return True
+
+    def _worker_exited(self, index: int):
+        """Fail the pending futures of a worker that exited without being asked to"""
+        exitcode = self._processes[index].exitcode
+        if index not in self._started:
+            self._started.add(index)
+            self._startup_errors[index] = f"exited during start-up (exit code {exitcode})"
+            self._ready.release()
+        if self._closing:
+            return
+        with self._lock:
+            self._dead.add(index)
+            lost = [(rid, future) for rid, (future, shard) in self._futures.items() if shard == index]
+            for rid, _ in lost:
+                del self._futures[rid]
+        for _, future in lost:
+            self.metrics[index]["errors"] += 1
+            future.set_exception(RuntimeError(f"sharded worker {index} died (exit code {exitcode})"))
+
+    def summary(self) -> dict:
+        ordered = sorted(self.latencies)
+        return {
+            "workers": self.workers,
+            "requests": len(ordered),
+            "p50_s": ordered[len(ordered) // 2] if ordered else None,
+            "p95_s": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] if ordered else None,
+            "per_worker": self.metrics,
+        }
+
+    def _stop_collector(self):
+        self._stop_writer.send(None)
+        self._collector.join()
+
+    def _abort(self):
+        """Tear down after a failed start-up"""
+        self._closing = True
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        self._stop_collector()
+
+    def close(self):
+        self._closing = True
+        for inbox, process in zip(self._inboxes, self._processes):
+            if process.is_alive():
+                inbox.put(None)
+        for process in self._processes:
+            process.join()
+        self._stop_collector()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
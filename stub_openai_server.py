@@ -0,0 +1,213 @@
+"""
+Minimal OpenAI-compatible chat completions server for benchmarks.
+
+Every request gets the same canned reply after an optional injected delay:
+`latency`, plus `prompt_token_latency` per prompt token (prefill) and
+`token_latency` per output token (decoding). `error_rate` injects HTTP 500s,
+and with `api_key` set, requests without that bearer token get a 401.
+Replies are streamed as server-sent events when the request asks for
+`stream`, and the reply can be a callable that picks the content from the
+request body. The default reply is a JSON object that satisfies every
+routing schema in this repo (`__end__` everywhere, or its number for lean
+routing prompts) and contains FINAL ANSWER, so any of the demo graphs
+terminates after a single pass.
+
+    with StubOpenAIServer(latency=0.05) as server:
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        ...
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional, Union
+
+DEFAULT_CONTENT = json.dumps({
+    "next_agent": "__end__",
+    "next_team": "__end__",
+    "reasoning": "stub",
+    "confidence": 1.0,
+    "quality_score": 10,
+    "content": "FINAL ANSWER: stub response",
+})
+
+_END_OPTION = re.compile(r"^(\d+)\. __end__$", re.MULTILINE)
+
+
+def default_reply(request: dict) -> str:
+    """DEFAULT_CONTENT, or the number of the `__end__` option for lean routing prompts"""
+    messages = request.get("messages") or [{}]
+    content = messages[-1].get("content")
+    match = _END_OPTION.search(content) if isinstance(content, str) else None
+    return match.group(1) if match else DEFAULT_CONTENT
+
+
+class StubOpenAIServer:
+    """OpenAI-compatible stub served from a background thread"""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        content: Union[str, Callable[[dict], str]] = default_reply,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        token_latency: float = 0.0,
+        prompt_token_latency: float = 0.0,
+        error_rate: float = 0.0,
+        api_key: Optional[str] = None,
+    ):
+        self.latency = latency
+        self.api_key = api_key
+        self.error_rate = error_rate
+        self.token_latency = token_latency
+        self.prompt_token_latency = prompt_token_latency
+        self.content = content
+        self.requests = 0
+        self.completion_tokens = 0
+        self.prompt_tokens = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubOpenAIServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status: int, payload: dict):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _authorized(self) -> bool:
+                if server.api_key is None or self.headers.get("Authorization") == f"Bearer {server.api_key}":
+                    return True
+                self._send_json(401, {"error": {"message": "invalid api key", "type": "invalid_request_error"}})
+                return False
+
+            def do_GET(self):
+                if not self._authorized():
+                    return
+                if self.path.rstrip("/").endswith("/models"):
+                    self._send_json(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+                else:
+                    self._send_json(404, {"error": {"message": "not found"}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not self._authorized():
+                    return
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+
+                if server.error_rate and random.random() < server.error_rate:
+                    self._send_json(500, {"error": {"message": "injected failure", "type": "server_error"}})
+                    return
+
+                content = server.content(request) if callable(server.content) else server.content
+                # Rough chars-per-token estimate; honours max_tokens like the real API
+                completion_tokens = max(1, round(len(content) / 4))
+                limit = request.get("max_completion_tokens") or request.get("max_tokens")
+                if limit and completion_tokens > limit:
+                    content, completion_tokens = content[:limit * 4], limit
+                # Messages plus tool schemas, same chars-per-token estimate
+                prompt_tokens = max(1, round(len(json.dumps([request.get("messages"), request.get("tools")])) / 4))
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                    "prompt_tokens_details": {"cached_tokens": 0},
+                }
+                with server._lock:
+                    server.requests += 1
+                    server.prompt_tokens += prompt_tokens
+                    server.completion_tokens += completion_tokens
+                if request.get("stream"):
+                    self._stream(request, content, usage)
+                    return
+                delay = server.latency + server.prompt_token_latency * prompt_tokens + server.token_latency * completion_tokens
+                if delay:
+                    time.sleep(delay)
+
+                choice = {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+                if request.get("logprobs"):
+                    token = {"token": content[:4], "logprob": 0.0, "bytes": None}
+                    choice["logprobs"] = {"content": [{**token, "top_logprobs": [token]}]}
+
+                self._send_json(200, {
+                    "id": f"chatcmpl-stub-{server.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "stub"),
+                    "choices": [choice],
+                    "usage": usage,
+                })
+
+            def _stream(self, request: dict, content: str, usage: dict):
+                """Server-sent events, one ~token-sized piece every `token_latency` seconds"""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                base = {
+                    "id": f"chatcmpl-stub-{server.requests}",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": request.get("model", "stub"),
+                }
+
+                def send(payload):
+                    self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode())
+                    self.wfile.flush()
+
+                first_token = server.latency + server.prompt_token_latency * usage["prompt_tokens"]
+                if first_token:
+                    time.sleep(first_token)
+                for start in range(0, len(content), 4):
+                    if server.token_latency:
+                        time.sleep(server.token_latency)
+                    delta = {"content": content[start:start + 4]}
+                    if start == 0:
+                        delta["role"] = "assistant"
+                    send({**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+                send({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+                if (request.get("stream_options") or {}).get("include_usage"):
+                    send({**base, "choices": [], "usage": usage})
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+        return Handler
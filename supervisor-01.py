@@ -1,24 +1,14 @@
 import getpass
 import os
+from functools import lru_cache
 from typing import Annotated
-from langchain_tavily import TavilySearch
-from langgraph.prebuilt import create_react_agent, InjectedState
 from langchain_core.messages import convert_to_messages
 from langchain_core.tools import tool, InjectedToolCallId
 from langgraph.graph import StateGraph, START, MessagesState, END
 from langgraph.types import Command, Send
-from langchain.chat_models import init_chat_model
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+from research_pipeline import ResearchPipeline, user_question
 
-def _set_if_undefined(var: str):
-    if not os.environ.get(var):
-        os.environ[var] = getpass.getpass(f"Please provide your {var}")
-
-_set_if_undefined("OPENAI_API_KEY")
-_set_if_undefined("TAVILY_API_KEY")
 
 def _set_if_undefined(var: str):
     if not os.environ.get(var):
@@ -77,6 +67,8 @@ def divide(a: float, b: float):
 
 
 def create_task_description_handoff_tool(*, agent_name: str, description: str | None = None):
+    from langgraph.prebuilt import InjectedState
+
     name = f"transfer_to_{agent_name}"
     description = description or f"Ask {agent_name} for help."
 
@@ -98,18 +90,36 @@ def create_task_description_handoff_tool(*, agent_name: str, description: str |
     return handoff_tool
 
 
-def main():
-    # Set up API keys
+@lru_cache(maxsize=None)
+def get_web_search():
+    from langchain_tavily import TavilySearch
+
+    return TavilySearch(max_results=3)
+
+
+# Sub-queries are searched concurrently before the research agent runs
+@lru_cache(maxsize=None)
+def get_research_pipeline():
+    return ResearchPipeline(search=lambda query: get_web_search().invoke({"query": query}))
+
+
+@lru_cache(maxsize=None)
+def get_supervisor_graph():
+    """Build the supervisor graph once, on first use"""
+    from dotenv import load_dotenv
+    from langgraph.prebuilt import create_react_agent
+
+    from backend_pool import chat_model
+
+    # Load environment variables from .env file and set up API keys
+    load_dotenv()
     _set_if_undefined("OPENAI_API_KEY")
     _set_if_undefined("TAVILY_API_KEY")
 
-    # Create web search tool
-    web_search = TavilySearch(max_results=3)
-
     # Create research agent
-    research_agent = create_react_agent(
-        model="openai:gpt-4o",
-        tools=[web_search],
+    research_react_agent = create_react_agent(
+        model=chat_model(model="gpt-4o"),
+        tools=[get_web_search()],
         prompt=(
             "You are a research agent.\n\n"
             "INSTRUCTIONS:\n"
@@ -120,9 +130,17 @@ def main():
         name="research_agent",
     )
 
+    def research_agent(state: MessagesState):
+        """Search every sub-query up front, then let the agent answer from the merged results"""
+        context = get_research_pipeline().context_message(user_question(state["messages"]))
+        result = research_react_agent.invoke({**state, "messages": [*state["messages"], context]})
+        # Hand back everything except the context, which only this call needs
+        given = len(state["messages"])
+        return {"messages": result["messages"][:given] + result["messages"][given + 1:]}
+
     # Create math agent
     math_agent = create_react_agent(
-        model="openai:gpt-4o",
+        model=chat_model(model="gpt-4o"),
         tools=[add, multiply, divide],
         prompt=(
             "You are a math agent.\n\n"
@@ -147,7 +165,7 @@ def main():
 
     # Create supervisor agent
     supervisor_agent_with_description = create_react_agent(
-        model="openai:gpt-4o-mini",
+        model=chat_model(model="gpt-4o-mini"),
         tools=[
             assign_to_research_agent_with_description,
             assign_to_math_agent_with_description,
@@ -163,7 +181,7 @@ def main():
     )
 
     # Create supervisor graph
-    supervisor_with_description = (
+    return (
         StateGraph(MessagesState)
         .add_node(
             supervisor_agent_with_description, destinations=("research_agent", "math_agent")
@@ -176,6 +194,10 @@ def main():
         .compile()
     )
 
+
+def main():
+    supervisor_with_description = get_supervisor_graph()
+
     # Run the multi-agent system
     print("Running multi-agent supervisor system...")
     for chunk in supervisor_with_description.stream(
@@ -190,6 +212,7 @@ def main():
         subgraphs=True,
     ):
         pretty_print_messages(chunk, last_message=True)
+    print(f"🔎 Research pipeline: {get_research_pipeline().summary()}")
 
 
 if __name__ == "__main__":
@@ -1,24 +1,49 @@
 import os
+from functools import lru_cache
 from typing import Annotated
-from langchain_openai import ChatOpenAI
-from langgraph.prebuilt import InjectedState, create_react_agent
+from langgraph.prebuilt import InjectedState
 from langchain_core.messages import HumanMessage
-from dotenv import load_dotenv
-import os
-import json
-load_dotenv()
 
-# Initialize the model
-model = ChatOpenAI(
-    model="gpt-4o",
-    temperature=0.1,
-    # api_key=os.getenv("OPENAI_API_KEY")  # Make sure to set this
-)
+from prompt_assembly import assemble_prompt, cache_stats, invoke_tracked
+from tool_retrieval import ToolRetrievalModel
+
+# Specialists bound per request; requests that match no tool get the full set
+TOOL_TOP_K = 2
+
+# Initialize the model on first use so importing this module stays cheap
+@lru_cache(maxsize=None)
+def get_model():
+    from dotenv import load_dotenv
+    from backend_pool import chat_model
+
+    load_dotenv()
+    return chat_model(
+        model="gpt-4o",
+        temperature=0.1,
+        # api_key=os.getenv("OPENAI_API_KEY")  # Make sure to set this
+    )
+
+# Static specialist prompts - the user's request is appended as the last message
+MATH_PROMPT = """
+You are a math specialist. Solve the mathematical problem in the user's message step by step.
+Provide a clear, step-by-step solution.
+"""
+
+WRITING_PROMPT = """
+You are a writing specialist. Help with the writing task in the user's message.
+Provide helpful writing assistance, grammar corrections, or creative content.
+"""
+
+RESEARCH_PROMPT = """
+You are a research specialist. Provide comprehensive information about the topic in the user's message.
+Give factual, well-organized information with key points and context.
+"""
 
 # Agent 1: Math Specialist
 def math_agent(state: Annotated[dict, InjectedState]) -> str:
     """
-    Specialized agent for mathematical calculations and problems.
+    Specialized agent for mathematical calculations and problems: arithmetic,
+    algebra, equations, calculus (derivatives, integrals) and statistics.
     """
 
     print(state)
@@ -31,21 +56,15 @@ def math_agent(state: Annotated[dict, InjectedState]) -> str:
     else:
         user_input = "No input provided"
     
-    # Create a specialized prompt for math problems
-    math_prompt = f"""
-    You are a math specialist. Solve this mathematical problem step by step:
-    {user_input}
-    
-    Provide a clear, step-by-step solution.
-    """
-    
-    response = model.invoke([HumanMessage(content=math_prompt)])
+    # Static specialist instructions first, the user's problem last
+    response = invoke_tracked(get_model(), assemble_prompt(MATH_PROMPT, user_input), node="math_agent")
     return f"Math Agent: {response.content}"
 
 # Agent 2: Writing Specialist
 def writing_agent(state: Annotated[dict, InjectedState]) -> str:
     """
-    Specialized agent for writing tasks, editing, and language help.
+    Specialized agent for writing tasks, editing, and language help: proofreading,
+    grammar and spelling fixes, rewriting, summaries, essays, stories and emails.
     """
     print("✍️ Writing Agent activated!")
     
@@ -56,21 +75,14 @@ def writing_agent(state: Annotated[dict, InjectedState]) -> str:
     else:
         user_input = "No input provided"
     
-    # Create a specialized prompt for writing tasks
-    writing_prompt = f"""
-    You are a writing specialist. Help with this writing task:
-    {user_input}
-    
-    Provide helpful writing assistance, grammar corrections, or creative content.
-    """
-    
-    response = model.invoke([HumanMessage(content=writing_prompt)])
+    response = invoke_tracked(get_model(), assemble_prompt(WRITING_PROMPT, user_input), node="writing_agent")
     return f"Writing Agent: {response.content}"
 
 # Agent 3: General Research Assistant
 def research_agent(state: Annotated[dict, InjectedState]) -> str:
     """
-    Specialized agent for research, fact-checking, and general information.
+    Specialized agent for research, fact-checking, and general information:
+    history, science, geography, current events and explanations of topics.
     """
     print("🔍 Research Agent activated!")
     
@@ -81,15 +93,7 @@ def research_agent(state: Annotated[dict, InjectedState]) -> str:
     else:
         user_input = "No input provided"
     
-    # Create a specialized prompt for research tasks
-    research_prompt = f"""
-    You are a research specialist. Provide comprehensive information about:
-    {user_input}
-    
-    Give factual, well-organized information with key points and context.
-    """
-    
-    response = model.invoke([HumanMessage(content=research_prompt)])
+    response = invoke_tracked(get_model(), assemble_prompt(RESEARCH_PROMPT, user_input), node="research_agent")
     return f"Research Agent: {response.content}"
 
 # Define the tools (our specialized agents)
@@ -97,7 +101,27 @@ tools = [math_agent, writing_agent, research_agent]
 
 # Create the supervisor using the prebuilt ReAct agent
 # The supervisor will decide which agent to call based on the user's request
-supervisor = create_react_agent(model, tools)
+@lru_cache(maxsize=None)
+def get_tool_retrieval_model():
+    return ToolRetrievalModel(get_model(), k=TOOL_TOP_K)
+
+@lru_cache(maxsize=None)
+def get_supervisor():
+    from langgraph.prebuilt import create_react_agent
+
+    # Only the top-k relevant specialists are bound on each call
+    return create_react_agent(get_tool_retrieval_model(), tools)
+
+# The old module-level names still work, but are only built when first accessed
+_LAZY_ATTRIBUTES = {
+    "model": get_model,
+    "supervisor": get_supervisor,
+}
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def demo_supervisor():
     """
@@ -122,11 +146,13 @@ def demo_supervisor():
         
         # Let the supervisor decide and execute
         try:
-            result = supervisor.invoke(inputs)
+            result = get_supervisor().invoke(inputs)
             
             # Extract the final response
             final_message = result["messages"][-1].content
             print(f"Supervisor Decision & Result:\n{final_message}")
+            print(f"📊 Prompt cache: {cache_stats.summary()}")
+            print(f"📊 Tool retrieval: {get_tool_retrieval_model().summary()}")
             
         except Exception as e:
             print(f"Error: {e}")
@@ -137,6 +163,9 @@ def demo_supervisor():
 
 
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+
     # Check if API key is available
     if not os.getenv("OPENAI_API_KEY"):
         print("⚠️  Warning: OPENAI_API_KEY not found in environment variables!")
@@ -1,14 +1,8 @@
-from langchain_openai import ChatOpenAI
-from langgraph.prebuilt import create_react_agent
-from langgraph_supervisor import create_supervisor
-from dotenv import load_dotenv
+from functools import lru_cache
 from langsmith import traceable
 import os
 import json
 
-# Load environment variables (from .env file)
-load_dotenv()
-
 # Define your booking functions
 def book_hotel(hotel_name: str):
     """Book a hotel"""
@@ -19,35 +13,52 @@ def book_flight(from_airport: str, to_airport: str):
     return f"Successfully booked a flight from {from_airport} to {to_airport}."
 
 
-# Create individual agent assistants
-flight_assistant = create_react_agent(
-    model="openai:gpt-4o",
-    tools=[book_flight],
-    prompt="You are a flight booking assistant",
-    name="flight_assistant"
-)
+# Agents and the supervisor are built on first use, not at import
+@lru_cache(maxsize=None)
+def get_supervisor():
+    from dotenv import load_dotenv
+    from backend_pool import chat_model
+    from langgraph.prebuilt import create_react_agent
+    from langgraph_supervisor import create_supervisor
+
+    # Load environment variables (from .env file)
+    load_dotenv()
+
+    # Create individual agent assistants
+    flight_assistant = create_react_agent(
+        model=chat_model(model="gpt-4o"),
+        tools=[book_flight],
+        prompt="You are a flight booking assistant",
+        name="flight_assistant"
+    )
+
+    hotel_assistant = create_react_agent(
+        model=chat_model(model="gpt-4o"),
+        tools=[book_hotel],
+        prompt="You are a hotel booking assistant",
+        name="hotel_assistant"
+    )
 
-hotel_assistant = create_react_agent(
-    model="openai:gpt-4o",
-    tools=[book_hotel],
-    prompt="You are a hotel booking assistant",
-    name="hotel_assistant"
-)
+    # Create the supervisor agent
+    return create_supervisor(
+        agents=[flight_assistant, hotel_assistant],
+        model=chat_model(model="gpt-4o"),
+        prompt=(
+            "You manage a hotel booking assistant, a flight booking assistant, "
+           )
+    ).compile()
 
-# Create the supervisor agent
-supervisor = create_supervisor(
-    agents=[flight_assistant, hotel_assistant],
-    model=ChatOpenAI(model="gpt-4o"),
-    prompt=(
-        "You manage a hotel booking assistant, a flight booking assistant, "
-       )
-).compile()
+# The old module-level name still works, but is only built when first accessed
+def __getattr__(name):
+    if name == "supervisor":
+        return get_supervisor()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Trace the whole execution using LangSmith
 @traceable(name="Booking Flow Execution")
 def run_booking_flow():
     results = []
-    for chunk in supervisor.stream(
+    for chunk in get_supervisor().stream(
         {
             "messages": [
                 {
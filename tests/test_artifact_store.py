@@ -0,0 +1,83 @@
+import pytest
+
+from artifact_store import ArtifactStore, _figure_title, collect_dataframes
+
+
+def test_text_round_trips_through_its_reference(tmp_path):
+    store = ArtifactStore(root=str(tmp_path))
+    text = "\n".join(f"row {i}" for i in range(50))
+    ref = store.put_text(text)
+    assert store.read(ref).decode() == text
+    assert ref.kind == "stdout" and ref.size == len(text)
+    assert ref.path in ref.to_text() and ref.digest[:12] in ref.to_text()
+    assert "more lines" in ref.summary
+
+
+def test_identical_payloads_are_stored_once(tmp_path):
+    store = ArtifactStore(root=str(tmp_path))
+    first = store.put_bytes(b"payload", "figure", ".png", "chart")
+    second = store.put_bytes(b"payload", "figure", ".png", "chart")
+    assert first.path == second.path
+    assert store.stats["artifacts"] == 1 and store.stats["deduplicated"] == 1
+
+
+def test_only_text_removed_from_the_output_counts_as_saved(tmp_path):
+    store = ArtifactStore(root=str(tmp_path))
+    figure = store.put_bytes(b"x" * 4000, "figure", ".png", "chart")
+    assert store.stats["text_chars_offloaded"] == 0
+    assert store.summary()["prompt_tokens_saved_per_hop"] == 0
+
+    text = "y" * 4000
+    ref = store.put_text(text)
+    assert store.stats["text_chars_offloaded"] == len(text)
+    references = len(figure.to_text()) + len(ref.to_text())
+    assert store.stats["reference_chars"] == references
+    assert store.summary()["prompt_tokens_saved_per_hop"] == (len(text) - references) // 4
+
+
+class Axes:
+    def __init__(self, title):
+        self.title = title
+
+    def get_title(self):
+        return self.title
+
+
+class Figure:
+    def __init__(self, suptitle, titles):
+        self.suptitle, self.axes = suptitle, [Axes(title) for title in titles]
+
+    def get_suptitle(self):
+        return self.suptitle
+
+    def get_axes(self):
+        return self.axes
+
+
+def test_figure_title_prefers_the_suptitle():
+    assert _figure_title(Figure("UK GDP", ["2020", "2021"])) == "UK GDP"
+    assert _figure_title(Figure("", ["2020", "", "2021"])) == "2020, 2021"
+    assert _figure_title(Figure("", [])) == "figure"
+
+
+def test_changed_frames_are_stored_again(tmp_path):
+    pandas = pytest.importorskip("pandas")
+    store = ArtifactStore(root=str(tmp_path))
+    seen = {}
+    namespace = {"gdp": pandas.DataFrame({"year": range(30), "gdp": range(30)}), "small": pandas.DataFrame({"a": [1]})}
+
+    assert [ref.summary.split(":")[0] for ref in collect_dataframes(store, namespace, seen)] == ["gdp"]
+    assert collect_dataframes(store, namespace, seen) == []
+    namespace["gdp"].loc[0, "gdp"] = 99
+    assert len(collect_dataframes(store, namespace, seen)) == 1
+    # Stored frames are not text the tool returned, so nothing counts as saved
+    assert store.stats["text_chars_offloaded"] == 0
+
+
+def test_frames_with_unhashable_cells_are_still_collected(tmp_path):
+    pandas = pytest.importorskip("pandas")
+    store = ArtifactStore(root=str(tmp_path))
+    seen = {}
+    namespace = {"tags": pandas.DataFrame({"tags": [["a", "b"]] * 25})}
+    assert len(collect_dataframes(store, namespace, seen)) == 1
+    assert collect_dataframes(store, namespace, seen) == []
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from backend_pool import BackendPool, chat_model
+from stub_openai_server import StubOpenAIServer
+
+
+@pytest.fixture
+def servers():
+    started = [StubOpenAIServer(content="ok").start() for _ in range(2)]
+    yield started
+    for server in started:
+        server.stop()
+
+
+def test_failover_when_a_backend_dies(servers):
+    pool = BackendPool([s.base_url for s in servers], strategy="round_robin", health_interval_s=0)
+    model = chat_model("gpt-4o", pool=pool, api_key="stub")
+    servers[0].stop()
+    for _ in range(4):
+        assert model.invoke("hi").content == "ok"
+    summary = pool.summary()
+    assert summary["failovers"] >= 1
+    assert summary["backends"][pool.backends[0].url]["failures"] >= 1
+    assert servers[1].requests == 4
+
+
+def test_all_backends_down_raises(servers):
+    pool = BackendPool([s.base_url for s in servers], health_interval_s=0)
+    model = chat_model("gpt-4o", pool=pool, api_key="stub")
+    for server in servers:
+        server.stop()
+    with pytest.raises(Exception):
+        model.invoke("hi")
+    # One attempt per backend: the client's own retries are off
+    assert sum(b.requests for b in pool.backends) == 2
+
+
+def test_pooled_clients_do_not_retry():
+    pool = BackendPool(["http://127.0.0.1:1/v1"], health_interval_s=0)
+    assert chat_model("gpt-4o", pool=pool, api_key="stub").max_retries == 0
+    assert chat_model("gpt-4o", pool=pool, api_key="stub", max_retries=3).max_retries == 3
+
+
+def test_health_check_sends_the_api_key():
+    with StubOpenAIServer(api_key="secret") as server:
+        authorized = BackendPool([server.base_url], api_key="secret", health_interval_s=0)
+        authorized.check_health()
+        assert authorized.backends[0].state == "closed"
+
+        # A 401 means requests would fail too, so the backend is ejected
+        wrong_key = BackendPool([server.base_url], api_key="wrong", health_interval_s=0)
+        wrong_key.check_health()
+        assert wrong_key.backends[0].state == "open"
+
+
+def test_trial_that_is_never_closed_does_not_strand_the_backend():
+    pool = BackendPool(["http://a/v1", "http://b/v1"], cooldown_s=0, trial_timeout_s=0.05, health_interval_s=0)
+    a, b = pool.backends
+    pool._eject(a, "test")
+
+    trial = pool.acquire(exclude=[b])
+    assert trial is a and a.state == "half_open"
+    # The trial's response is never closed: a is left out while the trial is open...
+    assert pool.acquire() is b
+    time.sleep(0.06)
+    # ...until the trial times out and the next request takes its place
+    assert pool.acquire(exclude=[b]) is a and a.state == "half_open"
@@ -0,0 +1,51 @@
+import pytest
+
+from convergence import ConvergenceController, ConvergenceReport, edit_ratio
+
+
+def test_edit_ratio_bounds():
+    assert edit_ratio("", "") == 0.0
+    assert edit_ratio("the cat sat", "the cat sat") == 0.0
+    assert edit_ratio("a b c", "x y z") == 1.0
+    assert edit_ratio("", "new draft") == 1.0
+
+
+def test_edit_ratio_counts_local_edits():
+    before = "one two three four five six seven eight nine ten"
+    assert edit_ratio(before, before.replace("five", "FIVE")) == pytest.approx(0.1)
+    assert edit_ratio(before, before + " eleven") == pytest.approx(1 / 11)
+    assert edit_ratio(before, before.replace("three ", "")) == pytest.approx(0.1)
+
+
+def test_stale_edit_ratio_is_ignored_on_critic_hops():
+    controller = ConvergenceController(target_quality=9)
+    assert controller.decide([6.0], [0.01], iterations=3, edited=False) is None
+    assert "converged" in controller.decide([6.0], [0.01], iterations=3, edited=True)
+
+
+def test_quality_target_and_plateau():
+    controller = ConvergenceController(target_quality=8, plateau_patience=2, min_quality_gain=0.5)
+    assert "target" in controller.decide([6.0, 8.0], [], iterations=2)
+    assert "plateau" in controller.decide([6.0, 6.2, 6.1], [], iterations=3)
+    assert controller.decide([5.0, 6.0, 7.0], [], iterations=3) is None
+
+
+def test_iterations_saved_needs_natural_runs():
+    report = ConvergenceReport()
+    report.record(4, "quality 8 reached target 8", "editor")
+    assert report.iterations_saved(report.runs[0]) is None
+    assert report.summary()["iterations_saved"] == 0
+    assert report.summary()["unmeasured_early_exits"] == 1
+
+    report.record(9, None, "__end__")
+    assert report.iterations_saved(report.runs[0]) == 5
+
+
+def test_iterations_saved_falls_back_to_the_iteration_cap():
+    report = ConvergenceReport(max_iterations=12)
+    report.record(4, "quality 8 reached target 8", "editor")
+    assert report.iterations_saved(report.runs[0]) == 8
+    assert report.summary()["unmeasured_early_exits"] == 0
+
+    report.record(9, None, "__end__")
+    assert report.iterations_saved(report.runs[0]) == 5
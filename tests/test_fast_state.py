@@ -0,0 +1,73 @@
+import importlib.util
+import os
+import typing
+
+import dotenv
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
+from langgraph.graph import MessagesState
+
+import fast_state
+from fast_state import AppendOnlyMessagesState, MessageLog, append_messages, messages_state
+
+
+def test_new_messages_append_without_fallback(monkeypatch):
+    monkeypatch.setattr(fast_state, "add_messages", None)   # any fallback would raise
+    log = append_messages([], [HumanMessage("hi")])
+    log = append_messages(log, [AIMessage("hello")])
+    assert isinstance(log, MessageLog)
+    assert [m.content for m in log] == ["hi", "hello"]
+
+
+def test_subgraph_history_only_appends_the_tail(monkeypatch):
+    log = append_messages([], [HumanMessage("hi"), AIMessage("research")])
+    monkeypatch.setattr(fast_state, "add_messages", None)
+    returned = list(log) + [AIMessage("draft"), AIMessage("edit")]
+    merged = append_messages(log, returned)
+    assert [m.content for m in merged] == ["hi", "research", "draft", "edit"]
+    assert append_messages(merged, list(merged)) == merged
+
+
+def test_changed_or_removed_messages_fall_back_to_add_messages():
+    log = append_messages([], [HumanMessage("hi", id="1"), AIMessage("old", id="2")])
+    replaced = append_messages(log, [HumanMessage("hi", id="1"), AIMessage("new", id="2")])
+    assert [m.content for m in replaced] == ["hi", "new"]
+    removed = append_messages(replaced, [RemoveMessage(id="1")])
+    assert [m.content for m in removed] == ["new"]
+
+
+def test_older_views_do_not_see_later_appends():
+    base = append_messages([], [HumanMessage("hi")])
+    first = append_messages(base, [AIMessage("a")])
+    second = append_messages(base, [AIMessage("b")])
+    assert [m.content for m in first] == ["hi", "a"]
+    assert [m.content for m in second] == ["hi", "b"]
+    assert len(base) == 1
+
+
+def test_logs_concatenate_with_lists_on_either_side():
+    log = append_messages([], [HumanMessage("hi")])
+    assert [m.content for m in log + [AIMessage("a")]] == ["hi", "a"]
+    assert [m.content for m in [AIMessage("a")] + log] == ["a", "hi"]
+
+
+def test_messages_state_is_opt_in(monkeypatch):
+    monkeypatch.delenv("FAST_STATE", raising=False)
+    assert messages_state() is MessagesState
+    monkeypatch.setenv("FAST_STATE", "1")
+    assert messages_state() is AppendOnlyMessagesState
+    assert messages_state(fast=False) is MessagesState
+
+
+def test_network_reads_fast_state_from_dotenv(tmp_path, monkeypatch):
+    env_file = tmp_path / ".env"
+    env_file.write_text("FAST_STATE=1\n")
+    monkeypatch.delenv("FAST_STATE", raising=False)
+    real_load_dotenv = dotenv.load_dotenv
+    monkeypatch.setattr(dotenv, "load_dotenv", lambda *args, **kwargs: real_load_dotenv(env_file))
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    spec = importlib.util.spec_from_file_location("network_under_test", os.path.join(root, "network.py"))
+    network = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(network)
+    messages = typing.get_type_hints(network.NetworkState, include_extras=True)["messages"]
+    assert messages == typing.get_type_hints(AppendOnlyMessagesState, include_extras=True)["messages"]
@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from hedging import HedgeConfig, Hedger, HedgeTimeout
+from prompt_assembly import cache_stats
+
+
+def warm(hedger, node, latency_s=0.01, samples=5):
+    for _ in range(samples):
+        hedger._tracker(node).add(latency_s)
+
+
+class SlowFirstModel:
+    """The first call stalls, later calls answer at once - so the hedge wins"""
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, messages):
+        with self._lock:
+            self.calls += 1
+            first = self.calls == 1
+        if first:
+            time.sleep(0.3)
+        return AIMessage(content="ok", usage_metadata={"input_tokens": 10, "output_tokens": 1, "total_tokens": 11})
+
+
+def test_hedged_invoke_records_only_the_winner():
+    hedger = Hedger(HedgeConfig(min_samples=5, min_hedge_delay_s=0.02, budget_ratio=1.0))
+    warm(hedger, "node")
+    model = SlowFirstModel()
+    before = cache_stats.by_node.get("node", {}).get("calls", 0)
+
+    assert hedger.invoke("node", model, []).content == "ok"
+    time.sleep(0.35)   # let the losing primary finish
+    assert model.calls == 2
+    assert cache_stats.by_node["node"]["calls"] - before == 1
+    assert hedger.metrics["node"]["hedge_wins"] == 1
+
+
+def test_timeouts_are_not_retried():
+    hedger = Hedger(HedgeConfig(timeouts={"slow": 0.05}, max_retries=2))
+    calls = []
+
+    def stall():
+        calls.append(1)
+        time.sleep(0.2)
+
+    with pytest.raises(HedgeTimeout):
+        hedger.call("slow", stall)
+    assert len(calls) == 1
+    assert hedger.metrics["slow"]["retries"] == 0
+
+
+def test_cold_start_timeout_is_sized_per_node():
+    hedger = Hedger(HedgeConfig(default_timeout_s=60.0, timeouts={"writer": 300.0}))
+    assert hedger.timeout("writer") == 300.0
+    assert hedger.timeout("writer/gpt-4o") == 300.0
+    assert hedger.timeout("router") == 60.0
+
+
+def test_time_waiting_for_a_slot_does_not_count_toward_the_timeout():
+    hedger = Hedger(HedgeConfig(timeouts={"node": 0.15}, max_in_flight=1))
+    busy = threading.Thread(target=hedger.call, args=("other", lambda: time.sleep(0.1)))
+    busy.start()
+    time.sleep(0.01)
+
+    # Waits ~0.09s for the slot, then runs for 0.1s: only the run counts
+    assert hedger.call("node", lambda: time.sleep(0.1) or "ok") == "ok"
+    busy.join()
+    assert hedger._tracker("node").samples[0] < 0.15
+
+
+def test_no_hedge_without_a_free_slot():
+    hedger = Hedger(HedgeConfig(min_samples=5, min_hedge_delay_s=0.02, budget_ratio=1.0, max_in_flight=1))
+    warm(hedger, "node")
+    assert hedger.call("node", lambda: time.sleep(0.1) or "ok") == "ok"
+    assert hedger.metrics["node"]["hedges"] == 0 and hedger.hedges == 0
+
+
+def test_a_hedge_that_outlives_a_failed_primary_did_not_win():
+    hedger = Hedger(HedgeConfig(min_samples=5, min_hedge_delay_s=0.02, budget_ratio=1.0, max_retries=0))
+    warm(hedger, "node")
+    calls = []
+
+    def fail_first():
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(0.05)
+            raise RuntimeError("primary failed")
+        time.sleep(0.1)
+        return "ok"
+
+    assert hedger.call("node", fail_first) == "ok"
+    time.sleep(0.05)
+    assert hedger.metrics["node"]["hedges"] == 1
+    assert hedger.metrics["node"]["hedge_wins"] == 0
+    assert hedger.metrics["node"]["saved_s"] == 0.0
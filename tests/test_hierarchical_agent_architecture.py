@@ -0,0 +1,74 @@
+import importlib.util
+import os
+
+import dotenv
+import pytest
+from langchain_core.messages import AIMessage
+
+from fast_state import AppendOnlyMessagesState
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_module(name="hierarchical_under_test"):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, "hierarchical_agent_architecture.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_import_does_not_build_the_graphs_or_the_model():
+    module = load_module()
+    assert module.get_model.cache_info().currsize == 0
+    assert module.get_hierarchical_graph.cache_info().currsize == 0
+    with pytest.raises(AttributeError):
+        module.no_such_attribute
+
+
+def test_lazy_attributes_are_built_once_on_first_access(monkeypatch):
+    module = load_module()
+    built = []
+    monkeypatch.setitem(module._LAZY_ATTRIBUTES, "model", lambda: built.append(1) or "model")
+    assert module.model == "model"
+    assert built == [1]
+    assert module.hierarchical_graph is module.hierarchical_graph
+    assert module.get_hierarchical_graph.cache_info().currsize == 1
+
+
+def test_import_time_settings_are_read_from_dotenv(tmp_path, monkeypatch):
+    env_file = tmp_path / ".env"
+    env_file.write_text("ROUTING_MODE=full\nFAST_STATE=1\nRESEARCH_CACHE_TTL_S=60\n")
+    for var in ("ROUTING_MODE", "FAST_STATE", "RESEARCH_CACHE_TTL_S", "RESEARCH_CACHE_PATH"):
+        monkeypatch.delenv(var, raising=False)
+    real_load_dotenv = dotenv.load_dotenv
+    monkeypatch.setattr(dotenv, "load_dotenv", lambda *args, **kwargs: real_load_dotenv(env_file))
+
+    module = load_module()
+    assert module.routing_mode.wants_reasoning()
+    assert module.GraphState is AppendOnlyMessagesState
+    assert module.get_research_cache().ttl_s == 60
+
+
+class EchoGraph:
+    """Records the input size of every turn and answers with one message"""
+
+    def __init__(self):
+        self.inputs = []
+
+    def invoke(self, state, config=None):
+        self.inputs.append(len(state["messages"]))
+        return {"messages": state["messages"] + [AIMessage(content="[Research Agent] findings")]}
+
+
+def test_sessions_only_pass_the_recent_window_to_the_graph():
+    module = load_module()
+    session = module.new_session(window=4)
+    graph = EchoGraph()
+    try:
+        for turn in range(5):
+            session.invoke(graph, f"turn {turn}")
+    finally:
+        session.store.close()
+    # Whole history until the window fills, then the window, the omitted-history notice and the new message
+    assert graph.inputs == [1, 3, 5, 6, 6]
+    assert len(session.refs) == 10
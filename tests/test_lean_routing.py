@@ -0,0 +1,61 @@
+import typing
+
+import pytest
+from langchain_core.messages import AIMessage
+
+import hierarchical_agent_architecture as app
+from lean_routing import RoutingMode, choice_field, invoke_choice, lean_prompt
+
+
+class ChoiceModel:
+    """Replies to the lean prompt with a fixed option number"""
+
+    def __init__(self, reply):
+        self.reply, self.prompts = reply, []
+
+    def bind(self, **kwargs):
+        assert kwargs["max_tokens"] == 1
+        return self
+
+    def invoke(self, messages):
+        self.prompts.append(messages)
+        return AIMessage(content=self.reply)
+
+
+@pytest.mark.parametrize("supervisor, schema", [
+    (app.research_supervisor, app.ResearchRoutingDecision),
+    (app.content_supervisor, app.ContentRoutingDecision),
+    (app.top_level_supervisor, app.TeamRoutingDecision),
+])
+def test_choice_options_match_the_supervisor_destinations(supervisor, schema):
+    command = typing.get_type_hints(supervisor)["return"]
+    destinations = typing.get_args(typing.get_args(command)[0])
+    name, options = choice_field(schema)
+    assert set(options) == set(destinations)
+    assert name in ("next_agent", "next_team")
+
+
+def test_content_routing_picks_writer_and_editor():
+    model = ChoiceModel("2")
+    _, decision = invoke_choice(model, app.ContentRoutingDecision, [], use_logprobs=False)
+    assert decision.next_agent == "editor_agent"
+    assert "1. writer_agent" in model.prompts[0][-1].content
+
+
+def test_invalid_choice_returns_none():
+    _, decision = invoke_choice(ChoiceModel("7"), app.ContentRoutingDecision, [], use_logprobs=False)
+    assert decision is None
+
+
+def test_static_prompts_do_not_ask_for_reasoning():
+    for prompt in (app.RESEARCH_ROUTING_PROMPT, app.CONTENT_ROUTING_PROMPT, app.TOP_LEVEL_ROUTING_PROMPT):
+        assert "reasoning" not in prompt and "confidence" not in prompt
+    assert lean_prompt([], ["a", "b"])[-1].content.endswith("1. a\n2. b")
+
+
+def test_lean_routing_is_the_default(monkeypatch):
+    monkeypatch.delenv("ROUTING_MODE", raising=False)
+    assert not RoutingMode.from_env().wants_reasoning()
+    assert RoutingMode("full").wants_reasoning()
+    with pytest.raises(ValueError):
+        RoutingMode("debug")
@@ -0,0 +1,64 @@
+import threading
+import time
+
+from load_test import find_saturation, replay
+
+
+def sleeper(seconds):
+    def invoke(record):
+        time.sleep(seconds)
+    return invoke
+
+
+def test_short_trace_with_slow_requests_is_not_saturated():
+    # The whole trace arrives in under half a second, each request takes 0.5 s
+    records = [{} for _ in range(10)]
+    result = replay(records, sleeper(0.5), qps=20)
+    result["target_qps"] = 20
+    assert result["throughput"] > 0.9 * 20
+    assert find_saturation([result]) is None
+
+
+def test_single_worker_saturates():
+    records = [{} for _ in range(20)]
+    result = replay(records, sleeper(0.05), qps=100, max_workers=1)
+    result["target_qps"] = 100
+    assert result["throughput"] < 25
+    assert find_saturation([result]) == 100
+
+
+def test_errors_are_counted_not_timed():
+    def invoke(record):
+        if record["fail"]:
+            raise ValueError("boom")
+
+    result = replay([{"fail": i % 2 == 0} for i in range(6)], invoke, qps=200)
+    assert result["completed"] == 3
+    assert result["errors"] == {"ValueError": 3}
+
+
+def test_bunched_completions_do_not_exceed_the_offered_rate():
+    warmed_up = threading.Event()
+
+    def invoke(record):
+        # A cold start: everything waits for the first request, then finishes at once
+        if record["first"]:
+            time.sleep(0.6)
+            warmed_up.set()
+        warmed_up.wait()
+
+    result = replay([{"first": i == 0} for i in range(10)], invoke, qps=20)
+    assert result["throughput"] <= 20 * 1.01
+
+
+def test_offered_rate_counts_arrival_gaps():
+    result = replay([{} for _ in range(10)], sleeper(0.0), qps=20)
+    assert abs(result["offered_qps"] - 20) < 1e-9
+
+
+def test_recorded_trace_replays_in_arrival_order():
+    order = []
+    records = [{"offset_s": offset, "name": name} for offset, name in ((0.2, "c"), (0.0, "a"), (0.1, "b"))]
+    result = replay(records, lambda record: order.append(record["name"]))
+    assert order == ["a", "b", "c"]
+    assert abs(result["offered_qps"] - 10) < 1e-9
@@ -0,0 +1,63 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from message_store import ConversationSession, MessageStore
+
+
+class EchoGraph:
+    """Records the input window and answers with one AI message"""
+
+    def __init__(self):
+        self.inputs = []
+
+    def invoke(self, state, config=None):
+        self.inputs.append(list(state["messages"]))
+        return {"messages": [*state["messages"], AIMessage(content=f"reply {len(self.inputs)}")]}
+
+
+def tool_turn(i):
+    return [
+        HumanMessage(content=f"question {i}"),
+        AIMessage(content="", tool_calls=[{"name": "search", "args": {"q": str(i)}, "id": f"call-{i}"}]),
+        ToolMessage(content=f"result {i}a", tool_call_id=f"call-{i}"),
+        ToolMessage(content=f"result {i}b", tool_call_id=f"call-{i}"),
+        AIMessage(content=f"answer {i}"),
+    ]
+
+
+def test_spilled_messages_round_trip():
+    with MessageStore(max_in_memory=2) as store:
+        refs = store.put_many([("user", f"message {i}") for i in range(5)])
+        assert store.stats["spilled"] == 3
+        assert [m.content for m in store.load(refs)] == [f"message {i}" for i in range(5)]
+
+
+def test_window_never_starts_on_an_orphaned_tool_message():
+    with MessageStore() as store:
+        session = ConversationSession(store, window=7)
+        session.append(tool_turn(0) + tool_turn(1))
+        # The last 7 messages start on tool_turn(0)'s second ToolMessage
+        window = session.recent()
+        assert not isinstance(window[0], ToolMessage)
+        assert window[0].content == "answer 0"
+
+
+def test_dropped_history_is_announced_and_summarized():
+    summaries = []
+
+    def summarize(previous, dropped):
+        summaries.append([m.content for m in dropped])
+        return f"{previous}+{len(dropped)}"
+
+    with MessageStore() as store:
+        session = ConversationSession(store, window=3, summarize=summarize)
+        graph = EchoGraph()
+        for i in range(4):
+            session.invoke(graph, f"turn {i}")
+
+        first, last = graph.inputs[0], graph.inputs[-1]
+        assert not any(isinstance(m, SystemMessage) for m in first)
+        assert isinstance(last[0], SystemMessage)
+        assert "earlier messages" in last[0].content
+        # Each message is summarized once, when it leaves the window
+        assert summaries == [["turn 0"], ["reply 1", "turn 1"]]
+        assert session.summary == "+1+2"
@@ -0,0 +1,118 @@
+import time
+from typing import Literal
+
+from langchain_core.messages import AIMessage
+from pydantic import BaseModel, Field
+
+from model_tiering import TierPolicy, TieringEngine
+
+
+class Decision(BaseModel):
+    next_agent: Literal["a", "b", "__end__"]
+    reasoning: str
+    confidence: float = Field(default=0.0, ge=0.0, le=1.0)
+
+
+class FakeModel:
+    """Answers structured-output calls with a fixed decision payload"""
+
+    def __init__(self, name, payload, calls):
+        self.name, self.payload, self.calls = name, payload, calls
+
+    def with_structured_output(self, schema, include_raw=False):
+        return self
+
+    def invoke(self, messages):
+        self.calls.append(self.name)
+        return {"raw": AIMessage(content=""), "parsed": Decision(**self.payload), "parsing_error": None}
+
+
+def make_engine(payloads):
+    calls = []
+    engine = TieringEngine(
+        {"node": TierPolicy(models=("small", "large"), min_confidence=0.6)},
+        model_factory=lambda name, temperature: FakeModel(name, payloads[name], calls),
+    )
+    return engine, calls
+
+
+def test_confident_decision_stays_on_the_small_tier():
+    engine, calls = make_engine({"small": {"next_agent": "a", "reasoning": "", "confidence": 0.9}, "large": {}})
+    assert engine.invoke_structured("node", Decision, []).next_agent == "a"
+    assert calls == ["small"]
+
+
+def test_missing_confidence_is_judged_on_validity():
+    # e.g. a lean call on a backend without logprobs: no confidence, but a valid option
+    engine, calls = make_engine({"small": {"next_agent": "a", "reasoning": ""}, "large": {}})
+    assert engine.invoke_structured("node", Decision, []).next_agent == "a"
+    assert calls == ["small"]
+
+
+def test_low_confidence_escalates():
+    engine, calls = make_engine({
+        "small": {"next_agent": "a", "reasoning": "", "confidence": 0.3},
+        "large": {"next_agent": "b", "reasoning": "", "confidence": 0.8},
+    })
+    assert engine.invoke_structured("node", Decision, []).next_agent == "b"
+    assert calls == ["small", "large"]
+    assert engine.summary()["node"]["escalation_reasons"] == {"low_confidence": 1}
+
+
+def test_last_tier_answer_is_used_even_when_unsure():
+    engine, calls = make_engine({
+        "small": {"next_agent": "a", "reasoning": "", "confidence": 0.1},
+        "large": {"next_agent": "b", "reasoning": "", "confidence": 0.2},
+    })
+    assert engine.invoke_structured("node", Decision, []).next_agent == "b"
+    summary = engine.summary()["node"]
+    assert summary["served_by"] == {"large": 1}
+    # Escalated calls cost more than going straight to the last tier
+    assert summary["latency_saved_s"] <= 0
+
+
+class ChatModel:
+    """Plain chat model that answers with its own name after `delay_s`"""
+
+    def __init__(self, name, calls, delay_s=0.0):
+        self.name, self.calls, self.delay_s = name, calls, delay_s
+
+    def invoke(self, messages):
+        self.calls.append(self.name)
+        time.sleep(self.delay_s)
+        return AIMessage(content=self.name)
+
+
+def make_chat_engine(delays):
+    calls = []
+    engine = TieringEngine(
+        {"agent": TierPolicy(models=("small", "large"))},
+        model_factory=lambda name, temperature: ChatModel(name, calls, delays[name]),
+    )
+    return engine, calls
+
+
+def test_critic_rejection_reruns_on_the_large_tier():
+    engine, calls = make_chat_engine({"small": 0.0, "large": 0.0})
+    response = engine.invoke("agent", [], critic=lambda r: r.content == "large")
+    assert response.content == "large"
+    assert calls == ["small", "large"]
+    assert engine.summary()["agent"]["escalation_reasons"] == {"critic_rejected": 1}
+
+
+def test_rejection_by_a_later_critic_starts_on_the_large_tier():
+    engine, calls = make_chat_engine({"small": 0.0, "large": 0.0})
+    assert engine.invoke("agent", [], start_tier=1).content == "large"
+    assert calls == ["large"]
+    assert engine.summary()["agent"]["escalation_reasons"] == {"critic_rejected": 1}
+
+
+def test_latency_saved_against_the_large_tier():
+    engine, _ = make_chat_engine({"small": 0.01, "large": 0.1})
+    assert engine.latency_saved_s("agent") is None
+    engine.invoke("agent", [], start_tier=1)      # measures the large tier
+    for _ in range(3):
+        engine.invoke("agent", [])
+    saved = engine.summary()["agent"]["latency_saved_s"]
+    # Three small-tier calls each saved roughly 90 ms against the large tier
+    assert 0.2 < saved < 0.3
@@ -0,0 +1,36 @@
+import json
+
+from langchain_core.messages import AIMessage
+
+import network
+
+
+def reply_with(monkeypatch, *contents):
+    replies = iter(contents)
+    monkeypatch.setattr(network, "get_model", lambda: None)
+    monkeypatch.setattr(network.hedger, "invoke", lambda node, model, prompt: AIMessage(content=next(replies)))
+
+
+def test_paragraph_review_that_is_not_a_json_object_becomes_notes(monkeypatch):
+    reply_with(monkeypatch, "Edited paragraph.", "[7]")
+    result = network._edit_and_review(0, "Raw paragraph.", [])
+    assert result == {"paragraph": "Edited paragraph.", "quality_score": None, "notes": "[7]"}
+
+
+def test_approved_story_ends_after_the_final_review(monkeypatch):
+    reply_with(monkeypatch, json.dumps({"quality_score": 9, "approved": True, "notes": ""}))
+    command = network.final_review({"messages": [], "last_draft": "The story."})
+    assert command.goto == network.END
+    assert command.update == {"quality_scores": [9.0]}
+
+
+def test_rejected_story_gets_one_more_stitch_pass(monkeypatch):
+    review = json.dumps({"quality_score": 5, "approved": False, "notes": "The ending is rushed."})
+    reply_with(monkeypatch, review, review)
+
+    command = network.final_review({"messages": [], "last_draft": "The story."})
+    assert command.goto == "stitch"
+    assert command.update["paragraph_notes"] == ["Whole story: The ending is rushed."]
+
+    command = network.final_review({"messages": [], "last_draft": "The story.", "story_revised": True})
+    assert command.goto == network.END
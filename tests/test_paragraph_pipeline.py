@@ -0,0 +1,47 @@
+import threading
+import time
+
+from paragraph_pipeline import iter_paragraphs, pipeline_paragraphs
+
+
+def test_paragraphs_are_cut_across_chunk_boundaries():
+    chunks = ["The first para", "graph.\n", "\nThe second", " one.\n\n\n\n", "  \n\n", "The last one."]
+    assert list(iter_paragraphs(chunks)) == ["The first paragraph.", "The second one.", "The last one."]
+    assert list(iter_paragraphs([])) == []
+    assert list(iter_paragraphs(["  \n\n  "])) == []
+
+
+def test_paragraphs_are_yielded_as_soon_as_they_end():
+    seen = []
+
+    def chunks():
+        yield "one\n\n"
+        seen.append("writer continued")
+        yield "two"
+
+    stream = iter_paragraphs(chunks())
+    assert next(stream) == "one"
+    assert seen == []
+    assert next(stream) == "two"
+
+
+def test_stages_overlap_the_writer_and_keep_paragraph_order():
+    started = []
+    lock = threading.Lock()
+
+    def writer():
+        for i in range(3):
+            time.sleep(0.05)
+            yield f"p{i}"
+
+    def process(index, paragraph, previous):
+        with lock:
+            started.append(index)
+        time.sleep(0.1 if index == 0 else 0.0)   # the first paragraph finishes last
+        return index, paragraph, previous
+
+    results, timings = pipeline_paragraphs(writer(), process, max_workers=3)
+    assert results == [(0, "p0", []), (1, "p1", ["p0"]), (2, "p2", ["p0", "p1"])]
+    assert timings["first_paragraph_s"] < timings["writer_done_s"] <= timings["stages_done_s"]
+    # Paragraph 0 (0.05s in, 0.1s of work) was processed while the writer produced the rest
+    assert timings["stages_done_s"] < 0.15 + 0.07
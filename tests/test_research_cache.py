@@ -0,0 +1,129 @@
+import importlib.util
+import json
+import os
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from research_cache import DEFAULT_TTL_S, ResearchCache, fact_check_passed, topic_key
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def store(cache, request, research="findings"):
+    return cache.store(request, research, "ok\nVERDICT: PASS", model="gpt-4o", team_latency_s=2.0)
+
+
+def test_topic_key_folds_phrasings_together():
+    assert topic_key("the benefits of renewable energy") == "benefit energy renewabl"
+    assert topic_key("What are the benefits of renewable energy?") == "benefit energy renewabl"
+    assert topic_key("Research renewable energy benefits and write an article") == "benefit energy renewabl"
+    assert topic_key("please write a short article") == ""
+
+
+def test_entries_expire_after_the_ttl():
+    now = [1000.0]
+    cache = ResearchCache(ttl_s=60, clock=lambda: now[0])
+    store(cache, "coral reef bleaching")
+    assert cache.lookup("Why does coral reef bleaching happen?")[1] == "hit"
+    now[0] += 61
+    assert cache.lookup("coral reef bleaching")[1] == "stale"
+    assert cache.lookup("printing press history") == (None, "miss")
+    assert cache.summary()["latency_saved_s"] == 2.0
+
+
+def test_requests_without_a_topic_are_not_cached():
+    cache = ResearchCache()
+    assert store(cache, "write an article please") is None
+    assert cache.lookup("write an article please") == (None, "skip")
+    assert len(cache) == 0 and cache.stats["lookups"] == 0
+
+
+def test_entries_persist_and_reload_within_max_entries(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = ResearchCache(path=path)
+    for topic in ("coral reef bleaching", "printing press history", "remote work productivity"):
+        store(cache, topic)
+
+    reloaded = ResearchCache(path=path, max_entries=2)
+    assert len(reloaded) == 2
+    assert reloaded.lookup("coral reef bleaching")[1] == "miss"
+    entry, status = reloaded.lookup("printing press history")
+    assert status == "hit" and entry.research == "findings"
+
+
+def test_unreadable_cache_file_starts_empty(tmp_path, capsys):
+    for content in ("{bad", json.dumps([{"topic": "x"}]), json.dumps(5)):
+        path = tmp_path / "cache.json"
+        path.write_text(content)
+        assert len(ResearchCache(path=str(path))) == 0
+    assert "unreadable" in capsys.readouterr().out
+
+
+def test_malformed_ttl_falls_back_to_the_default(monkeypatch):
+    monkeypatch.setenv("RESEARCH_CACHE_TTL_S", "six hours")
+    assert ResearchCache.from_env().ttl_s == DEFAULT_TTL_S
+    monkeypatch.setenv("RESEARCH_CACHE_TTL_S", "60")
+    assert ResearchCache.from_env().ttl_s == 60.0
+
+
+def test_fact_check_verdict():
+    assert fact_check_passed("All figures check out.\nVERDICT: PASS")
+    assert not fact_check_passed("The GDP figure is wrong.\nVERDICT: FAIL")
+    assert not fact_check_passed("Looks fine to me")
+    assert not fact_check_passed("VERDICT: PASS for the dates\nVERDICT: FAIL overall")
+
+
+# -----------------------------------------------------------------------------
+# Research team integration
+# -----------------------------------------------------------------------------
+
+def load_app(monkeypatch, tmp_path):
+    bad = tmp_path / "bad.json"
+    bad.write_text("{bad")
+    monkeypatch.setenv("RESEARCH_CACHE_PATH", str(bad))
+    spec = importlib.util.spec_from_file_location("hierarchical_under_test", os.path.join(ROOT, "hierarchical_agent_architecture.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)   # a corrupt cache file must not break the import
+    return module
+
+
+class Decision:
+    next_agent = "research_agent"
+    reasoning = "test"
+    confidence = 1.0
+
+
+def test_corrupt_cache_path_does_not_break_the_app(monkeypatch, tmp_path):
+    app = load_app(monkeypatch, tmp_path)
+    assert len(app.get_research_cache()) == 0
+
+
+def test_repeat_team_visit_does_not_replay_the_cache(monkeypatch, tmp_path):
+    app = load_app(monkeypatch, tmp_path)
+    cache = ResearchCache()
+    app.enable_research_cache(cache)
+    monkeypatch.setattr(app, "route", lambda node, schema, prompt: Decision())
+    store(cache, "coral reef bleaching")
+
+    first = app.research_supervisor({"messages": [HumanMessage("coral reef bleaching")]})
+    assert first.update["messages"][0].content.startswith("[Research Cache]")
+
+    # Back in the research team within the same run: route normally instead of counting another hit
+    messages = [HumanMessage("coral reef bleaching"), AIMessage("[Research Agent] findings")]
+    again = app.research_supervisor({"messages": messages})
+    assert again.goto == "research_agent"
+    assert cache.stats["hits"] == 1 and cache.stats["lookups"] == 1
+
+
+def test_fact_checker_only_stores_passed_research(monkeypatch, tmp_path):
+    app = load_app(monkeypatch, tmp_path)
+    cache = ResearchCache()
+    app.enable_research_cache(cache)
+    messages = [HumanMessage("coral reef bleaching"), AIMessage("[Research Agent] findings")]
+
+    for verdict, stored in (("VERDICT: FAIL", 0), ("VERDICT: PASS", 1)):
+        monkeypatch.setattr(app.tiers, "invoke", lambda node, prompt, critic=None: AIMessage(f"checked\n{verdict}"))
+        command = app.fact_checker({"messages": messages})
+        assert len(cache) == stored
+        # A failed check sends the next research pass to the larger tier
+        assert command.update["research_rejected"] == (verdict == "VERDICT: FAIL")
@@ -0,0 +1,94 @@
+import importlib.util
+import os
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from research_pipeline import merge_results, user_question
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_script(name):
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), os.path.join(ROOT, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakePipeline:
+    def __init__(self):
+        self.questions = []
+
+    def context_message(self, question):
+        self.questions.append(question)
+        return HumanMessage(content="search results", name="research_pipeline")
+
+
+class FakeAgent:
+    def __init__(self):
+        self.inputs = []
+
+    def invoke(self, state):
+        self.inputs.append(list(state["messages"]))
+        return {"messages": [*state["messages"], AIMessage("GDP figures")]}
+
+
+def test_user_question_skips_relayed_agent_replies():
+    messages = [
+        HumanMessage("Chart the UK GDP"),
+        AIMessage("searching"),
+        HumanMessage("Here is the chart", name="chart_generator"),
+    ]
+    assert user_question(messages) == "Chart the UK GDP"
+    assert user_question([{"role": "user", "content": "task"}]) == "task"
+    assert user_question([AIMessage("no user")]) == ""
+
+
+def test_research_node_queries_the_user_request_and_drops_the_context(monkeypatch):
+    module = load_script("network-01")
+    pipeline, agent = FakePipeline(), FakeAgent()
+    monkeypatch.setattr(module, "get_research_pipeline", lambda: pipeline)
+    monkeypatch.setattr(module, "get_research_agent", lambda: agent)
+
+    state = {"messages": [
+        HumanMessage("Chart the UK GDP"),
+        HumanMessage("Need the 2020 figure too", name="chart_generator"),
+    ]}
+    command = module.research_node(state)
+
+    assert pipeline.questions == ["Chart the UK GDP"]
+    assert agent.inputs[0][-1].name == "research_pipeline"
+    update = command.update["messages"]
+    assert [m.content for m in update] == ["GDP figures"]
+    assert update[-1].name == "researcher"
+
+
+def test_revisits_reuse_the_research_context_of_the_run(monkeypatch):
+    module = load_script("network-01")
+    pipeline, agent = FakePipeline(), FakeAgent()
+    monkeypatch.setattr(module, "get_research_pipeline", lambda: pipeline)
+    monkeypatch.setattr(module, "get_research_agent", lambda: agent)
+
+    state = {"messages": [HumanMessage("Chart the UK GDP")]}
+    command = module.research_node(state)
+    state = {
+        "messages": [*state["messages"], *command.update["messages"]],
+        "research_contexts": command.update["research_contexts"],
+    }
+    module.research_node(state)
+
+    assert pipeline.questions == ["Chart the UK GDP"]
+    assert agent.inputs[1][-1].content == "search results"
+    assert agent.inputs[1][-1].name == "research_pipeline"
+
+
+def test_results_without_a_url_are_kept_apart():
+    results = {"uk gdp": [
+        {"url": "", "title": "ONS GDP release", "content": "GDP grew 0.1% in 2023", "score": 0.9},
+        {"url": "", "title": "Bank of England outlook", "content": "Growth is expected to stay weak", "score": 0.8},
+        {"url": "", "title": "", "content": "", "score": 0.1},
+        {"url": "", "title": "", "content": "", "score": 0.2},
+        {"url": "", "title": "ONS GDP release", "content": "GDP grew 0.1% in 2023 (revised)", "score": 0.5},
+    ]}
+    hits = merge_results("uk gdp", results, top_k=10)
+    assert sorted(hit.title for hit in hits) == ["", "", "Bank of England outlook", "ONS GDP release"]
@@ -0,0 +1,106 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Literal
+
+import pytest
+from pydantic import BaseModel, Field
+
+from model_tiering import TierPolicy, TieringEngine
+from routing_batcher import BatchMismatchError, RoutingBatcher
+
+
+class Decision(BaseModel):
+    next_agent: Literal["a", "b", "__end__"]
+    confidence: float = Field(default=0.0, ge=0.0, le=1.0)
+
+
+def echo_backend(schema, batch):
+    # Each request's only message names the option to pick
+    return [schema(next_agent=messages[0], confidence=1.0) for messages in batch]
+
+
+def test_every_request_gets_its_own_decision():
+    batcher = RoutingBatcher(echo_backend, max_batch_size=8, max_wait_ms=20)
+    try:
+        with ThreadPoolExecutor(6) as pool:
+            picks = ["a", "b", "__end__", "b", "a", "a"]
+            results = list(pool.map(lambda pick: batcher.submit(Decision, [pick]), picks))
+        assert [r.next_agent for r in results] == picks
+        assert batcher.stats["requests"] == 6
+        assert batcher.stats["batches"] < 6
+    finally:
+        batcher.close()
+
+
+def test_short_backend_reply_fails_the_leftover_requests():
+    def short_backend(schema, batch):
+        return [schema(next_agent="a")]
+
+    batcher = RoutingBatcher(short_backend, max_batch_size=2, max_wait_ms=200)
+    try:
+        with ThreadPoolExecutor(2) as pool:
+            # Both requests land in one 200 ms batch, which only gets one decision back
+            futures = [pool.submit(batcher.submit, Decision, [str(i)], 5) for i in range(2)]
+            outcomes = []
+            for future in futures:
+                try:
+                    outcomes.append(future.result().next_agent)
+                except BatchMismatchError:
+                    outcomes.append("failed")
+        assert sorted(outcomes) == ["a", "failed"]
+    finally:
+        batcher.close()
+
+
+def test_backend_errors_reach_the_caller():
+    def broken_backend(schema, batch):
+        raise ConnectionError("backend down")
+
+    batcher = RoutingBatcher(broken_backend, max_wait_ms=1)
+    try:
+        with pytest.raises(ConnectionError):
+            batcher.submit(Decision, ["a"])
+    finally:
+        batcher.close()
+
+
+def test_submit_times_out_instead_of_hanging():
+    def slow_backend(schema, batch):
+        time.sleep(0.5)
+        return [schema(next_agent="a") for _ in batch]
+
+    batcher = RoutingBatcher(slow_backend, max_wait_ms=1)
+    try:
+        with pytest.raises(TimeoutError):
+            batcher.submit(Decision, ["a"], timeout=0.05)
+    finally:
+        batcher.close()
+
+
+def test_submit_after_close_raises():
+    batcher = RoutingBatcher(echo_backend)
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit(Decision, ["a"])
+
+
+def test_batched_tiering_still_escalates():
+    class Model:
+        def __init__(self, name):
+            self.name = name
+
+    def make_batcher(model):
+        confidence = 0.1 if model.name == "small" else 0.9
+
+        def backend(schema, batch):
+            return [schema(next_agent="a" if model.name == "small" else "b", confidence=confidence) for _ in batch]
+
+        return RoutingBatcher(backend, max_wait_ms=1)
+
+    engine = TieringEngine({"node": TierPolicy(models=("small", "large"))}, model_factory=lambda name, t: Model(name))
+    engine.enable_batching(make_batcher)
+    try:
+        assert engine.invoke_structured("node", Decision, []).next_agent == "b"
+        assert engine.summary()["node"]["served_by"] == {"large": 1}
+    finally:
+        engine.enable_batching(None)
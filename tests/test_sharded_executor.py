@@ -0,0 +1,59 @@
+import queue
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from sharded_executor import ShardedExecutor, _recent_history
+
+
+def test_startup_error_fails_the_constructor():
+    start = time.monotonic()
+    with pytest.raises(RuntimeError, match="failed to start"):
+        ShardedExecutor("no-such-graph", workers=1)
+    assert time.monotonic() - start < 60
+
+
+def test_dead_worker_fails_its_pending_futures():
+    executor = ShardedExecutor("network", workers=1)
+    try:
+        # Queue a request the worker will never see, then kill it
+        executor._processes[0].kill()
+        future = executor.submit("thread-1", [{"role": "user", "content": "hi"}])
+        with pytest.raises(RuntimeError, match="died"):
+            future.result(timeout=10)
+        assert executor._futures == {}
+        with pytest.raises(RuntimeError, match="died"):
+            executor.submit("thread-1", [])
+    finally:
+        executor.close()
+
+
+def test_failed_put_does_not_leak_the_future():
+    executor = ShardedExecutor("network", workers=1, queue_size=1)
+    try:
+        # Stop the consumer so the shard's queue stays full
+        executor._processes[0].kill()
+        while 0 not in executor._dead:
+            time.sleep(0.01)
+        executor._dead.clear()
+        executor._inboxes[0].put((-1, "filler", []))
+        with pytest.raises(queue.Full):
+            executor.submit("thread-1", [], timeout=0.1)
+        assert executor._futures == {}
+    finally:
+        executor.close()
+
+
+def test_history_window_does_not_start_on_an_orphaned_tool_result():
+    call = AIMessage(content="", tool_calls=[{"name": "search", "args": {}, "id": "call-1"}])
+    messages = [
+        HumanMessage(content="question"),
+        call,
+        ToolMessage(content="result", tool_call_id="call-1"),
+        AIMessage(content="answer"),
+    ]
+    # A window of 2 would start on the tool result whose call it cut off
+    assert _recent_history(messages, 2) == messages[3:]
+    assert _recent_history(messages, 3) == messages[1:]
+    assert _recent_history(messages, 10) == messages
@@ -0,0 +1,91 @@
+import threading
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import tool
+
+from tool_retrieval import ToolIndex, ToolRetrievalModel
+
+
+@tool
+def math_agent(expression: str) -> str:
+    """Solve arithmetic and calculate numbers, equations and derivatives"""
+    return expression
+
+
+@tool
+def writing_agent(topic: str) -> str:
+    """Write and proofread essays, articles and stories"""
+    return topic
+
+
+@tool
+def research_agent(query: str) -> str:
+    """Search the web to research facts, news and data"""
+    return query
+
+
+TOOLS = [math_agent, writing_agent, research_agent]
+
+
+class RecordingModel:
+    def __init__(self):
+        self.bound = []
+
+    def bind_tools(self, tools, **kwargs):
+        self.bound.append([t.name for t in tools])
+        return self
+
+    def invoke(self, messages, config=None):
+        return AIMessage(content="ok")
+
+
+def test_bm25_ranks_the_matching_tool_first():
+    index = ToolIndex(TOOLS)
+    for query, expected in [
+        ("calculate the derivative of x^2", "math_agent"),
+        ("proofread my essay", "writing_agent"),
+        ("search the latest news about solar", "research_agent"),
+    ]:
+        scores = index.bm25(query)
+        assert TOOLS[scores.index(max(scores))].name == expected
+    selected, fell_back = index.select("write a story", k=1)
+    assert [t.name for t in selected] == ["writing_agent"] and not fell_back
+
+
+def test_no_match_falls_back_to_every_tool():
+    selected, fell_back = ToolIndex(TOOLS).select("zzz qqq", k=1)
+    assert fell_back and len(selected) == 3
+
+
+def test_bind_tools_returns_a_new_wrapper_sharing_stats():
+    retrieval = ToolRetrievalModel(RecordingModel(), k=1)
+    first = retrieval.bind_tools(TOOLS)
+    second = retrieval.bind_tools(TOOLS[:1])
+    assert first is not retrieval and first is not second
+    assert retrieval.index is None and len(first.index.tools) == 3 and len(second.index.tools) == 1
+
+    first.invoke([HumanMessage("proofread my essay")])
+    second.invoke([HumanMessage("calculate 2 + 2")])
+    assert retrieval.summary()["calls"] == 2
+
+
+def test_previously_called_tools_stay_bound():
+    model = RecordingModel()
+    bound = ToolRetrievalModel(model, k=1).bind_tools(TOOLS)
+    called = AIMessage(content="", tool_calls=[{"name": "research_agent", "args": {"query": "x"}, "id": "1"}])
+    bound.invoke([HumanMessage("proofread my essay"), called])
+    assert model.bound[-1] == ["writing_agent", "research_agent"]
+
+
+def test_stats_are_consistent_under_concurrency():
+    bound = ToolRetrievalModel(RecordingModel(), k=1).bind_tools(TOOLS)
+    threads = [
+        threading.Thread(target=lambda: [bound.invoke([HumanMessage("write a story")]) for _ in range(50)])
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert bound.stats["calls"] == 200
+    assert bound.stats["tools_bound"] == 200
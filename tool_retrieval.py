@@ -0,0 +1,199 @@
+"""
+Top-k tool retrieval for tool-calling supervisors.
+
+Binding every specialist tool on every turn puts all their JSON schemas in
+every prompt. `ToolIndex` scores tools against the request with a local
+BM25 index over each tool's name, description and argument descriptions
+(optionally blended with an embedding similarity), and
+`ToolRetrievalModel` binds only the top-k tools for each call:
+
+    model = ToolRetrievalModel(get_model(), k=3)
+    agent = create_react_agent(model, tools)     # tools: the full set
+
+The query is the latest human message, so every turn of one request sees the
+same tools. Tools the conversation already called stay bound, and when no
+tool matches (best score below `min_score`) the full set is bound instead.
+"""
+
+import json
+import math
+import re
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can for from how i in is it me my of on or please that the this to was what with you your"
+    .split()
+)
+
+# Rough chars-per-token ratio, used to report schema tokens
+CHARS_PER_TOKEN = 4
+
+
+def _tokens(text: str) -> List[str]:
+    words = []
+    for word in _WORD.findall(text.lower().replace("_", " ")):
+        if word in _STOPWORDS:
+            continue
+        words.append(_stem(word))
+    return words
+
+
+def _stem(word: str) -> str:
+    """Crude suffix folding: derivatives -> derivative, proofreading -> proofread"""
+    if len(word) > 5 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 6 and word.endswith("ing"):
+        return word[:-3]
+    if len(word) > 5 and word.endswith("ed"):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tool_text(tool) -> str:
+    schema = convert_to_openai_tool(tool)["function"]
+    arguments = " ".join(
+        f"{name} {spec.get('description', '')}" for name, spec in schema.get("parameters", {}).get("properties", {}).items()
+    )
+    return f"{schema['name']} {schema.get('description', '')} {arguments}"
+
+
+def schema_chars(tools: Sequence) -> int:
+    return sum(len(json.dumps(convert_to_openai_tool(tool))) for tool in tools)
+
+
+class ToolIndex:
+    def __init__(
+        self,
+        tools: Sequence,
+        k1: float = 1.5,
+        b: float = 0.75,
+        embed: Optional[Callable[[List[str]], List[List[float]]]] = None,
+    ):
+        self.tools = list(tools)
+        self.k1, self.b = k1, b
+        self.embed = embed
+        texts = [tool_text(tool) for tool in self.tools]
+        self._docs = [Counter(_tokens(text)) for text in texts]
+        self._lengths = [sum(doc.values()) for doc in self._docs]
+        self._average_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+        document_frequency = Counter(term for doc in self._docs for term in doc)
+        n = len(self._docs)
+        self._idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in document_frequency.items()}
+        self._vectors = embed(texts) if embed is not None and texts else None
+
+    def bm25(self, query: str) -> List[float]:
+        terms = _tokens(query)
+        scores = []
+        for doc, length in zip(self._docs, self._lengths):
+            score = 0.0
+            for term in terms:
+                frequency = doc.get(term)
+                if frequency:
+                    norm = self.k1 * (1 - self.b + self.b * length / (self._average_length or 1))
+                    score += self._idf[term] * frequency * (self.k1 + 1) / (frequency + norm)
+            scores.append(score)
+        return scores
+
+    def scores(self, query: str) -> List[float]:
+        scores = self.bm25(query)
+        if self._vectors is None:
+            return scores
+        # Hybrid: max-normalised BM25 plus cosine similarity of the embeddings
+        query_vector = self.embed([query])[0]
+        top = max(scores) or 1.0
+        return [0.5 * score / top + 0.5 * _cosine(query_vector, vector) for score, vector in zip(scores, self._vectors)]
+
+    def select(self, query: str, k: int, min_score: float = 0.0) -> Tuple[List, bool]:
+        """Top-k tools for `query`, or (all tools, True) when nothing matches"""
+        ranked = sorted(zip(self.scores(query), range(len(self.tools))), reverse=True)
+        if not ranked or ranked[0][0] <= min_score:
+            return list(self.tools), True
+        return [self.tools[i] for score, i in ranked[:k] if score > min_score], False
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _tool_name(tool) -> str:
+    return tool.name if isinstance(tool, BaseTool) else convert_to_openai_tool(tool)["function"]["name"]
+
+
+class ToolRetrievalModel(RunnableLambda):
+    """Chat model wrapper for create_react_agent that binds only the relevant tools per call"""
+
+    def __init__(self, model, k: int = 3, min_score: float = 0.0, embed: Optional[Callable] = None):
+        super().__init__(self._call, name="tool_retrieval")
+        self.model = model
+        self.k = k
+        self.min_score = min_score
+        self.embed = embed
+        self.index: Optional[ToolIndex] = None
+        self._bind_kwargs: Dict = {}
+        self._schema_chars: Dict[str, int] = {}
+        self.stats = {"calls": 0, "fallbacks": 0, "tools_bound": 0, "schema_chars_bound": 0, "schema_chars_full": 0}
+        self._stats_lock = threading.Lock()
+
+    def bind_tools(self, tools: Sequence, **kwargs) -> "ToolRetrievalModel":
+        """New wrapper over `tools` (create_react_agent hands over the full set once, at build time)"""
+        bound = ToolRetrievalModel(self.model, k=self.k, min_score=self.min_score, embed=self.embed)
+        bound.index = ToolIndex(tools, embed=self.embed)
+        bound._bind_kwargs = kwargs
+        bound._schema_chars = {_tool_name(tool): schema_chars([tool]) for tool in tools}
+        # Every binding reports into the same stats, so summary() on this wrapper covers all agents built from it
+        bound.stats, bound._stats_lock = self.stats, self._stats_lock
+        return bound
+
+    def _call(self, messages, config=None):
+        if isinstance(messages, PromptValue):
+            messages = messages.to_messages()
+        selected, fell_back = self.select(messages)
+        bound_chars = sum(self._schema_chars[_tool_name(tool)] for tool in selected)
+        with self._stats_lock:
+            self.stats["calls"] += 1
+            self.stats["fallbacks"] += fell_back
+            self.stats["tools_bound"] += len(selected)
+            self.stats["schema_chars_bound"] += bound_chars
+            self.stats["schema_chars_full"] += sum(self._schema_chars.values())
+        return self.model.bind_tools(selected, **self._bind_kwargs).invoke(messages, config)
+
+    def select(self, messages: Sequence[BaseMessage]) -> Tuple[List, bool]:
+        """Tools to bind for this call, and whether that is the full-set fallback"""
+        if self.index is None:
+            raise RuntimeError("ToolRetrievalModel used before bind_tools()")
+        query = next((str(m.content) for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+        selected, fell_back = self.index.select(query, self.k, self.min_score)
+        if fell_back:
+            return selected, True
+
+        # Keep tools the conversation already called, so follow-up turns can refer to them
+        called = {call["name"] for m in messages if isinstance(m, AIMessage) for call in m.tool_calls}
+        names = {_tool_name(tool) for tool in selected}
+        selected += [tool for tool in self.index.tools if _tool_name(tool) in called - names]
+        return selected, False
+
+    def summary(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        calls = stats["calls"] or 1
+        return {
+            "calls": stats["calls"],
+            "fallback_rate": round(stats["fallbacks"] / calls, 4),
+            "avg_tools_bound": round(stats["tools_bound"] / calls, 2),
+            "avg_schema_tokens_saved": round(
+                (stats["schema_chars_full"] - stats["schema_chars_bound"]) / calls / CHARS_PER_TOKEN, 1
+            ),
+        }